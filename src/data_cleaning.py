@@ -1,10 +1,13 @@
 """ functions used for cleaning data that has been scraped from mlssoccer.com
 """
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 import pandas as pd
 import numpy as np
 from sklearn.preprocessing import OneHotEncoder
 
+import tokenizer as tk
+from dataprep import season_stats_columns
+
 
 def remove_negative_scores(stats: List[str]) -> List[str]:
     """Check row of game summary data for a hyphen to indicate a negative
@@ -14,25 +17,7 @@ def remove_negative_scores(stats: List[str]) -> List[str]:
     Created specifically used for cleaning up the data from top_stats, but
     should be explored to see if it can be repurposed.
     """
-    cols = [
-        "GAMES PLAYED",
-        "AVG FANTASY PTS",
-        "TOTAL FANTASY PTS",
-        "LAST WK FANTASY PTS",
-        "3 WK AVG",
-        "5 WK AVG",
-        "HIGH SCORE",
-        "LOW SCORE",
-        "OWNED BY",
-        "$/POINT",
-        "RD 2 RANK",
-        "SEASON RANK",
-    ]
-
-    for i, _ in enumerate(stats):
-        if stats[i] == "-" and stats[i + 1] not in cols:
-            stats[i + 1] = "-" + stats[i + 1]
-            stats[i:] = stats[(i + 1) :]
+    stats[:] = tk.join_negative_scores(stats)
     return stats
 
 
@@ -42,10 +27,7 @@ def concat_salary_per_point(stats: List[str]) -> List[str]:
     if the cost per point field is following by more than 1 field, concat the
     two and remove the trailing field.
     """
-    for i, _ in enumerate(stats):
-        if stats[i] == "$/POINT" and stats[i + 2][:2] != "RD":
-            stats[i + 1] = stats[i + 1] + stats[i + 2]
-            stats.pop(i + 2)
+    stats[:] = tk.join_salary_per_point(stats)
     return stats
 
 
@@ -68,26 +50,122 @@ def calculate_ytd_fantasy_points(
     )
 
 
-def encode_categories(df: pd.DataFrame, name_col: bool = False) -> pd.DataFrame:
+def form_features(
+    df: pd.DataFrame,
+    stats: Optional[List[str]] = None,
+    windows: Tuple[int, ...] = (3, 5),
+    span: float = 3,
+    lag: int = 0,
+) -> pd.DataFrame:
+    """Calculate the form of each player in every round, from the season
+    stats dataframe with numeric stats, in one pass over the games sorted by
+    player and round. For each of stats, which are the columns from 'pts'
+    (points) to the end by default, the features are:
+
+        '<stat>_ytd' - the year-to-date total, as calculate_ytd_fantasy_points
+        '<stat>_avg_<n>' - the average of the last n games, for n in windows
+        '<stat>_ewm' - the exponentially weighted average with the span given
+
+    through each of the player's games. With lag=1 the features of a game
+    are those through the player's game before it, which is what is known
+    before the round is played, so they can be used for predicting it.
+
+    Returns the 'id', 'name', and 'rd' of each game with its features,
+    sorted by 'id' and 'rd'. This is a standalone helper, which DataPrep
+    doesn't call, so the features are only used for modeling if they are
+    merged on 'id' and 'rd' with the features of merge_data().
+    """
+    df.columns = [col.lower() for col in df.columns]
+
+    necessary_columns = ["rd", "name", "id", "pts"]
+    for col in necessary_columns:
+        assert col in df.columns, f"col '{col}' not in list of: {df.columns}"
+    assert all(window > 0 for window in windows), "windows must be positive"
+
+    if stats is None:
+        stats = df.columns[df.columns.get_loc("pts") :].tolist()
+
+    games = df.sort_values(by=["id", "rd"], kind="stable")
+    games = games.reset_index(drop=True)
+    values = games[stats].to_numpy(dtype=float)
+    player_ids = games["id"].to_numpy()
+    rows = np.arange(len(games))
+
+    # the position of each game in the player's games, and of the player's
+    # first game in the sorted games
+    first_game = np.r_[True, player_ids[1:] != player_ids[:-1]]
+    starts = np.maximum.accumulate(np.where(first_game, rows, 0))
+    game_number = rows - starts
+
+    # totals through each game, with a row of zeros in front, so the total
+    # of any run of a player's games is the difference of two rows
+    totals = np.vstack([np.zeros((1, len(stats))), np.cumsum(values, axis=0)])
+    end = rows + 1
+
+    features = {}
+    ytd = totals[end] - totals[starts]
+    for i, stat in enumerate(stats):
+        features[f"{stat}_ytd"] = ytd[:, i]
+
+    for window in windows:
+        played = np.minimum(game_number + 1, window)
+        average = (totals[end] - totals[end - played]) / played[:, None]
+        for i, stat in enumerate(stats):
+            features[f"{stat}_avg_{window}"] = average[:, i]
+
+    ewm = (
+        pd.DataFrame(values, columns=stats)
+        .groupby(player_ids, sort=False)
+        .ewm(span=span)
+        .mean()
+        .reset_index(level=0, drop=True)
+        .sort_index()
+    )
+    features.update({f"{stat}_ewm": ewm[stat].to_numpy() for stat in stats})
+
+    form = pd.DataFrame(features)
+    if lag:
+        # the first games of each player have no games before them to go on
+        form = form.groupby(player_ids, sort=False).shift(lag).fillna(0)
+
+    return pd.concat([games[["id", "name", "rd"]], form], axis=1)
+
+
+def encode_categories(
+    df: pd.DataFrame,
+    name_col: bool = False,
+    categories: Optional[List[List[str]]] = None,
+    sparse: bool = False,
+) -> pd.DataFrame:
     """Will take dataframe and create a one-hot data frame with columns for
     all unique values in each column of the dataframe.
 
     name_col=True will put 'OPPONENT' in front of the opponent team, to
     differentiate it from the player's team.
+
+    categories fixes the categories of each column in place of the unique
+    values, and sparse=True returns sparse uint8 columns.
     """
-    df_cols = [df[col].unique() for col in df.columns]
+    if categories is None:
+        df_cols = [df[col].unique() for col in df.columns]
+    else:
+        df_cols = categories
 
-    enc = OneHotEncoder(categories=df_cols, handle_unknown="ignore")
-    encoded_df = enc.fit_transform(df.values).toarray()
+    enc = OneHotEncoder(
+        categories=df_cols,
+        handle_unknown="ignore",
+        dtype=np.uint8 if sparse else np.float64,
+    )
+    encoded = enc.fit_transform(df.values)
 
     if name_col:
         ohe_cols = enc.get_feature_names(df.columns)
     else:
         ohe_cols = [elem for cat in enc.categories for elem in cat]
 
-    encoded_df = pd.DataFrame(encoded_df, columns=ohe_cols)
-
-    return encoded_df
+    if sparse:
+        return pd.DataFrame.sparse.from_spmatrix(encoded, columns=ohe_cols)
+    return pd.DataFrame(encoded.toarray(), columns=ohe_cols)
 
 
 def meta_feature_prep(df: pd.DataFrame) -> pd.DataFrame:
@@ -136,7 +214,7 @@ def season_feature_target_prep(
 
     # alter the type for all the numerical columns (which will be the target
     # array) to int from str
-    for col in df.iloc[:, 7:].columns:
+    for col in season_stats_columns(df)[1:]:
         df[col] = df[col].str.replace("-", "0", regex=False).astype(int)
 
     features = pd.concat(
@@ -148,7 +226,9 @@ def season_feature_target_prep(
         axis=1,
     ).rename(columns={"@": "away", "vs": "home"})
 
-    targets = pd.concat([df[["id", "name", "rd"]], df[df.columns[6:]]], axis=1)
+    targets = pd.concat(
+        [df[["id", "name", "rd"]], df[season_stats_columns(df)]], axis=1
+    )
 
     features.columns = [
         col.replace(" ", "_").lower() for col in features.columns
@@ -0,0 +1,272 @@
+"""Sources of the meta data, top stats and weekly stats of each player, which
+the scraper can use interchangeably. Each source returns the same rows as
+parsing a player's profile page (see player_data_scraper.parse_player_page).
+
+    - BrowserDataSource renders each player's profile page in Chrome and
+    scrapes it, as the scraper always has,
+    - JsonDataSource requests the JSON the site's front end loads for each
+    player over HTTP, without rendering the page, and
+    - FixtureDataSource reads the same JSON from files, for working offline.
+"""
+import json
+import os
+from abc import ABC, abstractmethod
+
+import requests
+from requests.adapters import HTTPAdapter
+from selenium.webdriver import Chrome
+
+import page_waits as pw
+import player_data_scraper as pds
+from page_cache import PageCache
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+PlayerRows = Tuple[List[Any], List[Any], List[List[Any]]]
+
+# the columns of the top stats and weekly stats that come from the payload, in
+# the order of the rows
+TOP_STATS_KEYS = pds.TOP_STATS_COLUMNS.split(",")[3:]
+GAME_STATS_KEYS = pds.SEASON_STATS_COLUMNS.split(",")[7:]
+
+
+class DataSource(ABC):
+    """Base class of the data sources. player_data() returns the (meta, top,
+    weekly) rows of a player, with the weekly rows for the games in rounds
+    week_first to week_last, inclusive, and raises an exception if the
+    player's data can't be had.
+
+    parser, if given, replaces the source's parser for the player, eg. for a
+    player with a quirk (see player_quirks).
+    """
+
+    @abstractmethod
+    def player_data(
+        self,
+        player: List[str],
+        week_first: int,
+        week_last: int,
+        parser: Optional[Callable[..., PlayerRows]] = None,
+    ) -> PlayerRows:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class BrowserDataSource(DataSource):
+    """Loads each player's profile page in a logged in driver, and parses the
+    rendered page.
+    """
+
+    def __init__(
+        self,
+        web_driver: Chrome,
+        timeout: float = pw.TIMEOUT,
+        page_cache: Optional[PageCache] = None,
+        page_link: str = pds.PLAYER_PROFILE_URL,
+    ) -> None:
+        self.web_driver = web_driver
+        self.timeout = timeout
+        self.page_cache = page_cache
+        self.page_link = page_link
+
+    def player_data(
+        self,
+        player: List[str],
+        week_first: int,
+        week_last: int,
+        parser: Optional[Callable[..., PlayerRows]] = None,
+    ) -> PlayerRows:
+        html = pds.load_player_page(
+            self.web_driver,
+            player,
+            page_link=self.page_link,
+            timeout=self.timeout,
+            page_cache=self.page_cache,
+        )
+        parse = parser or pds.parse_player_page
+        return parse(html, player, week_first, week_last)
+
+    def close(self) -> None:
+        self.web_driver.quit()
+
+
+def parse_player_payload(
+    payload: Dict[str, Any], player: List[str], week_first: int, week_last: int
+) -> PlayerRows:
+    """Convert a player's JSON payload into the same rows as parsing the
+    player's profile page. The form of the payload is assumed, as the
+    endpoint isn't documented, and is to be checked against what the site
+    sends (and payload_parser of the sources replaced if it differs):
+
+        {
+            "position": "M",
+            "salary": 8.5,
+            "stats": {"games_played": 7, "avg_fantasy_pts": 5.4, ...},
+            "games": [
+                {
+                    "round": 1,
+                    "home_away": "vs",
+                    "opponent": "LA Galaxy",
+                    "points": 6,
+                    "stats": {"MIN": 90, "GF": 0, ...},
+                },
+                ...
+            ],
+        }
+
+    with the keys of "stats" the columns of TOP_STATS_COLUMNS after the team,
+    and the keys of each game's "stats" the columns of SEASON_STATS_COLUMNS
+    after the points. The top stats row has a label before each value, as on
+    the page, for cycle_all_player_ids to clean up in the same way.
+
+    A ValueError naming the key is raised if the payload is missing any of
+    the keys above, other than a game's stats, which are zero when missing.
+    """
+    try:
+        return _payload_rows(payload, player, week_first, week_last)
+    except KeyError as error:
+        raise ValueError(
+            f"payload of player {player[0]} has no key {error}, so doesn't have "
+            "the form parse_player_payload assumes"
+        ) from error
+
+
+def _payload_rows(
+    payload: Dict[str, Any], player: List[str], week_first: int, week_last: int
+) -> PlayerRows:
+    meta_data = player[:3] + [payload["position"], float(payload["salary"])]
+
+    top_stats = player[:3] + [
+        token
+        for key in TOP_STATS_KEYS
+        for token in (key.upper().replace("_", " "), str(payload["stats"][key]))
+    ]
+
+    weekly_data = [
+        player[:3]
+        + [
+            str(game["round"]),
+            game["home_away"],
+            game["opponent"],
+            str(game["points"]),
+        ]
+        + [str(game["stats"].get(key, 0)) for key in GAME_STATS_KEYS]
+        for game in payload["games"]
+        if week_first <= int(game["round"]) <= week_last
+    ]
+
+    return meta_data, top_stats, weekly_data
+
+
+class JsonDataSource(DataSource):
+    """Requests each player's JSON payload from player_url, a template with a
+    {player_id} field for the endpoint the front end loads the player's data
+    from (which can be found in the network tab of the browser's developer
+    tools on a player's profile page).
+
+    The requests share one session, which keeps its connections to the site
+    alive between players. A session is created with a pool of pool_size
+    connections if one isn't given, and a session that is given is used as
+    it is, so sources can share it. payload_parser converts the JSON into
+    the rows, and can be replaced if the site's payload doesn't have the
+    form that parse_player_payload expects.
+    """
+
+    def __init__(
+        self,
+        player_url: str,
+        session: Optional[requests.Session] = None,
+        timeout: float = pw.TIMEOUT,
+        pool_size: int = 8,
+        payload_parser: Callable[..., PlayerRows] = parse_player_payload,
+    ) -> None:
+        self.player_url = player_url
+        self.timeout = timeout
+        self.payload_parser = payload_parser
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+        self.session = session
+
+    @classmethod
+    def from_driver(
+        cls, web_driver: Chrome, player_url: str, **kwargs: Any
+    ) -> "JsonDataSource":
+        """Create a source that is logged in to the site with the cookies of a
+        driver that is, eg. the driver from mls_fantasy_login().
+        """
+        source = cls(player_url, **kwargs)
+        for cookie in web_driver.get_cookies():
+            source.session.cookies.set(
+                cookie["name"],
+                cookie["value"],
+                domain=cookie.get("domain", ""),
+                path=cookie.get("path", "/"),
+            )
+        return source
+
+    def fetch(self, player_id: str) -> Dict[str, Any]:
+        """Return the JSON payload of the player."""
+        response = self.session.get(
+            self.player_url.format(player_id=player_id), timeout=self.timeout
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def player_data(
+        self,
+        player: List[str],
+        week_first: int,
+        week_last: int,
+        parser: Optional[Callable[..., PlayerRows]] = None,
+    ) -> PlayerRows:
+        parse = parser or self.payload_parser
+        return parse(self.fetch(player[0]), player, week_first, week_last)
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class FixtureDataSource(DataSource):
+    """Reads each player's JSON payload from <player id>.json in directory,
+    as saved by save_payloads(), so the scraper can be run and tested
+    without the site.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        payload_parser: Callable[..., PlayerRows] = parse_player_payload,
+    ) -> None:
+        self.directory = directory
+        self.payload_parser = payload_parser
+
+    def fetch(self, player_id: str) -> Dict[str, Any]:
+        with open(os.path.join(self.directory, f"{player_id}.json")) as f:
+            return json.load(f)
+
+    def player_data(
+        self,
+        player: List[str],
+        week_first: int,
+        week_last: int,
+        parser: Optional[Callable[..., PlayerRows]] = None,
+    ) -> PlayerRows:
+        parse = parser or self.payload_parser
+        return parse(self.fetch(player[0]), player, week_first, week_last)
+
+
+def save_payloads(
+    source: JsonDataSource, player_ids: List[List[str]], directory: str
+) -> None:
+    """Save the JSON payload of each player to directory, for use with a
+    FixtureDataSource.
+    """
+    os.makedirs(directory, exist_ok=True)
+    for player in player_ids:
+        with open(os.path.join(directory, f"{player[0]}.json"), "w") as f:
+            json.dump(source.fetch(player[0]), f)
@@ -1,10 +1,116 @@
 """ functions used for cleaning data that has been scraped from mlssoccer.com
 """
-from typing import Tuple, Dict
+from typing import Tuple, Dict, List, Optional
+import json
+import os
 import pandas as pd
 import numpy as np
+from pandas.api.types import is_numeric_dtype
 from sklearn.preprocessing import OneHotEncoder
 
+from feature_schema import FeatureSchema, schema_path
+
+
+# the columns of the season data about the game, before the stats of it
+SEASON_INFO_COLUMNS = ["id", "name", "team", "rd", "home_away", "opponent"]
+
+
+def season_stats_columns(df: pd.DataFrame) -> List[str]:
+    """Return the stats columns of the season data, 'pts' (points) and then
+    every other column that isn't one of SEASON_INFO_COLUMNS, in the order
+    they are in df. They are picked by name rather than position, so that
+    data read with only some of its columns doesn't shift the info columns
+    into the stats.
+
+    A ValueError is raised if df is missing 'pts' or any of the info columns.
+    """
+    missing = [col for col in SEASON_INFO_COLUMNS + ["pts"] if col not in df.columns]
+    if missing:
+        raise ValueError(f"season data has no columns: {', '.join(missing)}")
+    return ["pts"] + [
+        col for col in df.columns if col not in SEASON_INFO_COLUMNS + ["pts"]
+    ]
+
+
+def numeric_stats(df: pd.DataFrame) -> pd.DataFrame:
+    """Convert the stats columns of the season data after the points from
+    strings, where a '-' is a zero, to ints. Columns that are already
+    numeric, as they are when loaded from a snapshot, are left as they are.
+    """
+    for col in season_stats_columns(df)[1:]:
+        if not is_numeric_dtype(df[col]):
+            df[col] = df[col].str.replace("-", "0", regex=False).astype(int)
+    return df
+
+
+def numeric_top_stats(df: pd.DataFrame) -> pd.DataFrame:
+    """Convert the columns of the top stats data that are scraped as strings
+    to numbers, where they are not numeric already: last week's points, where
+    'DNP' is a zero, and the price per point, eg. '$1,607' to 1607.
+    """
+    if not is_numeric_dtype(df["last_wk_fantasy_pts"]):
+        df["last_wk_fantasy_pts"] = df["last_wk_fantasy_pts"].str.replace(
+            "DNP", "0", regex=False
+        )
+    df["last_wk_fantasy_pts"] = pd.to_numeric(
+        df["last_wk_fantasy_pts"], errors="coerce"
+    ).fillna(0)
+    if not is_numeric_dtype(df["$/point"]):
+        df["$/point"] = df["$/point"].str.replace("[^0-9]", "", regex=True).astype(int)
+    return df
+
+
+# ways of encoding the categorical features: "dense" one-hot float columns, or
+# "sparse" one-hot uint8 columns, which only store the ones
+ENCODINGS = ("dense", "sparse")
+
+
+def sparse_dtypes(df: pd.DataFrame) -> Dict[str, pd.SparseDtype]:
+    """Return the dtypes to put the sparse one-hot columns of df back to
+    after a merge, which turns them into sparse int64 or float64 columns:
+    sparse uint8, or sparse float64 for a column with missing values from an
+    outer merge, both with 0 as the fill value so only the ones are stored.
+    """
+    return {
+        col: pd.SparseDtype(np.float64 if df[col].isna().any() else np.uint8, 0)
+        for col, dtype in df.dtypes.items()
+        if isinstance(dtype, pd.SparseDtype)
+    }
+
+
+class CategoryVocabulary:
+    """CategoryVocabulary is a fixed list of the categories of each of the
+    categorical columns (position, home_away, team and opponent), saved as
+    JSON, so that the one-hot columns are the same, and in the same order,
+    whichever players and weeks are in the data.
+
+    A column's categories are taken from the data, sorted, the first time it
+    is encoded, and saved. After that, values of the column that are not in
+    the vocabulary are encoded as all zeros.
+    """
+
+    def __init__(self, filepath: str) -> None:
+        self.filepath = filepath
+        self.categories: Dict[str, List[str]] = {}
+        if os.path.exists(filepath):
+            with open(filepath) as f:
+                self.categories = json.load(f)
+
+    def save(self) -> None:
+        temp_path = self.filepath + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump(self.categories, f, indent=2, sort_keys=True)
+        os.replace(temp_path, self.filepath)
+
+    def categories_for(self, col: str, values: pd.Series) -> List[str]:
+        """Return the categories of the column, adding them from the values
+        (and saving) if the column isn't in the vocabulary yet.
+        """
+        if col not in self.categories:
+            self.categories[col] = sorted(values.dropna().unique().tolist())
+            self.save()
+        return self.categories[col]
+
 
 class DataPrep:
     """DataPrep takes in three data sets for MLS Fantasy soccer players:
@@ -22,12 +128,131 @@ class DataPrep:
         with kyes for position, salary, team, and predicted fantasy points.
         This dictionary will be used for the Linear Programming methodology
         to determined optimized teams.
+
+        The merged features and targets are computed once and cached on the
+        object. The cache is rebuilt when any of the three files changes on
+        disk (by modified time or size), or when refresh() is called.
+
+        The files are CSV files, or Parquet files from a snapshot (see
+        from_snapshot()), which can be loaded with only some of their columns
+        by passing a list of columns for any of 'meta', 'top_stats' and
+        'season' in columns.
+
+        The categorical features are one-hot encoded as dense float columns,
+        or with encoding="sparse" as sparse uint8 columns, which stay sparse
+        until the features are turned into arrays for a model. Passing the
+        filepath of a vocabulary (see CategoryVocabulary) fixes the one-hot
+        columns and their order across weeks.
     """
 
-    def __init__(self, meta: str, top_stats: str, season: str) -> None:
+    def __init__(
+        self,
+        meta: str,
+        top_stats: str,
+        season: str,
+        columns: Optional[Dict[str, List[str]]] = None,
+        encoding: str = "dense",
+        vocabulary: Optional[str] = None,
+    ) -> None:
+        assert encoding in ENCODINGS, f"encoding '{encoding}' not in: {ENCODINGS}"
         self.meta = meta
         self.top_stats = top_stats
         self.season = season
+        self.columns = columns or {}
+        self.encoding = encoding
+        self.vocabulary = CategoryVocabulary(vocabulary) if vocabulary else None
+        self._merged: Optional[Tuple[pd.DataFrame, pd.DataFrame]] = None
+        self._merged_signature: Optional[Tuple[Tuple[int, int], ...]] = None
+        self._meta: Optional[pd.DataFrame] = None
+        self._meta_signature: Optional[Tuple[int, int]] = None
+
+    @classmethod
+    def from_snapshot(
+        cls,
+        store_root: str,
+        scrape_date: Optional[str] = None,
+        game_week: Optional[int] = None,
+        columns: Optional[Dict[str, List[str]]] = None,
+        **kwargs,
+    ) -> "DataPrep":
+        """Create a DataPrep for the snapshot in the store for the scrape date
+        and round, or the most recent one if either isn't given. Any other
+        keyword arguments are passed on to DataPrep.
+        """
+        from snapshot_store import SOURCES, SnapshotStore
+
+        store = SnapshotStore(store_root)
+        if scrape_date is None or game_week is None:
+            latest = store.latest(game_week)
+            assert latest is not None, f"no snapshots in {store_root}"
+            scrape_date, game_week = latest
+
+        return cls(
+            *[store.path(scrape_date, game_week, source) for source in SOURCES],
+            columns=columns,
+            **kwargs,
+        )
+
+    def _read(self, source: str) -> pd.DataFrame:
+        """Read one of 'meta', 'top_stats' and 'season', from a Parquet file
+        with its stored types, or otherwise from a CSV file.
+        """
+        filepath = getattr(self, source)
+        columns = self.columns.get(source)
+        if filepath.endswith(".parquet"):
+            from snapshot_store import read_columns
+
+            return read_columns(filepath, columns)
+        return pd.read_csv(filepath, usecols=columns)
+
+    @staticmethod
+    def _file_signature(filepath: str) -> Tuple[int, int]:
+        stat = os.stat(filepath)
+        return stat.st_mtime_ns, stat.st_size
+
+    def _source_signature(self) -> Tuple[Tuple[int, int], ...]:
+        """Modified time and size of each of the source files, used to tell
+        if the cached data is stale.
+        """
+        return tuple(
+            self._file_signature(filepath)
+            for filepath in (self.meta, self.top_stats, self.season)
+        )
+
+    def refresh(self) -> None:
+        """Drop the cached data, so the next call that needs it will read and
+        transform the source files again.
+        """
+        self._merged = None
+        self._merged_signature = None
+        self._meta = None
+        self._meta_signature = None
+
+    def _merged_data(self) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """Return the cached features and targets, building them first if
+        they have not been built or the source files have changed. The frames
+        are shared with the cache, so callers must not modify them in place.
+        """
+        signature = self._source_signature()
+        if self._merged is None or signature != self._merged_signature:
+            self._merged = self._build_merged_data()
+            self._merged_signature = signature
+        return self._merged
+
+    def _meta_data(self) -> pd.DataFrame:
+        """Return the cached meta data, with the column names formatted as the
+        feature columns, reading it first if it has not been read or the file
+        has changed. The frame is shared with the cache.
+        """
+        signature = self._file_signature(self.meta)
+        if self._meta is None or signature != self._meta_signature:
+            meta = self._read("meta")
+            meta.columns = [
+                col.replace(" ", "_").replace(".", "").lower() for col in meta.columns
+            ]
+            self._meta = meta
+            self._meta_signature = signature
+        return self._meta
 
     def _encode_categories(
         self, df: pd.DataFrame, name_col: bool = False
@@ -37,20 +262,33 @@ class DataPrep:
     
         name_col=True will put 'OPPONENT' in front of the opponent team, to
         differentiate it from the player's team.
+
+        With a vocabulary, the columns are its categories instead of the
+        unique values, and with encoding="sparse" the columns are sparse.
         """
-        df_cols = [df[col].unique() for col in df.columns]
+        if self.vocabulary is not None:
+            df_cols = [
+                self.vocabulary.categories_for(col, df[col]) for col in df.columns
+            ]
+        else:
+            df_cols = [df[col].unique() for col in df.columns]
 
-        enc = OneHotEncoder(categories=df_cols, handle_unknown="ignore")
-        encoded_df = enc.fit_transform(df.values).toarray()
+        sparse = self.encoding == "sparse"
+        enc = OneHotEncoder(
+            categories=df_cols,
+            handle_unknown="ignore",
+            dtype=np.uint8 if sparse else np.float64,
+        )
+        encoded = enc.fit_transform(df.values)
 
         if name_col:
             ohe_cols = enc.get_feature_names(df.columns)
         else:
             ohe_cols = [elem for cat in enc.categories for elem in cat]
 
-        encoded_df = pd.DataFrame(encoded_df, columns=ohe_cols)
-
-        return encoded_df
+        if sparse:
+            return pd.DataFrame.sparse.from_spmatrix(encoded, columns=ohe_cols)
+        return pd.DataFrame(encoded.toarray(), columns=ohe_cols)
 
     def meta_feature_prep(self, df: pd.DataFrame) -> pd.DataFrame:
         """Takes in a dataframe of meta_data from MLS soccer fantasy
@@ -99,8 +337,7 @@ class DataPrep:
 
         # alter the type for all the numerical columns (which will be the target
         # array) to int from str
-        for col in df.iloc[:, 7:].columns:
-            df[col] = df[col].str.replace("-", "0", regex=False).astype(int)
+        df = numeric_stats(df)
 
         features = pd.concat(
             [
@@ -111,7 +348,9 @@ class DataPrep:
             axis=1,
         ).rename(columns={"@": "away", "vs": "home"})
 
-        targets = pd.concat([df[["id", "name", "rd"]], df[df.columns[6:]]], axis=1)
+        targets = pd.concat(
+            [df[["id", "name", "rd"]], df[season_stats_columns(df)]], axis=1
+        )
 
         features.columns = [
             col.replace(" ", "_").replace(".", "").lower() for col in features.columns
@@ -125,18 +364,9 @@ class DataPrep:
         player and convert the table data to a features dataframe. Depending
         on modeling, features will be added or removed.
         """
+        df = numeric_top_stats(df)
         df = df.rename(columns={"$/point": "price_per_point"})
-        df["last_wk_fantasy_pts"] = df["last_wk_fantasy_pts"].str.replace(
-            "DNP", "0", regex=False
-        )
-        df["last_wk_fantasy_pts"] = pd.to_numeric(
-            df["last_wk_fantasy_pts"], errors="coerce"
-        )
-        df["last_wk_fantasy_pts"].fillna(0, inplace=True)
         df["owned_by"] = df["owned_by"] / 100
-        df["price_per_point"] = (
-            df["price_per_point"].str.replace("[^0-9]", "", regex=True).astype(int)
-        )
         df["price_per_point"] = df["price_per_point"] / 1000
 
         return df[
@@ -158,11 +388,21 @@ class DataPrep:
         data, and season data. Convert to pandas dataframes, clean and transform
         each accordingly, then merge into a data set used for training.
         A tuple is returned with the data set and corresponding target data.
+
+        The merge is only done once per object (see refresh()), and copies of
+        the cached data are returned.
+        """
+        features, targets = self._merged_data()
+        return features.copy(), targets.copy()
+
+    def _build_merged_data(self) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """Read the three source files, transform and merge them, for
+        merge_data() to cache.
         """
-        meta_df = self.meta_feature_prep(pd.read_csv(self.meta))
-        top_data_df = self.top_stats_feature_prep(pd.read_csv(self.top_stats))
+        meta_df = self.meta_feature_prep(self._read("meta"))
+        top_data_df = self.top_stats_feature_prep(self._read("top_stats"))
         season_feature_df, season_target_df = self.season_feature_target_prep(
-            pd.read_csv(self.season)
+            self._read("season")
         )
 
         features_merged = pd.merge(
@@ -181,6 +421,7 @@ class DataPrep:
         )
 
         features_merged.drop(columns=["name_top", "name_season"], inplace=True)
+        features_merged = features_merged.astype(sparse_dtypes(features_merged))
 
         season_features_df = features_merged.sort_values(by=["id", "rd"])
         season_targets_df = season_target_df.sort_values(by=["id", "rd"])
@@ -203,7 +444,7 @@ class DataPrep:
         for test data)
         Output -> Tuple[X_train, X_test, y_train, y_test]
         """
-        season_features, season_targets = self.merge_data()
+        season_features, season_targets = self._merged_data()
 
         X_train = season_features[season_features["rd"] <= rounds].copy()
         X_test = season_features[season_features["rd"] > rounds].copy()
@@ -221,6 +462,51 @@ class DataPrep:
 
         return X_train, X_test, y_train, y_test
 
+    def feature_schema(self) -> FeatureSchema:
+        """Return the schema of the features as they are given to a model,
+        which are the columns of get_data_for_modeling and
+        get_matrix_for_predictions, with the category vocabulary, if any.
+        """
+        features, _ = self._merged_data()
+        vocabularies = self.vocabulary.categories if self.vocabulary else None
+        return FeatureSchema.from_features(
+            features.drop(columns=["id", "name", "rd"]), vocabularies
+        )
+
+    def save_feature_schema(self, model_filepath: str) -> str:
+        """Save the feature schema next to the model trained on these
+        features, for create_player_dict to line up the features for
+        predictions with, and return the path it was saved to.
+        """
+        filepath = schema_path(model_filepath)
+        self.feature_schema().save(filepath)
+        return filepath
+
+    def _round_features(self, game_week: int) -> pd.DataFrame:
+        """Features for all players for the game week, with the 'id' column
+        first, sorted by id so each player's rows are contiguous.
+        """
+        features, _ = self._merged_data()
+
+        return features[features["rd"] == game_week].drop(columns=["name", "rd"])
+
+    def get_player_teams(self) -> Dict[int, str]:
+        """Return a dictionary of player id to the player's team, formatted
+        the same as the team columns of the features.
+        """
+        return (
+            self._meta_data()
+            .set_index("id")["team"]
+            .str.replace(" ", "_", regex=False)
+            .str.replace(".", "", regex=False)
+            .str.lower()
+            .to_dict()
+        )
+
+    def get_player_names(self) -> Dict[int, str]:
+        """Return a dictionary of player id to the player's name."""
+        return self._meta_data().set_index("id")["name"].to_dict()
+
     def get_data_for_predictions(
         self, game_week: int
     ) -> Dict[int, Dict[str, np.ndarray]]:
@@ -229,30 +515,44 @@ class DataPrep:
         will return a dictionary of dictrionaries that will be used for making
         predictions for each player. 
         """
-        features, _ = self.merge_data()
+        features = self._round_features(game_week)
+        teams = self.get_player_teams()
 
-        features = features[features["rd"] == game_week].drop(columns=["name", "rd"])
+        ids = features["id"].to_numpy()
+        vectors = features.drop(columns=["id"]).values
 
-        teams = pd.read_csv(self.meta)
-        teams.columns = [
-            col.replace(" ", "_").replace(".", "").lower() for col in teams.columns
-        ]
-        teams = teams.set_index("id").to_dict("index")
+        # the features are sorted by id, so each player's rows are found by
+        # slicing between the first row of that player and of the next one
+        player_ids, starts = np.unique(ids, return_index=True)
+        ends = np.append(starts[1:], len(ids))
 
         ids_and_vectors = {
             player_id: {
-                "vector": features.loc[features["id"] == player_id, :]
-                .drop(columns=["id"])
-                .values,
-                "salary": features.loc[features["id"] == player_id, :]
-                .drop(columns=["id"])
-                .values[0][0],
-                "team": teams[player_id]["team"]
-                .replace(" ", "_")
-                .replace(".", "")
-                .lower(),
+                "vector": vectors[start:end],
+                "salary": vectors[start][0],
+                "team": teams[player_id],
             }
-            for player_id in features["id"]
+            for player_id, start, end in zip(player_ids.tolist(), starts, ends)
         }
 
         return ids_and_vectors
+
+    def get_matrix_for_predictions(self, game_week: int) -> pd.DataFrame:
+        """Return the features for the game week as one (N, F) float matrix
+        with a row for each of the N players, indexed by player id. Where a
+        player has more than one match in the round, the first is used, as
+        in get_data_for_predictions. Sparse columns stay sparse, as sparse
+        floats.
+        """
+        features = self._round_features(game_week)
+        features = features.drop_duplicates(subset="id", keep="first")
+        features = features.set_index("id")
+
+        return features.astype(
+            {
+                col: pd.SparseDtype(np.float64, 0)
+                if isinstance(dtype, pd.SparseDtype)
+                else np.float64
+                for col, dtype in features.dtypes.items()
+            }
+        )
@@ -0,0 +1,154 @@
+"""The layout of the feature vectors a model was trained on, saved next to the
+model so that the features for predictions can be lined up with it.
+"""
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_numeric_dtype
+
+from typing import Dict, List, Optional, Tuple
+
+# version of the format of the saved schema
+SCHEMA_VERSION = 1
+
+
+def schema_path(model_filepath: str) -> str:
+    """Return the path of the schema saved next to a model, eg.
+    '../models/nn_2layers.pt' -> '../models/nn_2layers.pt.schema.json'.
+    """
+    return model_filepath + ".schema.json"
+
+
+class FeatureSchema:
+    """FeatureSchema holds the names and dtypes of the columns of the feature
+    vectors, in order, and the category vocabularies the one-hot columns were
+    encoded with.
+
+    The fingerprint is a hash of the columns and vocabularies, which changes
+    whenever the layout of the features does.
+    """
+
+    def __init__(
+        self,
+        columns: List[str],
+        dtypes: List[str],
+        vocabularies: Optional[Dict[str, List[str]]] = None,
+        version: int = SCHEMA_VERSION,
+    ) -> None:
+        assert len(columns) == len(dtypes), "need a dtype for every column"
+        assert version <= SCHEMA_VERSION, f"schema version {version} is not known"
+        self.columns = list(columns)
+        self.dtypes = list(dtypes)
+        self.vocabularies = vocabularies or {}
+        self.version = version
+        self._positions = {col: i for i, col in enumerate(self.columns)}
+        # index mappings from the column layouts already seen
+        self._indexers: Dict[Tuple[str, ...], Tuple[np.ndarray, np.ndarray]] = {}
+
+    @classmethod
+    def from_features(
+        cls,
+        features: pd.DataFrame,
+        vocabularies: Optional[Dict[str, List[str]]] = None,
+    ) -> "FeatureSchema":
+        """Create the schema of a frame of features, in model input order."""
+        return cls(
+            features.columns.tolist(),
+            [str(dtype) for dtype in features.dtypes],
+            vocabularies,
+        )
+
+    @property
+    def fingerprint(self) -> str:
+        layout = json.dumps([self.columns, self.vocabularies], sort_keys=True)
+        return hashlib.sha256(layout.encode()).hexdigest()[:16]
+
+    def to_dict(self) -> Dict:
+        return {
+            "version": self.version,
+            "fingerprint": self.fingerprint,
+            "columns": self.columns,
+            "dtypes": self.dtypes,
+            "vocabularies": self.vocabularies,
+        }
+
+    def save(self, filepath: str) -> None:
+        temp_path = filepath + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        os.replace(temp_path, filepath)
+
+    @classmethod
+    def load(cls, filepath: str) -> "FeatureSchema":
+        with open(filepath) as f:
+            saved = json.load(f)
+        schema = cls(
+            saved["columns"], saved["dtypes"], saved["vocabularies"], saved["version"]
+        )
+        assert (
+            schema.fingerprint == saved["fingerprint"]
+        ), f"schema {filepath} does not match its fingerprint"
+        return schema
+
+    def __contains__(self, column: str) -> bool:
+        return column in self._positions
+
+    def index(self, column: str) -> int:
+        """Return the position of the column in the feature vectors."""
+        return self._positions[column]
+
+    def _indexer(self, columns: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the positions in the schema, and in columns, of the columns
+        that are in both, which is worked out once for each layout.
+        """
+        key = tuple(columns)
+        if key not in self._indexers:
+            pairs = [
+                (self._positions[col], i)
+                for i, col in enumerate(columns)
+                if col in self._positions
+            ]
+            schema_idx, source_idx = zip(*pairs) if pairs else ((), ())
+            self._indexers[key] = (
+                np.array(schema_idx, dtype=np.intp),
+                np.array(source_idx, dtype=np.intp),
+            )
+        return self._indexers[key]
+
+    def align(
+        self, features: pd.DataFrame, out: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Return the features as an (N, F) float array with the columns of the
+        schema, in its order. Columns of the schema the features don't have
+        are zeros, as for a team that isn't playing, and columns that aren't
+        in the schema are left out.
+
+        Every column of the features that is in the schema must be numeric,
+        as the columns the model was trained on were, or a ValueError is
+        raised.
+
+        out is an array to write into, which is reused if it has at least N
+        rows and exactly F columns, so the same memory can be used week after
+        week. The array returned is then a view of out.
+        """
+        n_rows, n_cols = len(features), len(self.columns)
+        if out is not None and out.shape[0] >= n_rows and out.shape[1] == n_cols:
+            aligned = out[:n_rows]
+            aligned.fill(0)
+        else:
+            aligned = np.zeros((n_rows, n_cols))
+
+        schema_idx, source_idx = self._indexer(features.columns.tolist())
+        not_numeric = [
+            f"'{self.columns[i]}' is {features.dtypes.iloc[j]}, "
+            f"was {self.dtypes[i]}"
+            for i, j in zip(schema_idx, source_idx)
+            if not is_numeric_dtype(features.dtypes.iloc[j])
+        ]
+        if not_numeric:
+            raise ValueError(f"features are not numeric: {', '.join(not_numeric)}")
+        aligned[:, schema_idx] = features.iloc[:, source_idx].to_numpy(dtype=float)
+        return aligned
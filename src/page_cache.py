@@ -0,0 +1,98 @@
+"""On disk cache of the raw html of player profile pages, so that pages can be
+parsed again offline without scraping the site.
+"""
+import datetime
+import gzip
+import hashlib
+import json
+import os
+import threading
+
+from typing import List, Optional, Tuple
+
+
+class PageCache:
+    """PageCache stores each page compressed under the sha256 digest of its
+    html, so a page that hasn't changed between scrapes is only stored once:
+
+        root/objects/ab/abcdef....html.gz
+
+    and keeps an index per player of when each page was fetched:
+
+        root/index/<player id>.jsonl
+
+    with a line of {"fetched_at": ..., "digest": ...} for each fetch, where
+    fetched_at is an ISO 8601 UTC timestamp.
+    """
+
+    def __init__(self, root: str) -> None:
+        self.root = root
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+        os.makedirs(os.path.join(root, "index"), exist_ok=True)
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.root, "objects", digest[:2], digest + ".html.gz")
+
+    def _index_path(self, player_id: str) -> str:
+        return os.path.join(self.root, "index", f"{player_id}.jsonl")
+
+    def put(self, player_id: str, html: str, fetched_at: Optional[str] = None) -> str:
+        """Store the html of the player's page, fetched at fetched_at (now, if
+        not given), and return its digest.
+        """
+        if fetched_at is None:
+            fetched_at = datetime.datetime.utcnow().isoformat(timespec="seconds")
+
+        data = html.encode()
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # written under a temporary name first, so a page is never
+            # half written if the scrape is stopped
+            temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with gzip.open(temp_path, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+
+        with open(self._index_path(player_id), "a") as f:
+            f.write(json.dumps({"fetched_at": fetched_at, "digest": digest}) + "\n")
+
+        return digest
+
+    def get(self, digest: str) -> str:
+        """Return the html stored under digest."""
+        with gzip.open(self._object_path(digest), "rb") as f:
+            return f.read().decode()
+
+    def fetches(self, player_id: str) -> List[Tuple[str, str]]:
+        """Return (fetched_at, digest) for each time the player's page was
+        stored, oldest first.
+        """
+        if not os.path.exists(self._index_path(player_id)):
+            return []
+        with open(self._index_path(player_id)) as f:
+            entries = [json.loads(line) for line in f if line.strip()]
+        return sorted((entry["fetched_at"], entry["digest"]) for entry in entries)
+
+    def latest(self, player_id: str, as_of: Optional[str] = None) -> Optional[str]:
+        """Return the html of the player's page most recently fetched, at or
+        before as_of if it is given, or None if there isn't one.
+        """
+        fetches = [
+            digest
+            for fetched_at, digest in self.fetches(player_id)
+            if as_of is None or fetched_at <= as_of
+        ]
+        if not fetches:
+            return None
+        return self.get(fetches[-1])
+
+    def player_ids(self) -> List[str]:
+        """Return the ids of all players with pages in the cache."""
+        return sorted(
+            filename[: -len(".jsonl")]
+            for filename in os.listdir(os.path.join(self.root, "index"))
+            if filename.endswith(".jsonl")
+        )
@@ -0,0 +1,137 @@
+"""Single pass extraction of the text of the parts of a player's profile page
+that the scraper uses, in place of building a BeautifulSoup tree for each page
+and selecting from it.
+"""
+from html.parser import HTMLParser
+import sys
+import time
+
+from typing import Dict, Iterable, List, Tuple
+
+# the div classes that are extracted from a profile page, which are the
+# selectors 'div.profile-top-stats', 'div.player-info-wrapper' and
+# 'div.row-table'
+PROFILE_CLASSES = ("profile-top-stats", "player-info-wrapper", "row-table")
+
+# tags whose content is not text on the page
+_SKIPPED_TAGS = ("script", "style", "template")
+
+
+class _RegionParser(HTMLParser):
+    """Streams through the html once, collecting the text of every div with
+    one of the classes, including the text of any elements inside it.
+    """
+
+    def __init__(self, classes: Tuple[str, ...]) -> None:
+        super().__init__(convert_charrefs=True)
+        self.classes = classes
+        self.regions: Dict[str, List[str]] = {}
+        self._texts: Dict[str, List[List[str]]] = {
+            css_class: [] for css_class in classes
+        }
+        # the text so far of each region that is open, with its class and the
+        # div depth it was opened at
+        self._open: List[Tuple[str, int, List[str]]] = []
+        self._div_depth = 0
+        self._skipping = 0
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, str]]) -> None:
+        if tag in _SKIPPED_TAGS:
+            self._skipping += 1
+            return
+        if tag != "div":
+            return
+
+        self._div_depth += 1
+        classes = next((value for name, value in attrs if name == "class"), None)
+        if not classes:
+            return
+        for css_class in classes.split():
+            if css_class in self.classes:
+                text: List[str] = []
+                self._texts[css_class].append(text)
+                self._open.append((css_class, self._div_depth, text))
+
+    def handle_startendtag(self, tag: str, attrs: List[Tuple[str, str]]) -> None:
+        # a self closing div is an empty region, as it is to BeautifulSoup
+        self.handle_starttag(tag, attrs)
+        self.handle_endtag(tag)
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in _SKIPPED_TAGS:
+            self._skipping = max(self._skipping - 1, 0)
+            return
+        if tag != "div" or self._div_depth == 0:
+            return
+
+        while self._open and self._open[-1][1] >= self._div_depth:
+            self._open.pop()
+        self._div_depth -= 1
+
+    def handle_data(self, data: str) -> None:
+        if self._skipping:
+            return
+        for _, _, text in self._open:
+            text.append(data)
+
+    def close(self) -> None:
+        super().close()
+        self._open = []
+        self.regions = {
+            css_class: ["".join(text) for text in texts]
+            for css_class, texts in self._texts.items()
+        }
+
+
+def extract_regions(
+    html: str, classes: Tuple[str, ...] = PROFILE_CLASSES
+) -> Dict[str, List[str]]:
+    """Return the text of every div with each of the classes, in the order
+    they appear on the page. The text for 'row-table' is the same list as
+    [stats.text for stats in soup.select("div.row-table")].
+    """
+    parser = _RegionParser(classes)
+    parser.feed(html)
+    parser.close()
+    return parser.regions
+
+
+def benchmark(pages: Iterable[str], repeat: int = 3) -> Dict[str, float]:
+    """Time parsing the pages with BeautifulSoup and html.parser, as the
+    scraper used to, against extract_regions, returning the best of repeat
+    runs in seconds for each.
+    """
+    from bs4 import BeautifulSoup
+
+    pages = list(pages)
+
+    def soup_select() -> None:
+        for html in pages:
+            soup = BeautifulSoup(html, "html.parser")
+            for css_class in PROFILE_CLASSES:
+                [region.text for region in soup.select("div." + css_class)]
+
+    def extract() -> None:
+        for html in pages:
+            extract_regions(html)
+
+    timings = {}
+    for name, run in (("beautifulsoup", soup_select), ("extract_regions", extract)):
+        runs = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            runs.append(time.perf_counter() - start)
+        timings[name] = min(runs)
+    return timings
+
+
+if __name__ == "__main__":
+    # benchmark over the latest page of every player in a page cache, eg.
+    # python page_extract.py ../data/pages
+    from page_cache import PageCache
+
+    cache = PageCache(sys.argv[1])
+    cached_pages = [cache.latest(player_id) for player_id in cache.player_ids()]
+    for name, seconds in benchmark(cached_pages).items():
+        print(f"{name}: {seconds:.3f}s for {len(cached_pages)} pages")
@@ -0,0 +1,74 @@
+"""Functions for waiting on pages of the MLS fantasy site to be ready, used in
+place of fixed sleeps when logging in and scraping.
+"""
+import time
+from selenium.webdriver import Chrome
+from selenium.webdriver.remote.webelement import WebElement
+
+from typing import Any, Callable, List, Optional
+
+# seconds to wait for a page before giving up, and the first interval between
+# checks, which grows by BACKOFF up to MAX_POLL
+TIMEOUT = 10
+POLL = 0.05
+BACKOFF = 1.5
+MAX_POLL = 1.0
+
+
+def wait_until(
+    condition: Callable[[], Any],
+    timeout: float = TIMEOUT,
+    poll: float = POLL,
+    backoff: float = BACKOFF,
+    max_poll: float = MAX_POLL,
+) -> Any:
+    """Call condition until it returns something truthy, and return that. The
+    condition is checked straight away, so a page that is already ready
+    costs nothing, and then with a wait between checks that starts at poll
+    seconds and is multiplied by backoff after each check, up to max_poll.
+
+    Returns the last falsy result if timeout seconds pass first.
+    """
+    deadline = time.monotonic() + timeout
+    interval = poll
+    while True:
+        result = condition()
+        remaining = deadline - time.monotonic()
+        if result or remaining <= 0:
+            return result
+        time.sleep(min(interval, remaining))
+        interval = min(interval * backoff, max_poll)
+
+
+def wait_for_selector(
+    web_driver: Chrome,
+    css_selector: str,
+    replacing: Optional[WebElement] = None,
+    timeout: float = TIMEOUT,
+    poll: float = POLL,
+    backoff: float = BACKOFF,
+    max_poll: float = MAX_POLL,
+) -> List[WebElement]:
+    """Wait for the page to have elements for css_selector, and return them,
+    or an empty list if timeout seconds pass first.
+
+    The site is a single page app, so the elements of the previous player or
+    team can still be on the page after navigating. Passing the first of the
+    old elements as replacing waits for it to be replaced by a new one.
+    """
+
+    def found() -> List[WebElement]:
+        elements = web_driver.find_elements_by_css_selector(css_selector)
+        if elements and replacing is not None and elements[0] == replacing:
+            return []
+        return elements
+
+    return wait_until(found, timeout, poll, backoff, max_poll)
+
+
+def first_element(web_driver: Chrome, css_selector: str) -> Optional[WebElement]:
+    """Return the first element on the page for css_selector, if there is one,
+    to pass to wait_for_selector as the element to be replaced.
+    """
+    elements = web_driver.find_elements_by_css_selector(css_selector)
+    return elements[0] if elements else None
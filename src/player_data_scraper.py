@@ -5,33 +5,40 @@ import pandas as pd
 import numpy as np
 
 import data_cleaning as dc
-
+import page_waits as pw
+import tokenizer as tk
+from page_cache import PageCache
+from page_extract import extract_regions
+from player_quirks import QuirkRegistry
+
+import collections
+import csv
+import heapq
+import json
+import os
+import queue
+import random
+import threading
 import time
 import requests
 from bs4 import BeautifulSoup
+from selenium.common.exceptions import TimeoutException
 from selenium.webdriver import Chrome
 
-from typing import List, Tuple, Any
+from typing import List, Tuple, Any, Callable, Deque, Dict, NamedTuple, Optional
+from typing import TYPE_CHECKING
 import copy
 
+if TYPE_CHECKING:
+    # data_sources imports this module, so it is imported where it is used
+    from data_sources import DataSource
+
 
 def clean_data(text: str) -> List[str]:
     """Will receive a string and convert to a list of strings with the 
     totals for each category for the specific game.
     """
-    word = ""
-    dont_want = ["\t", "\n", "\\"]
-    row = []
-    for char in text:
-        if char not in dont_want:
-            word += char
-            if word == "-":
-                row.append(word)
-                word = ""
-        elif word:
-            row.append(word)
-            word = ""
-    return row
+    return tk.tokenize(text)
 
 def update_negative_scores(game: List) -> List:
     """Check row of game summary data for a hyphen to indicate a negative score, 
@@ -88,6 +95,50 @@ def get_player_position(player_info: str) -> str:
 
 #### - the following functions go to the website and scrape data for players
 
+PLAYER_PROFILE_URL = "https://fantasy.mlssoccer.com/#stats-center/player-profile/"
+
+# the errors of a player's data not loading, after which the player can be
+# tried again, as opposed to errors in parsing the data, which are raised
+LOAD_ERRORS = (IndexError, TimeoutException, requests.RequestException, OSError)
+
+# the parts of a player's profile page that are scraped
+PROFILE_SELECTORS = ("div.profile-top-stats", "div.player-info-wrapper", "div.row-table")
+
+
+def load_player_page(
+    web_driver: Chrome,
+    player: List[str],
+    selectors: Tuple[str, ...] = PROFILE_SELECTORS,
+    page_link: str = PLAYER_PROFILE_URL,
+    timeout: float = pw.TIMEOUT,
+    page_cache: Optional[PageCache] = None,
+) -> str:
+    """Go to the player's profile page, wait until the page has rendered
+    elements for each of selectors, and return the page source. The first
+    selector must be replaced by the new player's, so the previous player's
+    page isn't mistaken for this one.
+
+    If the page doesn't render in time an IndexError is raised, as the page
+    source may still be the previous player's. Pages that do render are
+    stored in page_cache, if one is given.
+    """
+    previous = pw.first_element(web_driver, selectors[0])
+    web_driver.get(page_link + player[0])
+
+    if not pw.wait_for_selector(web_driver, selectors[0], previous, timeout):
+        raise IndexError(
+            f"page of player {player[0]} did not load within {timeout} seconds"
+        )
+    for selector in selectors[1:]:
+        if not pw.wait_for_selector(web_driver, selector, timeout=timeout):
+            raise IndexError(f"page of player {player[0]} has no {selector}")
+
+    html = web_driver.page_source
+    if page_cache is not None:
+        page_cache.put(player[0], html)
+    return html
+
+
 def get_all_player_stats(
     web_driver: Chrome,
     player_ids: List[List[str]],
@@ -105,18 +156,12 @@ def get_all_player_stats(
     """
     player_stats: List[List[str]] = []
 
-    page_link = "https://fantasy.mlssoccer.com/#stats-center/player-profile/"
-
     # taking the list of mls_players, and adding the ID to the end of the page_link string in order to navigate to
     # that page. Can use this to cycle through all the player pages to amass weekly stats
     for player in player_ids:
-        # print(page_link)
-        # print(player[0])
-        web_driver.get(page_link + player[0])
-        time.sleep(2)
+        html = load_player_page(web_driver, player, ("div.row-table",))
 
         # on the specific player page, create a page object for beautifulsoup to parse for the content
-        html = web_driver.page_source
         soup = BeautifulSoup(html, "html.parser")
 
         # using the beautiful soup object to get the specific player details. will use this over and over to scrape and
@@ -161,18 +206,12 @@ def get_all_player_meta_data(
 
     player_data: List[List[str]] = []
 
-    page_link = "https://fantasy.mlssoccer.com/#stats-center/player-profile/"
-
     # taking the list of mls_players, and adding the ID to the end of the page_link string in order to navigate to
     # that page. Can use this to cycle through all the player pages to amass weekly stats
     for player in player_ids:
-        # print(page_link)
-        # print(player[0])
-        web_driver.get(page_link + player[0])
-        time.sleep(2)
+        html = load_player_page(web_driver, player, ("div.player-info-wrapper",))
 
         # on the specific player page, create a page object for beautifulsoup to parse for the content
-        html = web_driver.page_source
         soup = BeautifulSoup(html, "html.parser")
 
         # using the beautiful soup object to get the specific player details. will use this over and over to scrape and
@@ -210,18 +249,12 @@ def get_all_player_top_stats(
     """
     player_stats: List[List[str]] = []
 
-    page_link = "https://fantasy.mlssoccer.com/#stats-center/player-profile/"
-
     # taking the list of mls_players, and adding the ID to the end of the page_link string in order to navigate to
     # that page. Can use this to cycle through all the player pages to amass weekly stats
     for player in player_ids:
-        # print(page_link)
-        # print(player[0])
-        web_driver.get(page_link + player[0])
-        time.sleep(2)
+        html = load_player_page(web_driver, player, ("div.profile-top-stats",))
 
         # on the specific player page, create a page object for beautifulsoup to parse for the content
-        html = web_driver.page_source
         soup = BeautifulSoup(html, "html.parser")
 
         # using the beautiful soup object to get the specific player details. will use this over and over to scrape and
@@ -239,11 +272,99 @@ def get_all_player_top_stats(
 
     return player_stats
 
+def parse_player_page(
+    html: str, player: List[str], week_first: int, week_last: int
+) -> Tuple[List[Any], List[Any], List[List[Any]]]:
+    """Parse the html of a player's profile page into the player's meta data
+    row, top stats row, and a row of weekly data for each game in the rounds
+    from week_first to week_last, inclusive.
+
+    An IndexError is raised if the page has not loaded the player's stats.
+    """
+    # on the specific player page, pull out the text of the top stats, the
+    # meta data, and the rows of the game log tables in one pass
+    regions = extract_regions(html)
+
+    # the player's top level data
+    table_text = regions["profile-top-stats"]
+
+    top_stats = [player[0]] + [player[1]] + [player[2]] + clean_data(table_text[0])
+
+    # the player's meta data
+    metadata_text = regions["player-info-wrapper"]
+    # now we go through and clean up the meta data, and include it in the new table with each player
+    meta_data = (
+        [player[0]]
+        + [player[1]]
+        + [player[2]]
+        + [get_player_position(clean_data(metadata_text[0]))]
+        + [get_player_salary(clean_data(metadata_text[0]))]
+    )
+
+    # TODO - add a block here to check a player's availability status
+    # it's an i class that has 'status playing' in an element
+    # can use the soup object, so:
+    # status = soup.find_all('i')
+    # for iclass in status:
+    #     if 'status playing' in str(iclass):
+    #         NEED SOME WAY TO KEEP TRACK/DETERMINE THIS LATER
+
+    # the player's game log, with a row of match info and a row of stats for
+    # each game
+    table_text = regions["row-table"]
+
+    # each row will have the player's id, player name, team, information regarding
+    # the specific match, and then respective category totals for that match
+    weeknums = int((len(table_text) - 5) / 2)
+    skips = int((len(table_text) // 2 + 1))
+
+    weekly_data = []
+    for week in range(1, weeknums + 1):
+        if int(clean_data(table_text[week])[0]) not in range(
+            week_first, week_last + 1
+        ):
+            pass
+        else:
+            weekly_data.append(
+                [player[0]]
+                + [player[1]]
+                + [player[2]]
+                + update_negative_scores(clean_data(table_text[week]))
+                + [stat for stat in clean_data(table_text[week + skips])[0::2]]
+            )
+
+    return meta_data, top_stats, weekly_data
+
+
+def _players_to_scrape(
+    player_ids: List[List[str]], quirks: Optional[QuirkRegistry]
+) -> Tuple[List[Tuple[int, List[str]]], Dict[int, Callable]]:
+    """Return the (position, player) of each player in player_ids to scrape,
+    leaving out the players with a quirk in quirks that are to be skipped,
+    and the parsers of the players with a quirk to parse them with, by
+    position.
+    """
+    to_scrape = []
+    parsers = {}
+    for position, player in enumerate(player_ids):
+        quirk = quirks.lookup(player) if quirks is not None else None
+        if quirk is None:
+            to_scrape.append((position, player))
+        elif not quirk.skip:
+            parsers[position] = quirk.parser
+            to_scrape.append((position, player))
+    return to_scrape, parsers
+
+
 def scrape_player_data(
     web_driver: Chrome,
     player_ids: List[List[str]],
     week_first: int,
     week_last: int,
+    timeout: float = pw.TIMEOUT,
+    page_cache: Optional[PageCache] = None,
+    source: Optional["DataSource"] = None,
+    quirks: Optional[QuirkRegistry] = None,
 ) -> Tuple[List[List[Any]], List[List[Any]], List[List[Any]], List[List[Any]]]:
     """Function to go to the web and pull all players stats, by week, from the MLS
     Fantasy League website. 
@@ -253,7 +374,19 @@ def scrape_player_data(
     For player weekly_data, use string 'div.row-table'.
     For player metadata, use string 'div.player-info-wrapper'.
     For player top stats, use string 'div.profile-top-stats'.
+
+    timeout is the most seconds to wait for each player's page to load, and
+    the raw pages are kept in page_cache, if one is given. Each player's data
+    comes from source, a data_sources.DataSource, if one is given, in place
+    of the page loaded in web_driver. Players with a quirk in quirks are
+    skipped, or parsed with the quirk's parser.
     """
+    if source is None:
+        from data_sources import BrowserDataSource
+
+        source = BrowserDataSource(web_driver, timeout=timeout, page_cache=page_cache)
+    to_scrape, parsers = _players_to_scrape(player_ids, quirks)
+
     meta_data = []  # from string 'div.player-info-wrapper'
     top_stats = []  # from 'div.profile-top-stats'
     weekly_data = []  # from string 'div.row-table'
@@ -263,83 +396,187 @@ def scrape_player_data(
 
     cycles = 0
 
-    page_link = "https://fantasy.mlssoccer.com/#stats-center/player-profile/"
-
     # taking the list of mls_players, and adding the ID to the end of the page_link string in order to navigate to
     # that page. Can use this to cycle through all the player pages to amass weekly stats
-    for player in player_ids:
+    for position, player in to_scrape:
+        # if the page didn't load quickly enough, the player is collected to
+        # be scraped again
         try:
-            web_driver.get(page_link + player[0])
-            time.sleep(2)
-        except IndexError:
-            player.append(timeout_list)
+            meta, top, weekly = source.player_data(
+                player, week_first, week_last, parser=parsers.get(position)
+            )
+        except LOAD_ERRORS:
+            timeout_list.append(player)
+        else:
+            meta_data.append(meta)
+            top_stats.append(top)
+            weekly_data += weekly
 
-        # on the specific player page, create a page object for beautifulsoup to parse for the content
-        html = web_driver.page_source
-        soup = BeautifulSoup(html, "html.parser")
+        cycles += 1
+        if cycles % 25 == 0:
+            print(f"Scraped {round(100 * cycles / len(to_scrape), 2)}% so far")
 
-        # using the beautiful soup object to get the specific player details. will use this over and over to scrape and
-        # store all the players top level data
-        table = soup.select("div.profile-top-stats")
-        table_text = [stats.text for stats in table]
+    return meta_data, top_stats, weekly_data, timeout_list
 
+
+def scrape_player_data_pooled(
+    driver_factory: Callable[[], Chrome],
+    player_ids: List[List[str]],
+    week_first: int,
+    week_last: int,
+    workers: int = 4,
+    timeout: float = pw.TIMEOUT,
+    min_interval: float = 0,
+    page_link: str = PLAYER_PROFILE_URL,
+    page_cache: Optional[PageCache] = None,
+    source: Optional["DataSource"] = None,
+    quirks: Optional[QuirkRegistry] = None,
+) -> Tuple[List[List[Any]], List[List[Any]], List[List[Any]], List[List[Any]]]:
+    """Scrape the same data as scrape_player_data, with a pool of workers
+    sharing one queue of players. Each worker gets its own driver from
+    driver_factory, which must return a driver that is logged in to the site,
+    eg. lambda: pi.mls_fantasy_login(login, pwd). If a source is given, eg. a
+    data_sources.JsonDataSource, the workers share it instead, and
+    driver_factory isn't used.
+
+    timeout is the most seconds to wait for each page to load, and
+    min_interval is the fewest seconds between page requests for a single
+    worker. Rows are returned in the order of player_ids, and the raw pages
+    are kept in page_cache, if one is given. Players with a quirk in quirks
+    are skipped, or parsed with the quirk's parser.
+
+    Players whose pages don't load are returned in the timeout list, as are
+    the players left when the workers stop. A worker that can't get a driver
+    stops and leaves the queue to the others, and the error is raised if no
+    worker gets one. Any other error, eg. in parsing a page, stops the
+    workers and is raised.
+    """
+    to_scrape, parsers = _players_to_scrape(player_ids, quirks)
+    work: "queue.Queue[Tuple[int, List[str]]]" = queue.Queue()
+    for position, player in to_scrape:
+        work.put((position, player))
+
+    scraped: Dict[int, Tuple[List[Any], List[Any], List[List[Any]]]] = {}
+    timed_out: Dict[int, List[str]] = {}
+    driver_errors: List[Exception] = []
+    errors: List[Exception] = []
+    stop = threading.Event()
+    lock = threading.Lock()
+
+    def worker() -> None:
+        from data_sources import BrowserDataSource
+
+        web_driver = None
+        worker_source = source
+        last_request = 0.0
         try:
-            top_stats.append(
-                [player[0]] + [player[1]] + [player[2]] + clean_data(table_text[0])
-            )
-        except IndexError:
-            player.append(timeout_list)
+            if worker_source is None:
+                try:
+                    web_driver = driver_factory()
+                except Exception as error:
+                    with lock:
+                        driver_errors.append(error)
+                    return
+                worker_source = BrowserDataSource(
+                    web_driver,
+                    timeout=timeout,
+                    page_cache=page_cache,
+                    page_link=page_link,
+                )
 
-        # using the beautiful soup object to get the specific player details. will use this over and over to scrape and
-        # store all the players meta data
-        player_metadata = soup.select("div.player-info-wrapper")
-        metadata_text = [meta.text for meta in player_metadata]
-        # now we go through and clean up the meta data, and include it in the new table with each player
-        meta_data.append(
-            [player[0]]
-            + [player[1]]
-            + [player[2]]
-            + [get_player_position(clean_data(metadata_text[0]))]
-            + [get_player_salary(clean_data(metadata_text[0]))]
-        )
+            while not stop.is_set():
+                try:
+                    position, player = work.get_nowait()
+                except queue.Empty:
+                    return
+
+                wait = last_request + min_interval - time.monotonic()
+                if wait > 0:
+                    time.sleep(wait)
+                last_request = time.monotonic()
+
+                # if the page didn't load, the player is collected to be
+                # scraped again
+                try:
+                    result = worker_source.player_data(
+                        player, week_first, week_last, parser=parsers.get(position)
+                    )
+                except LOAD_ERRORS:
+                    with lock:
+                        timed_out[position] = player
+                else:
+                    with lock:
+                        scraped[position] = result
+
+                with lock:
+                    cycles = len(scraped) + len(timed_out)
+                if cycles % 25 == 0:
+                    print(f"Scraped {round(100 * cycles / len(to_scrape), 2)}% so far")
+        except Exception as error:
+            with lock:
+                errors.append(error)
+            stop.set()
+        finally:
+            if web_driver is not None and hasattr(web_driver, "quit"):
+                web_driver.quit()
+
+    workers = max(workers, 1)
+    threads = [threading.Thread(target=worker) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    if errors:
+        raise errors[0]
+    if len(driver_errors) == workers:
+        raise driver_errors[0]
+
+    # players no worker got to
+    for position, player in to_scrape:
+        if position not in scraped and position not in timed_out:
+            timed_out[position] = player
+
+    meta_data = [scraped[position][0] for position in sorted(scraped)]
+    top_stats = [scraped[position][1] for position in sorted(scraped)]
+    weekly_data = [row for position in sorted(scraped) for row in scraped[position][2]]
+    timeout_list = [timed_out[position] for position in sorted(timed_out)]
 
-        # TODO - add a block here to check a player's availability status
-        # it's an i class that has 'status playing' in an element
-        # can use the soup object, so:
-        # status = soup.find_all('i')
-        # for iclass in status:
-        #     if 'status playing' in str(iclass):
-        #         NEED SOME WAY TO KEEP TRACK/DETERMINE THIS LATER       
+    return meta_data, top_stats, weekly_data, timeout_list
 
-        # using the beautiful soup object to get the specific player details.
-        # will use this over and over to scrape and store all the players data
-        table = soup.select("div.row-table")
-        table_text = [stats.text for stats in table]
+def reparse_cached_pages(
+    page_cache: PageCache,
+    player_ids: List[List[str]],
+    week_first: int,
+    week_last: int,
+    as_of: Optional[str] = None,
+) -> Tuple[List[List[Any]], List[List[Any]], List[List[Any]], List[List[Any]]]:
+    """Parse the latest cached page of each player, fetched at or before the
+    as_of timestamp if it is given, without going to the site. Returns the
+    same (meta, top, weekly, missing_list) as scrape_player_data, where
+    missing_list has the players with no page in the cache, or a page that
+    can't be parsed.
+    """
+    meta_data = []
+    top_stats = []
+    weekly_data = []
+    missing_list: List[List[Any]] = []
 
-        # each row will have the player's id, player name, team, information regarding
-        # the specific match, and then respective category totals for that match
-        weeknums = int((len(table_text) - 5) / 2)
-        skips = int((len(table_text) // 2 + 1))
-
-        for week in range(1, weeknums + 1):
-            if int(clean_data(table_text[week])[0]) not in range(
-                week_first, week_last + 1
-            ):
-                pass
-            else:
-                weekly_data.append(
-                    [player[0]]
-                    + [player[1]]
-                    + [player[2]]
-                    + update_negative_scores(clean_data(table_text[week]))
-                    + [stat for stat in clean_data(table_text[week + skips])[0::2]]
-                )
+    for player in player_ids:
+        html = page_cache.latest(player[0], as_of)
+        try:
+            if html is None:
+                raise IndexError(f"no cached page for player {player[0]}")
+            meta, top, weekly = parse_player_page(html, player, week_first, week_last)
+        except IndexError:
+            missing_list.append(player)
+        else:
+            meta_data.append(meta)
+            top_stats.append(top)
+            weekly_data += weekly
 
-        cycles += 1
-        if cycles % 25 == 0:
-            print(f"Scraped {round(100 * cycles / len(player_ids), 2)}% so far")
+    return meta_data, top_stats, weekly_data, missing_list
 
-    return meta_data, top_stats, weekly_data, timeout_list
 
 # these are the column names that should be added to the top, meta, and weekly
 # stats after they've been scraped
@@ -347,31 +584,357 @@ TOP_STATS_COLUMNS = 'id,name,team,games_played,avg_fantasy_pts,total_fantasy_pts
 SEASON_STATS_COLUMNS = 'ID,NAME,TEAM,RD,HOME_AWAY,OPPONENT,PTS,MIN,GF,A,CS,PS,PE,PM,GA,SV,Y,R,OG,T,P,KP,CRS,BC,CL,BLK,INT,BR,ELG,OGA,SH,WF'
 META_STATS_COLUMNS = 'ID,name,team,position,salary'
 
+# the most times a player's page is tried before the player is given up on,
+# and the seconds to wait before a retry, which doubles with each attempt up
+# to RETRY_MAX_DELAY
+MAX_ATTEMPTS = 4
+RETRY_BASE_DELAY = 2.0
+RETRY_MAX_DELAY = 60.0
+
+
+class DeadLetter(NamedTuple):
+    """A player that couldn't be scraped, with the number of attempts made and
+    the reason the last one failed.
+    """
+
+    player: List[str]
+    attempts: int
+    reason: str
+
+
+def retry_delay(
+    attempt: int,
+    base_delay: float = RETRY_BASE_DELAY,
+    max_delay: float = RETRY_MAX_DELAY,
+    rng: Optional[random.Random] = None,
+) -> float:
+    """Seconds to wait before trying again after the attempt-th failure, as a
+    random amount up to base_delay * 2 ** (attempt - 1), capped at max_delay,
+    so that retries of players that failed together are spread out.
+    """
+    ceiling = min(max_delay, base_delay * 2 ** (attempt - 1))
+    return (rng or random).uniform(0, ceiling)
+
+
+def scrape_with_retries(
+    web_driver: Chrome,
+    player_ids: List[List[str]],
+    week_first: int,
+    week_last: int,
+    max_attempts: int = MAX_ATTEMPTS,
+    base_delay: float = RETRY_BASE_DELAY,
+    max_delay: float = RETRY_MAX_DELAY,
+    time_budget: Optional[float] = None,
+    timeout: float = pw.TIMEOUT,
+    page_cache: Optional[PageCache] = None,
+    rng: Optional[random.Random] = None,
+    source: Optional["DataSource"] = None,
+    quirks: Optional[QuirkRegistry] = None,
+) -> Tuple[List[List[Any]], List[List[Any]], List[List[Any]], List[DeadLetter]]:
+    """Scrape the same data as scrape_player_data, trying each player up to
+    max_attempts times. A player whose page fails is scheduled to be tried
+    again after retry_delay(), and players are scraped from the list in the
+    meantime, so retries are mixed in with the rest of the work rather than
+    waiting for a pass at the end.
+
+    Only errors in loading a player's data (LOAD_ERRORS) are retried, and
+    any other error, eg. in parsing the data, is raised. Players that fail
+    every attempt, or that are still waiting when time_budget seconds have
+    passed, are returned as dead letters, so the scrape always ends, and
+    with a time_budget it ends within the budget plus the timeout of the
+    page being loaded at the time. Rows are returned in the order of
+    player_ids.
+
+    Each player's data comes from source, a data_sources.DataSource, or by
+    default from loading the player's page in web_driver. Players with a
+    quirk in quirks are skipped, or parsed with the quirk's parser.
+    """
+    if source is None:
+        from data_sources import BrowserDataSource
+
+        source = BrowserDataSource(web_driver, timeout=timeout, page_cache=page_cache)
+
+    start = time.monotonic()
+    to_scrape, parsers = _players_to_scrape(player_ids, quirks)
+    fresh: Deque[Tuple[int, List[str]]] = collections.deque(to_scrape)
+    # (time the retry is due, order scheduled, position, player, attempts)
+    retries: List[Tuple[float, int, int, List[str], int]] = []
+    scheduled = 0
+
+    scraped: Dict[int, Tuple[List[Any], List[Any], List[List[Any]]]] = {}
+    # the reason for the last failure of each player that has failed
+    reasons: Dict[int, str] = {}
+    dead: Dict[int, DeadLetter] = {}
+
+    while fresh or retries:
+        now = time.monotonic()
+        if time_budget is not None and now - start >= time_budget:
+            break
+
+        if retries and (retries[0][0] <= now or not fresh):
+            due, _, position, player, attempts = heapq.heappop(retries)
+            if due > now:
+                # nothing else to do until the retry is due
+                wait = due - now
+                if time_budget is not None:
+                    wait = min(wait, start + time_budget - now)
+                time.sleep(wait)
+                if time.monotonic() < due:
+                    heapq.heappush(
+                        retries, (due, scheduled, position, player, attempts)
+                    )
+                    scheduled += 1
+                    continue
+        else:
+            position, player = fresh.popleft()
+            attempts = 0
+
+        attempts += 1
+        try:
+            scraped[position] = source.player_data(
+                player, week_first, week_last, parser=parsers.get(position)
+            )
+        except LOAD_ERRORS as error:
+            reason = f"{type(error).__name__}: {error}"
+        else:
+            continue
+
+        reasons[position] = reason
+        if attempts >= max_attempts:
+            dead[position] = DeadLetter(player, attempts, reason)
+        else:
+            due = time.monotonic() + retry_delay(attempts, base_delay, max_delay, rng)
+            heapq.heappush(retries, (due, scheduled, position, player, attempts))
+            scheduled += 1
+
+    # anything still waiting ran out of time
+    for position, player in fresh:
+        dead[position] = DeadLetter(player, 0, "out of time before first attempt")
+    for _, _, position, player, attempts in retries:
+        dead[position] = DeadLetter(
+            player, attempts, f"out of time, last failure: {reasons[position]}"
+        )
+
+    meta_data = [scraped[position][0] for position in sorted(scraped)]
+    top_stats = [scraped[position][1] for position in sorted(scraped)]
+    weekly_data = [row for position in sorted(scraped) for row in scraped[position][2]]
+    dead_letters = [dead[position] for position in sorted(dead)]
+
+    return meta_data, top_stats, weekly_data, dead_letters
+
+
 def cycle_all_player_ids(
     web_driver: Chrome,
     player_ids: List[List[str]],
     week_first: int,
     week_last: int,
+    max_attempts: int = MAX_ATTEMPTS,
+    time_budget: Optional[float] = None,
+    dead_letters: Optional[List[DeadLetter]] = None,
+    timeout: float = pw.TIMEOUT,
+    source: Optional["DataSource"] = None,
+    quirks: Optional[QuirkRegistry] = None,
 ) -> Tuple[List[List[Any]], List[List[Any]], List[List[Any]]]:
-    """Create a loop to make sure all eligible stats are collected for the 
-    week game range"""
-    meta, top, weekly, time_out = scrape_player_data(
-        web_driver, player_ids, week_first, week_last
+    """Collect all eligible stats for the week game range, retrying players
+    whose pages fail up to max_attempts times (see scrape_with_retries), from
+    the source if one is given, eg. a data_sources.JsonDataSource, or else
+    from the pages loaded in web_driver.
+
+    Players that still couldn't be scraped are printed, and added to
+    dead_letters, if a list is given, with the reason they failed, as are
+    the players skipped or patched for a quirk in quirks.
+    """
+    meta, top, weekly, dead = scrape_with_retries(
+        web_driver,
+        player_ids,
+        week_first,
+        week_last,
+        max_attempts=max_attempts,
+        time_budget=time_budget,
+        timeout=timeout,
+        source=source,
+        quirks=quirks,
     )
 
-    loop = 0
-    while len(time_out) > 0:
-        loop += 1
-        print(f"loop number {loop}")
-        meta_rerun, top_rerun, weekly_rerun, time_out = scrape_player_data(
-            web_driver, time_out, week_first, week_last
+    if quirks is not None:
+        for line in quirks.report():
+            print(line)
+    for letter in dead:
+        print(
+            f"gave up on {letter.player[1]} ({letter.player[0]}) after "
+            f"{letter.attempts} attempts: {letter.reason}"
         )
-        meta += meta_rerun
-        top += top_rerun    
-        weekly += weekly_rerun
+    if dead_letters is not None:
+        dead_letters.extend(dead)
 
     top = [dc.remove_negative_scores(player) for player in top]
     top = [player[:2] + player[2::2] for player in top]
 
     return meta, top, weekly
 
+
+# incremental scraping keeps a record of what has been scraped for each player,
+# keyed by player id, with:
+#   'last_round' - the latest round in the player's game log already scraped
+#   'scraped_through' - the week_last of the last scrape the player was in
+#   'games_played' - the player's games played as of the last round scraped
+ScrapeState = Dict[str, Dict[str, Any]]
+
+
+def load_scrape_state(filepath: str) -> ScrapeState:
+    """Load the record of what has been scraped per player, or an empty
+    record if there isn't one yet.
+    """
+    if not os.path.exists(filepath):
+        return {}
+    with open(filepath) as f:
+        return json.load(f)
+
+
+def save_scrape_state(state: ScrapeState, filepath: str) -> None:
+    """Save the record of what has been scraped per player, replacing the
+    file only once it has been written in full.
+    """
+    with open(filepath + ".tmp", "w") as f:
+        json.dump(state, f)
+    os.replace(filepath + ".tmp", filepath)
+
+
+def append_season_stats(weekly: List[List[Any]], filepath: str) -> None:
+    """Append rows of weekly data to the season stats csv, adding the
+    SEASON_STATS_COLUMNS header if the file is new.
+    """
+    new_file = not os.path.exists(filepath)
+    with open(filepath, "a", newline="") as f:
+        writer = csv.writer(f)
+        if new_file:
+            writer.writerow(SEASON_STATS_COLUMNS.split(","))
+        writer.writerows(weekly)
+
+
+def scrape_player_data_incremental(
+    web_driver: Chrome,
+    player_ids: List[List[str]],
+    week_last: int,
+    state: ScrapeState,
+    timeout: float = pw.TIMEOUT,
+    page_cache: Optional[PageCache] = None,
+    quirks: Optional[QuirkRegistry] = None,
+    max_attempts: int = MAX_ATTEMPTS,
+    source: Optional["DataSource"] = None,
+) -> Tuple[List[List[Any]], List[List[Any]], List[List[Any]], List[DeadLetter]]:
+    """Scrape only what is new since the scrapes recorded in state, returning
+    the same (meta, top, weekly, dead_letters) as scrape_with_retries, which
+    each player is scraped with.
+
+    Players already scraped through week_last, and players with a quirk in
+    quirks that are to be skipped, are not visited. For the rest, only games
+    after the last round in state are returned, and none are if the player's
+    games played are unchanged, meaning they haven't played since, in which
+    case the rounds are looked at again in the next scrape. state is updated
+    in place for each player scraped.
+    """
+    to_scrape = [
+        player
+        for player in player_ids
+        if state.get(player[0], {}).get("scraped_through", 0) < week_last
+    ]
+    print(f"{len(to_scrape)} of {len(player_ids)} players to scrape")
+    if not to_scrape:
+        return [], [], [], []
+
+    previous = {
+        player[0]: {
+            "last_round": state.get(player[0], {}).get("last_round", 0),
+            "games_played": state.get(player[0], {}).get("games_played"),
+        }
+        for player in to_scrape
+    }
+    week_first = min(record["last_round"] for record in previous.values()) + 1
+
+    meta_data, top_stats, weekly, dead_letters = scrape_with_retries(
+        web_driver,
+        to_scrape,
+        week_first,
+        week_last,
+        max_attempts=max_attempts,
+        timeout=timeout,
+        page_cache=page_cache,
+        source=source,
+        quirks=quirks,
+    )
+
+    new_rounds: Dict[str, List[List[Any]]] = {}
+    for row in weekly:
+        if int(row[3]) > previous[row[0]]["last_round"]:
+            new_rounds.setdefault(row[0], []).append(row)
+
+    weekly_data = []
+    for top in top_stats:
+        player_id, games_played = top[0], top[4]
+        record = previous[player_id]
+        rows = []
+        if games_played != record["games_played"]:
+            rows = new_rounds.get(player_id, [])
+            weekly_data += rows
+        state[player_id] = {
+            "last_round": max([record["last_round"]] + [int(row[3]) for row in rows]),
+            "scraped_through": week_last,
+            "games_played": games_played if rows else record["games_played"],
+        }
+
+    return meta_data, top_stats, weekly_data, dead_letters
+
+
+def cycle_player_ids_incremental(
+    web_driver: Chrome,
+    player_ids: List[List[str]],
+    week_last: int,
+    state_filepath: str,
+    season_filepath: str,
+    page_cache: Optional[PageCache] = None,
+    quirks: Optional[QuirkRegistry] = None,
+    max_attempts: int = MAX_ATTEMPTS,
+    dead_letters: Optional[List[DeadLetter]] = None,
+    source: Optional["DataSource"] = None,
+) -> Tuple[List[List[Any]], List[List[Any]], List[List[Any]]]:
+    """Bring the season stats csv up to date through week_last, scraping
+    only players and games that are new since the last run, as recorded in
+    the state file. The new weekly rows are appended to the csv, and the
+    meta and top stats of the players scraped are returned along with them,
+    as with cycle_all_player_ids, which this retries players and reports
+    dead letters and quirks the same as. Dead letters are left out of the
+    state, so they are scraped again in the next run.
+    """
+    state = load_scrape_state(state_filepath)
+
+    meta, top, weekly, dead = scrape_player_data_incremental(
+        web_driver,
+        player_ids,
+        week_last,
+        state,
+        max_attempts=max_attempts,
+        page_cache=page_cache,
+        source=source,
+        quirks=quirks,
+    )
+
+    if quirks is not None:
+        for line in quirks.report():
+            print(line)
+    for letter in dead:
+        print(
+            f"gave up on {letter.player[1]} ({letter.player[0]}) after "
+            f"{letter.attempts} attempts: {letter.reason}"
+        )
+    if dead_letters is not None:
+        dead_letters.extend(dead)
+
+    # the rows are saved before the state, so a failed run is scraped again
+    append_season_stats(weekly, season_filepath)
+    save_scrape_state(state, state_filepath)
+
+    top = [dc.remove_negative_scores(list(player)) for player in top]
+    top = [player[:2] + player[2::2] for player in top]
+
+    return meta, top, weekly
@@ -1,13 +1,19 @@
+import json
+import os
+import time
+
 import numpy as np
 import pandas as pd
-import time
 import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 from selenium.webdriver import Chrome
+from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.support.select import Select
 from selenium.webdriver.common.action_chains import ActionChains
 
-from typing import List, Tuple, Dict
+import page_waits as pw
+
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
 
 # urls, passwords, team names
 mls_fantasy_url = "https://fantasy.mlssoccer.com/#"
@@ -41,6 +47,9 @@ TEAMS = {1: 'Atlanta United FC',
  25: 'Sporting Kansas City', 
  26: 'Vancouver Whitecaps FC'}
 
+# the links to each player's profile in the stats center table
+PLAYER_LINKS = 'a.player-name.js-player-modal'
+
 
 def mls_fantasy_login(login_id: str,
         password: str, 
@@ -55,17 +64,17 @@ def mls_fantasy_login(login_id: str,
     driver.get(mls_fantasy_url)
     driver.find_element_by_link_text('LOG IN').click()
     # send in login id and password and go into the browser
-    time.sleep(3)
+    pw.wait_for_selector(driver, "input[name='username']")
     username = driver.find_element_by_name('username')
     username.clear()
     username.send_keys(login_id)
-    time.sleep(3)
+    pw.wait_for_selector(driver, "input[name='password']")
     passcode = driver.find_element_by_name('password')
     passcode.clear()
     passcode.send_keys(password)
     
     driver.find_element_by_class_name('gigya-input-submit').click()
-    time.sleep(3)
+    pw.wait_until(lambda: driver.find_elements_by_link_text('STATS CENTER'))
     driver.find_element_by_link_text('STATS CENTER').click()
     
     return driver
@@ -80,42 +89,86 @@ def logout(web_driver: Chrome) -> None:
     
     first_menu = web_driver.find_element_by_class_name('my-account')
     action.move_to_element(first_menu).perform()
-    time.sleep(2)
-    
+    pw.wait_for_selector(web_driver, '.fa.fa-power-off')
+
     second_menu = web_driver.find_element_by_css_selector('.fa.fa-power-off')
     action.move_to_element(second_menu)
-    time.sleep(2)
+    pw.wait_until(second_menu.is_displayed)
     
     second_menu.click()
 
-def get_player_ids_dictform(web_driver: Chrome) -> Dict[str, List[str]]:
+def parse_roster_page(html: str, team: str) -> List[List[str]]:
+    '''Return the [id, name, team] of each player listed in the stats center
+    table of the page, for the team the table is filtered to. Only the player
+    links are parsed, not the whole page.
     '''
-    Create a dictionary with the player's MLS Fantasy soccer id as a key in
-    a dictionary, and then a list of strings of the player's name and team as 
-    the value.
+    links = SoupStrainer('a', attrs={'data-player_id': True})
+    soup = BeautifulSoup(html, 'html.parser', parse_only=links)
+
+    return [[tag['data-player_id'],
+             ' '.join(tag.text.strip('\n').split()[:-6]),
+             team]
+            for tag in soup.select(PLAYER_LINKS)]
+
+def crawl_rosters(web_driver: Chrome,
+        teams: Dict[int, str] = TEAMS,
+        open_stats_center: bool = False,
+        timeout: float = pw.TIMEOUT) -> List[List[str]]:
+    '''Collect the [id, name, team] of every player in MLS in one pass
+    through the squads of the stats center, in the order of teams.
 
     The web_driver must be one that is logged into the MLS site, else the stat
-     center can't be accessed.
+    center can't be accessed.
+
+    A TimeoutException is raised if the table isn't redrawn for a team within
+    timeout seconds, rather than labelling the players still listed for the
+    previous team with the new one.
     '''
-    player_ids = {}
+    if open_stats_center:
+        web_driver.find_element_by_link_text('STATS CENTER').click()
+    pw.wait_for_selector(web_driver, '#js-filter-squads')
+    select_team = Select(web_driver.find_element_by_id('js-filter-squads'))
 
-    web_driver.find_element_by_link_text('STATS CENTER').click()
-    time.sleep(2)
+    # the players listed before each team is selected, which the table has to
+    # move on from, unless the team is the one already selected
+    listed = {row[0] for row in parse_roster_page(web_driver.page_source, '')}
+    selected = select_team.first_selected_option.text.strip()
 
-    select_team = Select(web_driver.find_element_by_id('js-filter-squads'))
-    select_team.select_by_visible_text(TEAMS[1])
-    
-    for team in range(1, 27):
-        select_team.select_by_visible_text(TEAMS[team])
+    roster = []
+    for team in sorted(teams):
+        previous = None if teams[team] == selected else listed
+        select_team.select_by_visible_text(teams[team])
+
+        def redrawn() -> List[List[str]]:
+            players = parse_roster_page(web_driver.page_source, teams[team])
+            if {row[0] for row in players} == previous:
+                return []
+            return players
+
+        players = pw.wait_until(redrawn, timeout)
+        if not players:
+            raise TimeoutException(
+                f'stats center table was not redrawn for {teams[team]}')
 
-        html = web_driver.page_source
-        soup = BeautifulSoup(html, 'html.parser')
+        roster.extend(players)
+        listed, selected = {row[0] for row in players}, teams[team]
 
-        for tag in soup.select('a.player-name.js-player-modal'):
-            player_ids[tag['data-player_id']] = \
-                [' '.join(tag.text.strip('\n').split()[:-6]), TEAMS[team]]
+    return roster
 
-    return player_ids
+def roster_dict(roster: List[List[str]]) -> Dict[str, List[str]]:
+    '''Key the [name, team] of each player of a roster by the player's id.'''
+    return {player[0]: player[1:] for player in roster}
+
+def get_player_ids_dictform(web_driver: Chrome) -> Dict[str, List[str]]:
+    '''
+    Create a dictionary with the player's MLS Fantasy soccer id as a key in
+    a dictionary, and then a list of strings of the player's name and team as 
+    the value.
+
+    The web_driver must be one that is logged into the MLS site, else the stat
+     center can't be accessed.
+    '''
+    return roster_dict(crawl_rosters(web_driver, open_stats_center=True))
 
 def get_player_ids_listform(web_driver: Chrome) -> List[List[str]]:
     '''Function to build a List of the players in MLS, with their MLS Soccer
@@ -125,24 +178,82 @@ def get_player_ids_listform(web_driver: Chrome) -> List[List[str]]:
     The web_driver must be one that is logged into the MLS site, else the stat
     center can't be accessed.
     '''
-    #player_ids = {}
-    
-    player_ids = []
-    
-    select_team = Select(web_driver.find_element_by_id('js-filter-squads'))
-    #select_team.select_by_visible_text(teams[1])
-    
-    for team in range(1, 27):
-        select_team.select_by_visible_text(TEAMS[team])
+    return crawl_rosters(web_driver)
+
+class RosterChange(NamedTuple):
+    '''The players added to and removed from a roster, as [id, name, team], and
+    the players that moved teams, as [id, name, old team, new team].
+    '''
+    added: List[List[str]]
+    removed: List[List[str]]
+    transferred: List[List[str]]
+
+    @property
+    def players(self) -> List[List[str]]:
+        '''The [id, name, team] of the players added or transferred, whose data
+        needs scraping again.
+        '''
+        return self.added + [player[:2] + player[3:] for player in self.transferred]
+
+def diff_rosters(old: List[List[str]], new: List[List[str]]) -> RosterChange:
+    '''Compare two rosters by player id, in the order of the new roster, then
+    of the old one for the players removed.
+    '''
+    old_players, new_players = roster_dict(old), roster_dict(new)
+
+    added = [[player_id] + info for player_id, info in new_players.items()
+             if player_id not in old_players]
+    removed = [[player_id] + info for player_id, info in old_players.items()
+               if player_id not in new_players]
+    transferred = [[player_id, info[0], old_players[player_id][1], info[1]]
+                   for player_id, info in new_players.items()
+                   if player_id in old_players
+                   and old_players[player_id][1] != info[1]]
+
+    return RosterChange(added, removed, transferred)
+
+# seconds a crawled roster is used for before the squads are crawled again
+ROSTER_TTL = 24 * 60 * 60
+
+class RosterCache:
+    '''RosterCache keeps the last roster crawled in a json file, with the time
+    it was crawled, so the squads are only crawled again once it is older than
+    ttl seconds, and reports what changed from one crawl to the next.
+    '''
+
+    def __init__(self, filepath: str, ttl: float = ROSTER_TTL) -> None:
+        self.filepath = filepath
+        self.ttl = ttl
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        '''Return the cached {'crawled_at': time, 'roster': players}, or None
+        if nothing has been cached yet.
+        '''
+        if not os.path.exists(self.filepath):
+            return None
+        with open(self.filepath) as f:
+            return json.load(f)
 
-        html = web_driver.page_source
-        soup = BeautifulSoup(html, 'html.parser')
+    def save(self, roster: List[List[str]], crawled_at: float) -> None:
+        temp_path = self.filepath + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump({'crawled_at': crawled_at, 'roster': roster}, f)
+        os.replace(temp_path, self.filepath)
 
-        for tag in soup.select('a.player-name.js-player-modal'):
-            player_ids.append([tag['data-player_id'],
-                              ' '.join(tag.text.strip('\n').split()[:-6]),
-                              TEAMS[team]])
-#             player_ids[tag['data-player_id']] = \
-#                 [' '.join(tag.text.strip('\n').split()[:-6]), teams[team]]
+    def refresh(self, web_driver: Chrome,
+            force: bool = False,
+            crawl: Callable[[Chrome], List[List[str]]] = crawl_rosters
+            ) -> Tuple[List[List[str]], RosterChange]:
+        '''Return the roster, and the change from the roster cached before.
+        The cached roster is returned, with no change, if it is younger than
+        the ttl and not forced to crawl again.
+        '''
+        cached = self.load()
+        now = time.time()
+        if cached is not None and not force and now - cached['crawled_at'] < self.ttl:
+            return cached['roster'], RosterChange([], [], [])
 
-    return player_ids
\ No newline at end of file
+        roster = crawl(web_driver)
+        change = diff_rosters(cached['roster'] if cached else [], roster)
+        self.save(roster, now)
+        return roster, change
@@ -0,0 +1,161 @@
+"""Registry of players whose profile pages are known not to parse properly,
+keyed by player id, so the scrapers skip them, or parse them with a parser
+written for their page, instead of each scrape failing on them.
+
+A registry can be kept as a json file of the form:
+
+    {
+        "12345": {"reason": "game log rows are misaligned"},
+        "67890": {"reason": "salary is missing", "parser": "no_salary"}
+    }
+
+where "parser" names one of the parsers passed to QuirkRegistry.load().
+"""
+import json
+import os
+
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional
+
+# a parser takes what the data source fetched for the player (the html of the
+# player's page, or the JSON payload), the player's [id, name, team], and the
+# first and last weeks, and returns the (meta, top, weekly) rows
+Parser = Callable[..., Any]
+
+# the players whose pages didn't parse as of October 2020, by name, as their
+# ids depend on the season's player list
+BROKEN_PAGES_2020 = ("Ibarra", "Beason", "Y. Gonzalez")
+
+
+class Quirk(NamedTuple):
+    """Why a player's page is a problem, and the parser to use for it, or None
+    if the player is to be skipped.
+    """
+
+    reason: str
+    parser: Optional[Parser] = None
+    parser_name: Optional[str] = None
+
+    @property
+    def skip(self) -> bool:
+        return self.parser is None
+
+
+class QuirkRegistry:
+    """QuirkRegistry holds the quirks of players by id, and records each
+    player it is consulted for that has one, for report().
+    """
+
+    def __init__(self) -> None:
+        self.quirks: Dict[str, Quirk] = {}
+        # the [id, name, team] and quirk of the players the quirks were used
+        # for, by id
+        self.applied: Dict[str, Any] = {}
+
+    def exclude(self, player_id: str, reason: str) -> None:
+        """Skip the player in every scrape."""
+        self.quirks[str(player_id)] = Quirk(reason)
+
+    def override(
+        self,
+        player_id: str,
+        reason: str,
+        parser: Parser,
+        parser_name: Optional[str] = None,
+    ) -> None:
+        """Parse the player's data with parser, in place of the data source's."""
+        self.quirks[str(player_id)] = Quirk(reason, parser, parser_name)
+
+    def exclude_names(
+        self, player_ids: List[List[str]], names: Iterable[str], reason: str
+    ) -> Dict[str, List[str]]:
+        """Skip the players in player_ids whose names contain each of names,
+        and return the ids found for each name.
+        """
+        found = find_player_ids(player_ids, names)
+        for ids in found.values():
+            for player_id in ids:
+                self.exclude(player_id, reason)
+        return found
+
+    def __contains__(self, player_id: str) -> bool:
+        return player_id in self.quirks
+
+    def __len__(self) -> int:
+        return len(self.quirks)
+
+    def lookup(self, player: List[str]) -> Optional[Quirk]:
+        """Return the quirk of the player, or None if the player doesn't have
+        one, recording the players that do.
+        """
+        quirk = self.quirks.get(player[0])
+        if quirk is not None:
+            self.applied[player[0]] = (player, quirk)
+        return quirk
+
+    def report(self) -> List[str]:
+        """Return a line for each player skipped or patched since the registry
+        was created, or since clear_report().
+        """
+        return [
+            f"{'skipped' if quirk.skip else 'patched'} {player[1]} ({player[0]}): "
+            f"{quirk.reason}"
+            for player, quirk in self.applied.values()
+        ]
+
+    def clear_report(self) -> None:
+        self.applied = {}
+
+    def save(self, filepath: str) -> None:
+        """Save the registry as json. Parsers are saved by name, so a parser
+        added without a name can't be saved.
+        """
+        saved = {}
+        for player_id, quirk in self.quirks.items():
+            assert (
+                quirk.skip or quirk.parser_name
+            ), f"parser for player {player_id} needs a name to be saved"
+            saved[player_id] = {"reason": quirk.reason}
+            if not quirk.skip:
+                saved[player_id]["parser"] = quirk.parser_name
+
+        temp_path = filepath + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump(saved, f, indent=2)
+        os.replace(temp_path, filepath)
+
+    @classmethod
+    def load(
+        cls, filepath: str, parsers: Optional[Dict[str, Parser]] = None
+    ) -> "QuirkRegistry":
+        """Load a registry saved as json, with the parsers it names looked up
+        in parsers. An empty registry is returned if there is no file.
+        """
+        registry = cls()
+        if not os.path.exists(filepath):
+            return registry
+
+        with open(filepath) as f:
+            saved = json.load(f)
+        parsers = parsers or {}
+        for player_id, entry in saved.items():
+            name = entry.get("parser")
+            if name is None:
+                registry.exclude(player_id, entry["reason"])
+            else:
+                assert name in parsers, f"parser '{name}' not in list of: {list(parsers)}"
+                registry.override(player_id, entry["reason"], parsers[name], name)
+        return registry
+
+
+def find_player_ids(
+    player_ids: List[List[str]], names: Iterable[str]
+) -> Dict[str, List[str]]:
+    """Return the ids of the players whose names contain each of names, eg.
+    to look up the ids of players known by name to have broken pages:
+
+        find_player_ids(player_list, ["Ibarra", "Beason", "Y. Gonzalez"])
+    """
+    return {
+        name: [player[0] for player in player_ids if name in player[1]]
+        for name in names
+    }
@@ -1,6 +1,6 @@
 """Functions for converting player game statistics into fantasy points.
 """
-from typing import NamedTuple, Any
+from typing import NamedTuple, Any, Iterable, Union
 import numpy as np
 
 # keeping for now, but this global variable likely isn't necessary
@@ -324,3 +324,100 @@ class Forward(Midfielder):
 
     def clean_sheet(self):
         return 0
+
+
+# the batch scoring engine below encodes the rules of the classes above as
+# tables, with one row per position and one column per stat in the order of
+# the PlayerData fields (which is also the order of SEASON_STATS_COLUMNS[7:])
+POSITIONS = ("goalie", "defense", "midfield", "forward")
+
+POSITION_CODES = {position: code for code, position in enumerate(POSITIONS)}
+
+# points earned per unit of a stat that is scored linearly
+# fmt: off
+LINEAR_POINTS = np.array(
+    [
+        # MIN, GF, A, CS, PS, PE, PM, GA, SV, Y, R, OG, T, P, KP, CRS, BC, CL,
+        # BLK, INT, BR, ELG, OGA, SH, WF
+        [0, 6, 3, 0, 5, 2, -2, 0, 0, -1, -3, -2, 0, 0, 0, 0, 1, 0, 0, 0, 0, -1, 1, 0, 0],
+        [0, 6, 3, 0, 5, 2, -2, 0, 0, -1, -3, -2, 0, 0, 0, 0, 1, 0, 0, 0, 0, -1, 1, 0, 0],
+        [0, 5, 3, 0, 5, 2, -2, 0, 0, -1, -3, -2, 0, 0, 0, 0, 1, 0, 0, 0, 0, -1, 1, 0, 0],
+        [0, 5, 3, 0, 5, 2, -2, 0, 0, -1, -3, -2, 0, 0, 0, 0, 1, 0, 0, 0, 0, -1, 1, 0, 0],
+    ]
+)
+# fmt: on
+
+# one point is earned for every n of a stat, for every position; zero marks
+# the stats that are not scored this way
+STAT_DIVISORS = np.array(
+    [0, 0, 0, 0, 0, 0, 0, 0, 3, 0, 0, 0, 4, 35, 3, 3, 0, 4, 2, 4, 6, 0, 0, 4, 4]
+)
+
+# points for a clean sheet, given the player was on the pitch for 60 minutes
+CLEAN_SHEET_POINTS = np.array([5, 5, 1, 0])
+
+# points earned for every two goals against
+GOALS_AGAINST_POINTS = np.array([-1, -1, 0, 0])
+
+_MINUTES, _GOALS_AGAINST, _SHUTOUT = 0, 7, 3
+_DIVIDED = STAT_DIVISORS > 0
+
+
+def position_codes(positions: Iterable[Union[str, int]]) -> np.ndarray:
+    """Convert an iterable of position names ('goalie', 'defense', etc) or
+    integer position codes to an array of integer codes that index the rows
+    of the scoring tables.
+
+    A ValueError is raised for a name that isn't a position, or a code that
+    is out of range.
+    """
+    positions = np.asarray(positions)
+    if positions.dtype.kind in "iu":
+        if positions.size and (
+            positions.min() < 0 or positions.max() >= len(POSITIONS)
+        ):
+            raise ValueError(
+                f"position codes must be from 0 to {len(POSITIONS) - 1}"
+            )
+        return positions
+
+    unknown = sorted(set(positions.tolist()) - set(POSITION_CODES))
+    if unknown:
+        raise ValueError(f"positions {unknown} not in list of: {POSITIONS}")
+    return np.array([POSITION_CODES[position] for position in positions], dtype=int)
+
+
+def score_batch(
+    stats: np.ndarray, positions: Iterable[Union[str, int]]
+) -> np.ndarray:
+    """Calculate the fantasy score for N player games in one pass.
+
+    stats is an (N, 25) array with the columns in the order of the PlayerData
+    fields, and positions has the N position names or codes for the players.
+    Returns an array of N fantasy scores, matching what score() returns for
+    the respective GoalieOrDefender, Midfielder or Forward of each row.
+    """
+    stats = np.atleast_2d(np.asarray(stats))
+    codes = position_codes(positions)
+    if stats.shape != (len(codes), len(STAT_DIVISORS)):
+        raise ValueError(
+            f"stats has shape {stats.shape}, expected ({len(codes)}, "
+            f"{len(STAT_DIVISORS)})"
+        )
+
+    minutes = stats[:, _MINUTES]
+    goals_against = stats[:, _GOALS_AGAINST]
+
+    linear = np.einsum("ij,ij->i", stats, LINEAR_POINTS[codes])
+    divided = np.floor_divide(stats[:, _DIVIDED], STAT_DIVISORS[_DIVIDED]).sum(axis=1)
+    minutes_played = np.where(minutes >= 60, 2, np.where(minutes > 0, 1, 0))
+    clean_sheet = np.where(
+        (minutes >= 60) & (stats[:, _SHUTOUT] != 0), CLEAN_SHEET_POINTS[codes], 0
+    )
+    goal_against = np.where(
+        goals_against >= 2,
+        (goals_against // 2) * GOALS_AGAINST_POINTS[codes],
+        0,
+    )
+
+    return linear + divided + minutes_played + clean_sheet + goal_against
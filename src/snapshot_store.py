@@ -0,0 +1,177 @@
+"""Store of the scraped meta data, top stats and season stats as typed columnar
+(Parquet) files, in place of CSV files named by hand for each scrape.
+
+Writing and reading snapshots needs pyarrow installed, which pandas uses for
+Parquet files.
+"""
+import datetime
+import os
+import re
+import sys
+
+import pandas as pd
+
+from dataprep import numeric_stats, numeric_top_stats
+from typing import Dict, List, Optional, Tuple, Union
+
+# the data sets in each snapshot, named as the arguments of DataPrep
+SOURCES = ("meta", "top_stats", "season")
+
+_PARTITION = re.compile(r"^scrape_date=(\d{4}-\d{2}-\d{2})$")
+_ROUND = re.compile(r"^round=(\d+)$")
+
+
+def typed_frames(
+    meta: pd.DataFrame, top_stats: pd.DataFrame, season: pd.DataFrame
+) -> Dict[str, pd.DataFrame]:
+    """Return the scraped data sets with lower case column names and every
+    stat as a number, so they can be stored with their types and loaded
+    without parsing or cleaning strings again.
+    """
+    frames = {}
+    for source, df in zip(SOURCES, (meta, top_stats, season)):
+        df = df.copy()
+        df.columns = [col.lower() for col in df.columns]
+        frames[source] = df
+
+    frames["top_stats"] = numeric_top_stats(frames["top_stats"])
+    frames["season"] = numeric_stats(frames["season"])
+    return frames
+
+
+class SnapshotStore:
+    """SnapshotStore keeps a snapshot of the three data sets for each date
+    they were scraped on and each round they were scraped through,
+    partitioned as:
+
+        root/scrape_date=2020-08-27/round=7/meta.parquet
+        root/scrape_date=2020-08-27/round=7/top_stats.parquet
+        root/scrape_date=2020-08-27/round=7/season.parquet
+    """
+
+    def __init__(self, root: str) -> None:
+        self.root = root
+
+    def _snapshot_dir(
+        self, scrape_date: Union[str, datetime.date], game_week: int
+    ) -> str:
+        return os.path.join(
+            self.root, f"scrape_date={scrape_date}", f"round={int(game_week)}"
+        )
+
+    def path(
+        self, scrape_date: Union[str, datetime.date], game_week: int, source: str
+    ) -> str:
+        """Return the path of the file for one of the data sets in SOURCES."""
+        assert source in SOURCES, f"source '{source}' not in list of: {SOURCES}"
+        return os.path.join(
+            self._snapshot_dir(scrape_date, game_week), f"{source}.parquet"
+        )
+
+    def write(
+        self,
+        scrape_date: Union[str, datetime.date],
+        game_week: int,
+        meta: pd.DataFrame,
+        top_stats: pd.DataFrame,
+        season: pd.DataFrame,
+    ) -> str:
+        """Write the data sets as typed columns for the scrape date and round,
+        replacing any snapshot already stored for them, and return the
+        directory of the snapshot.
+        """
+        snapshot_dir = self._snapshot_dir(scrape_date, game_week)
+        os.makedirs(snapshot_dir, exist_ok=True)
+
+        for source, df in typed_frames(meta, top_stats, season).items():
+            path = self.path(scrape_date, game_week, source)
+            # written under a temporary name first, so a snapshot is never
+            # half written if the write is stopped
+            df.to_parquet(path + ".tmp", index=False)
+            os.replace(path + ".tmp", path)
+
+        return snapshot_dir
+
+    def write_csvs(
+        self,
+        scrape_date: Union[str, datetime.date],
+        game_week: int,
+        meta: str,
+        top_stats: str,
+        season: str,
+    ) -> str:
+        """Write a snapshot from the CSV files of a scrape."""
+        return self.write(
+            scrape_date,
+            game_week,
+            pd.read_csv(meta),
+            pd.read_csv(top_stats),
+            pd.read_csv(season),
+        )
+
+    def read(
+        self,
+        scrape_date: Union[str, datetime.date],
+        game_week: int,
+        source: str,
+        columns: Optional[List[str]] = None,
+    ) -> pd.DataFrame:
+        """Load one of the data sets of a snapshot, with only the columns
+        given, if any are.
+        """
+        return read_columns(self.path(scrape_date, game_week, source), columns)
+
+    def snapshots(self) -> List[Tuple[str, int]]:
+        """Return the (scrape date, round) of every snapshot in the store, in
+        order of scrape date then round.
+        """
+        if not os.path.isdir(self.root):
+            return []
+
+        found = []
+        for date_dir in os.listdir(self.root):
+            date_match = _PARTITION.match(date_dir)
+            if not date_match:
+                continue
+            for round_dir in os.listdir(os.path.join(self.root, date_dir)):
+                round_match = _ROUND.match(round_dir)
+                if round_match:
+                    found.append((date_match.group(1), int(round_match.group(1))))
+        return sorted(found)
+
+    def latest(self, game_week: Optional[int] = None) -> Optional[Tuple[str, int]]:
+        """Return the (scrape date, round) of the most recent snapshot, of the
+        game week if it is given, or None if there isn't one.
+        """
+        found = [
+            snapshot
+            for snapshot in self.snapshots()
+            if game_week is None or snapshot[1] == game_week
+        ]
+        return max(found) if found else None
+
+
+def read_columns(filepath: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Read a Parquet file, projected to the columns given, which are kept in
+    the order they are stored in, as DataPrep selects some columns by
+    position.
+    """
+    if columns is None:
+        return pd.read_parquet(filepath)
+
+    import pyarrow.parquet as pq
+
+    stored = pq.read_schema(filepath).names
+    missing = [col for col in columns if col not in stored]
+    assert not missing, f"columns {missing} not in list of: {stored}"
+    return pd.read_parquet(filepath, columns=[col for col in stored if col in columns])
+
+
+if __name__ == "__main__":
+    # convert the CSV files of a scrape to a snapshot, eg.
+    # python snapshot_store.py ../data/snapshots 2020-08-27 7 \
+    #     ../data/meta_stats_aug27.csv ../data/top_stats_have_played_week7.csv \
+    #     ../data/season_stats_have_played_week7.csv
+    store_root, date, week, meta_csv, top_csv, season_csv = sys.argv[1:7]
+    store = SnapshotStore(store_root)
+    print(store.write_csvs(date, int(week), meta_csv, top_csv, season_csv))
@@ -1,37 +1,142 @@
 # this file should have the end result of having a class that can be run
 # with inputs and produce a team
-from typing import List, Tuple, NamedTuple, TypeVar, Dict
-
+#
+# importing the module only defines the functions and models, and the heavy
+# libraries (numpy, pandas, pulp, torch) are imported by the functions that
+# use them, so the module can be imported cheaply. The pipeline for choosing a
+# team for a round is run by main(), eg.
+#
+#   python team_selection.py --round 7 --model ../models/nn_2layers_sep17.pt
+from __future__ import annotations
+
+from typing import (
+    List,
+    Tuple,
+    NamedTuple,
+    TypeVar,
+    Dict,
+    Iterator,
+    Optional,
+    TYPE_CHECKING,
+)
+
+import argparse
+import os
 import pickle
 import sys
 
-sys.path.append(".")
-# sys.path.append('../models/')
-
-import numpy as np
-import pandas as pd
-import pulp
-import re
+if TYPE_CHECKING:
+    # only for the annotations, which aren't evaluated at run time
+    import numpy as np
+    import pandas as pd
+    import pulp
 
-import torch
+    from feature_schema import FeatureSchema
 
-from dataprep import DataPrep
-import scoring_functions as sc
+sys.path.append(".")
+# sys.path.append('../models/')
 
 M = TypeVar("M")
 D = TypeVar("D")
 
+# directory of the pickled models
+MODELS_DIR = "../models/"
+
 
 def get_pickled_model(filename: str) -> M:
     # get the pickled file from the directory and convert to the model
-    basepath = "../models/"
-    with open(basepath + filename, "rb") as f:
+    with open(MODELS_DIR + filename, "rb") as f:
         pickled_model = pickle.load(f)
     return pickled_model
 
 
+def load_model(filename: str) -> M:
+    """Load the model used for predicting weekly statistics. Files ending in
+    '.pkl' are pickled sklearn models in the models directory, and anything
+    else is loaded as a pytorch model.
+    """
+    if filename.endswith(".pkl"):
+        # random forest model can be uploaded this way
+        return get_pickled_model(filename)
+
+    # pytorch model upload this way
+    import torch
+
+    model = torch.load(filename)
+    model.eval()
+    return model
+
+
+# the schemas loaded by load_schema, by path, with the modified time and size
+# of the file they were loaded from
+_schemas: Dict[str, Tuple[Tuple[int, int], FeatureSchema]] = {}
+
+
+def load_schema(filename: str) -> Optional[FeatureSchema]:
+    """Load the feature schema saved next to the model (see
+    DataPrep.save_feature_schema), or return None if it doesn't have one.
+
+    The schema is loaded once, and the same object returned until the file
+    changes, so the column mappings it works out are kept week after week.
+    """
+    from feature_schema import FeatureSchema, schema_path
+
+    model_path = MODELS_DIR + filename if filename.endswith(".pkl") else filename
+    filepath = schema_path(model_path)
+    if not os.path.exists(filepath):
+        _schemas.pop(filepath, None)
+        return None
+
+    stat = os.stat(filepath)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    if filepath not in _schemas or _schemas[filepath][0] != signature:
+        _schemas[filepath] = (signature, FeatureSchema.load(filepath))
+    return _schemas[filepath][1]
+
+
+def predict_stats(
+    model: M, vectors: np.ndarray, batch_size: Optional[int] = None
+) -> np.ndarray:
+    """Predict the weekly stats for every row of vectors, returning an
+    (N, 25) array. Works for a pytorch model, or for a model with a sklearn
+    style predict() method. The rows are run through the model batch_size at
+    a time, or all together if batch_size is None.
+
+    An empty slate, eg. a round with no eligible players, gives an empty
+    (0, 25) array.
+    """
+    import numpy as np
+
+    if batch_size is None:
+        batch_size = max(len(vectors), 1)
+    # an empty slate is one empty batch, which a pytorch model maps to an
+    # array with no rows and the width of its output
+    batches = [
+        vectors[start : start + batch_size]
+        for start in range(0, len(vectors), batch_size)
+    ] or [vectors]
+
+    if hasattr(model, "predict"):
+        # for use with random forest model
+        if len(vectors) == 0:
+            return np.empty((0, model.n_outputs_))
+        return np.vstack([model.predict(batch) for batch in batches])
+
+    # for use with pytorch neural network
+    import torch
+
+    with torch.no_grad():
+        return np.vstack(
+            [model(torch.from_numpy(batch).float()).numpy() for batch in batches]
+        )
+
+
 def create_player_dict(
-    formatted_data: D, filename: str, game: int
+    formatted_data: D,
+    filename: str,
+    game: int,
+    batch_size: Optional[int] = None,
+    out: Optional[np.ndarray] = None,
 ) -> Dict[int, Dict[str, np.ndarray]]:
     """formatted_data is a dataprep object that has been instantiated
     with meta, top_stats, and season data files.
@@ -39,6 +144,13 @@ def create_player_dict(
     predictions and choosing a team.
     filename is a string for the pickled model used for predicting the 
     weekly statistics.
+    batch_size limits the number of players run through the model at once,
+    where None predicts for all players in a single call.
+
+    If the model has a feature schema saved next to it, the features are
+    lined up with the columns the model was trained on, and written into
+    out when it is given and big enough (see FeatureSchema.align), in which
+    case the 'vector' values are views of out.
 
     The output is a dictionary with player ids as keys, and the values are
     a dictionary with the following keys and values:
@@ -49,38 +161,47 @@ def create_player_dict(
         the 'vector' value through the respective position scoring rubrik
         'position' - the player's position, as in 'defense', 'forward', etc
     """
-    feat, _ = formatted_data.merge_data()
-    cols = feat[feat["rd"] == game].drop(columns=["name", "rd"]).columns
-
-    # create a comprehension from the cols because the one-hot encoder may
-    # change the order of the positions based on the order of IDs in the table
-    positions_mapping = {
-        "goalie": sc.GoalieOrDefender,
-        "defense": sc.GoalieOrDefender,
-        "midfield": sc.Midfielder,
-        "forward": sc.Forward,
-    }
-    score_type_lookup = {i: positions_mapping[col] for i, col in enumerate(cols[2:6])}
-
-    # random forest model can be uploaded this way
-    # model = get_pickled_model(filename)
-
-    # pytorch model upload this way
-    # uploading the pytorch model
-    model = torch.load(filename)
-    model.eval()
+    import numpy as np
+    import scoring_functions as sc
+
+    features = formatted_data.get_matrix_for_predictions(game)
+    schema = load_schema(filename)
+
+    if schema is not None:
+        vectors = schema.align(features, out)
+        # a position with no players in the training data has no column
+        position_cols = [k for k in sc.POSITIONS if k in schema]
+        position_idx = [schema.index(k) for k in position_cols]
+        positions = np.array(position_cols)[
+            np.argmax(vectors[:, position_idx], axis=1)
+        ].tolist()
+        salary_idx = schema.index("salary")
+    else:
+        vectors = features.values
+        # look up the positions from the columns because the one-hot encoder
+        # may change the order of the positions based on the order of IDs in
+        # the table
+        position_cols = features.columns[1:5]
+        positions = position_cols[np.argmax(vectors[:, 1:5], axis=1)]
+        salary_idx = 0
+
+    model = load_model(filename)
+    predicted_scores = sc.score_batch(
+        predict_stats(model, vectors, batch_size), positions
+    )
 
-    week = formatted_data.get_data_for_predictions(game)
+    teams = formatted_data.get_player_teams()
 
-    for k, v in week.items():
-        player_score = score_type_lookup[np.argmax(v["vector"][0][1:5])](
-            # for use with random forest model
-            # *model.predict(v["vector"])[0]
-            # for use with pytorch neural network
-            *(model.forward(torch.from_numpy(v["vector"][0]).float()).detach().numpy())
-        )
-        week[k]["predicted_score"] = player_score.score()
-        week[k]["position"] = cols[2:6][np.argmax(v["vector"][0][1:5])]
+    week = {
+        player_id: {
+            "vector": vectors[row : row + 1],
+            "salary": vectors[row][salary_idx],
+            "team": teams[player_id],
+            "predicted_score": predicted_scores[row],
+            "position": positions[row],
+        }
+        for row, player_id in enumerate(features.index.tolist())
+    }
     return week
 
 
@@ -89,34 +210,30 @@ def create_lp_dicts(
 ) -> Tuple[
     Dict[str, Dict[int, str]], Dict[str, Dict[int, float]], Dict[str, Dict[int, str]],
 ]:
-    """Data wrangling with a pandas and dictionary comprehensions to
-    organize data into suitable formats to solve the Linear Programming
-    Problem.
+    """Data wrangling with dictionary comprehensions to organize data into
+    suitable formats to solve the Linear Programming Problem.
     Inputs: dict of players and data for the given game.
     Outputs: dict of player by salaries, dict of players by predicted
     points, dict of team by players.
     """
-    table = pd.DataFrame(round_dict).T
-    table["player_id"] = table.index
-    unique_pos = set(v["position"] for k, v in round_dict.items())
-    unique_team = set(v["team"] for k, v in round_dict.items())
-
-    salaries = {}
-    predicted_points = {}
-
-    for pos in unique_pos:
-        available = table[table.position == pos]
-        salary = list(
-            available[["player_id", "salary"]].set_index("player_id").to_dict().values()
-        )[0]
-        point = list(
-            available[["player_id", "predicted_score"]]
-            .set_index("player_id")
-            .to_dict()
-            .values()
-        )[0]
-        salaries[pos] = salary
-        predicted_points[pos] = point
+    # positions and teams in the order they are first seen, so the order of
+    # the dictionaries (and of the variables in the problem) is the same on
+    # every run
+    unique_pos = list(dict.fromkeys(v["position"] for v in round_dict.values()))
+    unique_team = list(dict.fromkeys(v["team"] for v in round_dict.values()))
+
+    salaries = {
+        pos: {k: v["salary"] for k, v in round_dict.items() if v["position"] == pos}
+        for pos in unique_pos
+    }
+    predicted_points = {
+        pos: {
+            k: v["predicted_score"]
+            for k, v in round_dict.items()
+            if v["position"] == pos
+        }
+        for pos in unique_pos
+    }
 
     team_by_player = {
         team: {k: v["position"] for k, v in round_dict.items() if v["team"] == team}
@@ -205,6 +322,75 @@ players_team_available = {
 # the salary amount is constrained to 125
 SALARY_CAP = 125
 
+# the fewest and most starters allowed for each position, with 11 starters
+STARTERS_POS_BOUNDS = {
+    "goalie": (1, 1),
+    "defense": (3, 5),
+    "midfield": (3, 5),
+    "forward": (1, 3),
+}
+
+NUM_STARTERS = 11
+
+# transfers allowed each week without a penalty, and the points taken off for
+# each transfer after those
+FREE_TRANSFERS = 1
+TRANSFER_COST = 4
+
+
+class SelectionResult(NamedTuple):
+    """The players chosen by a solve, by position, with the solver status,
+    the total predicted points of the starters and the total salary of the
+    starters and subs.
+    """
+
+    status: str
+    starters: Dict[str, List[int]]
+    subs: Dict[str, List[int]]
+    total_points: float
+    total_salary: float
+
+    @property
+    def formation(self) -> str:
+        """The team shape of the starters, as in '352'."""
+        return "".join(
+            str(len(self.starters.get(k, [])))
+            for k in ["defense", "midfield", "forward"]
+        )
+
+    @property
+    def player_ids(self) -> List[int]:
+        """The ids of all players chosen, starters first."""
+        return [i for v in self.starters.values() for i in v] + [
+            i for v in self.subs.values() for i in v
+        ]
+
+
+def selection_result(
+    status: str,
+    starters: Dict[str, List[int]],
+    subs: Dict[str, List[int]],
+    salaries: Dict[str, Dict[int, float]],
+    predicted_points: Dict[str, Dict[int, float]],
+) -> SelectionResult:
+    """Total up the predicted points and salaries of the chosen players from
+    the dictionaries returned by create_lp_dicts.
+    """
+    return SelectionResult(
+        status=status,
+        starters=starters,
+        subs=subs,
+        total_points=sum(
+            predicted_points[k][i] for k, v in starters.items() for i in v
+        ),
+        total_salary=sum(
+            salaries[k][i]
+            for chosen in (starters, subs)
+            for k, v in chosen.items()
+            for i in v
+        ),
+    )
+
 
 def solve_lp_problem(
     salaries: Dict[int, Dict[str, int]],
@@ -215,269 +401,848 @@ def solve_lp_problem(
     salary_cap: int,
 ) -> float:
     """Create and setup the variables for the Linear Programming problem, 
-    and solve it.
+    and solve it. Returns the total predicted points of the players chosen.
     """
-    # the player variables are the same whether using the predicted_points
-    # dictionary or the salaries dictionary as reference
-    _player_variables = {
-        k: pulp.LpVariable.dicts(k, v, cat="binary")
-        for k, v in predicted_points.items()
-    }
-    _team_variables = {
-        k: pulp.LpVariable.dicts(k, v, cat="binary") for k, v in teams.items()
-    }
+    result = SelectionModel(
+        salaries, predicted_points, teams, players_per_team, salary_cap
+    ).solve(team_shape)
+    print(f"Status: {result.status}")
 
-    prob = pulp.LpProblem("fastbal", pulp.LpMaximize)
-
-    rewards = []
-    costs = []
-    # create the equations for all player variables by position to show costs, and all player variables by position
-    # to show the predicted points. Will set up a constraint for players by position in order to maximize based
-    # on the team shape chosen.
-    for k, v in _player_variables.items():
-        costs += pulp.lpSum([salaries[k][i] * _player_variables[k][i] for i in v])
-        rewards += pulp.lpSum(
-            [predicted_points[k][i] * _player_variables[k][i] for i in v]
-        )
-        prob += pulp.lpSum([_player_variables[k][i] for i in v]) <= team_shape[k]
+    return result.total_points
 
-    # create a constraint equation to limit the number of players chose from any single MLS team to 3
-    for k, v in _team_variables.items():
-        prob += pulp.lpSum([_team_variables[k][i] for i in v]) <= players_per_team[k]
 
-    # this first line sets up the objective, the second line provides the constraint of the salary cap
+class SelectionModel:
+    """Linear Programming model for choosing players, built once from the
+    dictionaries returned by create_lp_dicts and then solved as many times
+    as needed for different team shapes.
 
-    prob += pulp.lpSum(costs) <= salary_cap
-    prob += pulp.lpSum(rewards)
+    The player variables, the objective, the salary cap constraint and the
+    constraint on players per MLS team are only created when the object is
+    instantiated. Each call to solve() only updates the right hand side of
+    the constraints, and the previous solution is passed to the solver as a
+    warm start.
+    """
 
-    prob.solve()
-    print(f"Status: {pulp.LpStatus[prob.status]}")
+    def __init__(
+        self,
+        salaries: Dict[str, Dict[int, float]],
+        predicted_points: Dict[str, Dict[int, float]],
+        teams: Dict[str, Dict[int, str]],
+        players_per_team: Dict[str, int],
+        salary_cap: float,
+        name: str = "fastbal",
+    ) -> None:
+        import pulp
+
+        self.salaries = salaries
+        self.predicted_points = predicted_points
+        self.players_per_team = players_per_team
+        self.salary_cap = salary_cap
+
+        self.prob = pulp.LpProblem(name, pulp.LpMaximize)
+        self.player_variables = {
+            k: pulp.LpVariable.dicts(k, v, cat="Binary")
+            for k, v in predicted_points.items()
+        }
+        self._excluded: List[pulp.LpVariable] = []
 
-    score = str(prob.objective)
-    for v in prob.variables():
-        score = score.replace(v.name, str(v.varValue))
+        self.prob += pulp.lpSum(
+            predicted_points[k][i] * self.player_variables[k][i]
+            for k, v in predicted_points.items()
+            for i in v
+        )
+        self.prob += (
+            pulp.lpSum(
+                salaries[k][i] * self.player_variables[k][i]
+                for k, v in salaries.items()
+                for i in v
+            )
+            <= salary_cap,
+            "salary_cap",
+        )
 
-    return eval(score)
+        # the team shape is set for each solve, so the positions start with
+        # no players allowed
+        for k, v in self.player_variables.items():
+            self.prob += pulp.lpSum(v.values()) <= 0, f"position_{k}"
+
+        # limit the number of players chosen from any single MLS team
+        self._team_names = {}
+        self._team_of: Dict[str, Dict[int, str]] = {k: {} for k in predicted_points}
+        for team, players in teams.items():
+            for player, position in players.items():
+                self._team_of[position][player] = team
+            self._team_names[team] = f"team_{len(self._team_names)}"
+            self.prob += (
+                pulp.lpSum(
+                    self.player_variables[position][player]
+                    for player, position in players.items()
+                )
+                <= players_per_team[team],
+                self._team_names[team],
+            )
+
+    def solve(
+        self,
+        team_shape: Dict[str, int],
+        salary_cap: Optional[float] = None,
+        excluded: Optional[List[int]] = None,
+        players_per_team: Optional[Dict[str, int]] = None,
+    ) -> SelectionResult:
+        """Solve the problem for the number of players by position in
+        team_shape. The players chosen are returned as the starters of the
+        result, and the result is "Infeasible" if team_shape needs players at
+        a position the model has none for.
+
+        salary_cap and players_per_team default to the values the model was
+        built with, and players with ids in excluded cannot be chosen. None of
+        these carry over from one solve to the next.
+        """
+        import pulp
+
+        # a slate without players at a position the shape needs can't fill it
+        missing = [
+            k for k, v in team_shape.items() if v and k not in self.player_variables
+        ]
+        if missing:
+            return selection_result(
+                "Infeasible",
+                {k: [] for k in self.player_variables},
+                {k: [] for k in self.player_variables},
+                self.salaries,
+                self.predicted_points,
+            )
+
+        # positions left out of the shape get no players, rather than the
+        # number from the last solve
+        for k in self.player_variables:
+            self.prob.constraints[f"position_{k}"].changeRHS(team_shape.get(k, 0))
+
+        self.prob.constraints["salary_cap"].changeRHS(
+            self.salary_cap if salary_cap is None else salary_cap
+        )
 
+        players_per_team = players_per_team or self.players_per_team
+        for team, name in self._team_names.items():
+            self.prob.constraints[name].changeRHS(players_per_team[team])
+
+        for variable in self._excluded:
+            variable.upBound = 1
+        excluded_ids = set(excluded or [])
+        self._excluded = [
+            variable
+            for v in self.player_variables.values()
+            for player, variable in v.items()
+            if player in excluded_ids
+        ]
+        for variable in self._excluded:
+            variable.upBound = 0
+            variable.setInitialValue(0)
+
+        self.prob.solve(pulp.PULP_CBC_CMD(msg=False, warmStart=True))
+
+        return selection_result(
+            pulp.LpStatus[self.prob.status],
+            self.selected(),
+            {k: [] for k in self.player_variables},
+            self.salaries,
+            self.predicted_points,
+        )
 
-# using data collected 19Aug2020
-# meta_str = "../data/metadata/meta_stats_aug27.csv"
-# top_stats_str = "../data/top_stats/top_stats_aug27.csv"
-# season_str = "../data/season_stats/season_stats_aug27.csv"
-# model_locale = "baseline_rf.pkl"
+    def solve_with_subs(
+        self, team_shape: Dict[str, int], subs_shape: Dict[str, int]
+    ) -> SelectionResult:
+        """Choose the starters for team_shape, and then the subs for
+        subs_shape from the remaining players, with the salary and players
+        per team that the starters have left available.
+        """
+        starters = self.solve(team_shape)
+
+        players_per_team = {
+            team: available
+            - sum(
+                1
+                for k, v in starters.starters.items()
+                for i in v
+                if self._team_of[k][i] == team
+            )
+            for team, available in self.players_per_team.items()
+        }
 
-# data scraped on aug 30th, ahead of week 5 of the season
-# meta_str = "../data/metadata/meta_stats_sep4.csv"
-# top_stats_str = "../data/top_stats/top_stats_sep4.csv"
-# season_str = "../data/season_stats/season_stats_sep4.csv"
+        subs = self.solve(
+            subs_shape,
+            salary_cap=self.salary_cap - starters.total_salary,
+            excluded=starters.player_ids,
+            players_per_team=players_per_team,
+        )
 
-# data scraped on Sep 8th, ahead of week 6 of the season
-# meta_str = "../data/metadata/meta_stats_sep8.csv"
-# top_stats_str = "../data/top_stats/top_stats_sep8.csv"
-# season_str = "../data/season_stats/season_stats_sep8.csv"
+        status = starters.status if starters.status != "Optimal" else subs.status
+        return selection_result(
+            status,
+            starters.starters,
+            subs.starters,
+            self.salaries,
+            self.predicted_points,
+        )
 
-# data scraped on Sep 8th, removing some injured players
-# meta_str = "../data/metadata/meta_stats_injuries_removed_sep8.csv"
-# top_stats_str = "../data/top_stats/top_stats_injuries_removed_sep8.csv"
-# season_str = "../data/season_stats/season_stats_injuries_removed_sep8.csv"
+    def selected(self) -> Dict[str, List[int]]:
+        """Return the ids of the players chosen in the last solve, by
+        position.
+        """
+        return {
+            k: [player for player, variable in v.items() if variable.varValue > 0.5]
+            for k, v in self.player_variables.items()
+        }
 
-# data scraped on Sep 14th, ahead of week 7 of the season
-# meta_str = "../data/metadata/meta_stats_week7_sep14.csv"
-# top_stats_str = "../data/top_stats/top_stats_week7_sep14.csv"
-# season_str = "../data/season_stats/season_stats_week7_sep14.csv"
 
-# data scraped Sep 14th, filtered for only players who have played at least 1 minute
-meta_str = "../data/metadata/meta_stats_have_played_week7.csv"
-top_stats_str = "../data/top_stats/top_stats_have_played_week7.csv"
-season_str = "../data/season_stats/season_stats_have_played_week7.csv"
+# the model each worker process of solve_all_formations builds once, and
+# solves for every shape it is given
+_worker_model: Optional[SelectionModel] = None
+
+
+def _init_worker(
+    salaries: Dict[str, Dict[int, float]],
+    predicted_points: Dict[str, Dict[int, float]],
+    teams: Dict[str, Dict[int, str]],
+    players_per_team: Dict[str, int],
+    salary_cap: float,
+) -> None:
+    """Build the model of a worker process of solve_all_formations."""
+    global _worker_model
+    _worker_model = SelectionModel(
+        salaries, predicted_points, teams, players_per_team, salary_cap
+    )
 
-#model_locale = "../models/nn_3layers_sep4.pt"
-#model_locale = "../models/nn_3layers_week7_sep14.pt"
-model_locale = "../models/nn_2layers_sep17.pt"
 
-dataprepped = DataPrep(meta_str, top_stats_str, season_str)
-players = create_player_dict(dataprepped, model_locale, 7)
+def _solve_formation(shapes: Tuple[Dict[str, int], Dict[str, int]]) -> SelectionResult:
+    """Solve the worker's model for one team shape and subs shape."""
+    return _worker_model.solve_with_subs(*shapes)
 
-salaries, pred_points, teams = create_lp_dicts(players)
+
+def solve_all_formations(
+    salaries: Dict[str, Dict[int, float]],
+    predicted_points: Dict[str, Dict[int, float]],
+    teams: Dict[str, Dict[int, str]],
+    players_per_team: Dict[str, int],
+    salary_cap: float,
+    team_shapes: List[Tuple[Dict[str, int], Dict[str, int]]] = TEAM_SHAPES,
+    workers: Optional[int] = None,
+) -> List[SelectionResult]:
+    """Choose the starters and subs for each of the (team shape, subs shape)
+    pairs, and return the results ranked by the predicted points of the
+    starters, best first, with solves that weren't optimal last.
+
+    The solver uses a single thread, and the shapes don't depend on each
+    other, so they are solved at the same time in a pool of workers
+    processes (as many as there are CPUs, if workers is None), each of which
+    builds one model and solves it for every shape it is given. With
+    workers=1, they are solved one after another with a single model.
+    """
+    if workers == 1:
+        model = SelectionModel(
+            salaries, predicted_points, teams, players_per_team, salary_cap
+        )
+        results = [model.solve_with_subs(*shapes) for shapes in team_shapes]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(salaries, predicted_points, teams, players_per_team, salary_cap),
+        ) as executor:
+            results = list(executor.map(_solve_formation, team_shapes))
+
+    return sorted(
+        results, key=lambda result: (result.status != "Optimal", -result.total_points)
+    )
 
 
-_variables = {
-    k: pulp.LpVariable.dicts(k, v, cat="Binary") for k, v in pred_points.items()
-}
-_variables_teams = {
-    k: pulp.LpVariable.dicts(k, v, cat="Binary") for k, v in teams.items()
-}
+def add_squad_constraints(
+    prob: pulp.LpProblem,
+    squad_variables: Dict[str, Dict[int, pulp.LpVariable]],
+    starter_variables: Dict[str, Dict[int, pulp.LpVariable]],
+    salaries: Dict[str, Dict[int, float]],
+    teams: Dict[str, Dict[int, str]],
+    players_per_team: Dict[str, int],
+    salary_cap: float,
+    squad_shape: Dict[str, int],
+    starters_bounds: Dict[str, Tuple[int, int]],
+    num_starters: int,
+    suffix: str = "",
+) -> None:
+    """Add the constraints on a squad and its starters to the problem: the
+    salary cap and the players per MLS team for the whole squad, the number
+    of players by position in the squad, the bounds on starters by position
+    and the number of starters. suffix is added to the constraint names, so
+    more than one squad can be in the same problem.
+    """
+    import pulp
 
-results = []
+    prob += (
+        pulp.lpSum(
+            salaries[k][i] * squad_variables[k][i]
+            for k, v in salaries.items()
+            for i in v
+        )
+        <= salary_cap,
+        f"salary_cap{suffix}",
+    )
 
-for starters, subs in TEAM_SHAPES:
+    # only players in the squad can start
+    for k, v in starter_variables.items():
+        for i, variable in v.items():
+            prob += variable <= squad_variables[k][i]
 
-    prob = pulp.LpProblem("fastbal", pulp.LpMaximize)
+    for k, v in squad_variables.items():
+        prob += pulp.lpSum(v.values()) == squad_shape[k], f"squad_{k}{suffix}"
 
-    rewards = []
-    costs = []
+    for k, (fewest, most) in starters_bounds.items():
+        starters = pulp.lpSum(starter_variables[k].values())
+        prob += starters >= fewest, f"starters_min_{k}{suffix}"
+        prob += starters <= most, f"starters_max_{k}{suffix}"
 
-    for k, v in _variables.items():
-        costs += pulp.lpSum([salaries[k][i] * _variables[k][i] for i in v])
-        rewards += pulp.lpSum([pred_points[k][i] * _variables[k][i] for i in v])
-        prob += pulp.lpSum([_variables[k][i] for i in v]) <= starters[k]
+    prob += (
+        pulp.lpSum(
+            variable for v in starter_variables.values() for variable in v.values()
+        )
+        == num_starters,
+        f"starters{suffix}",
+    )
 
-    for k, v in _variables_teams.items():
+    # limit the number of players chosen from any single MLS team, for the
+    # starters and subs together
+    for number, (team, players) in enumerate(teams.items()):
         prob += (
-            pulp.lpSum([_variables_teams[k][i] for i in v]) <= players_team_available[k]
+            pulp.lpSum(
+                squad_variables[position][player]
+                for player, position in players.items()
+            )
+            <= players_per_team[team],
+            f"team_{number}{suffix}",
         )
 
-    prob += pulp.lpSum(rewards)
-    prob += pulp.lpSum(costs) <= SALARY_CAP
-
-    prob.solve()
-    status = pulp.LpStatus[prob.status]
-    # print(f'Status: {pulp.LpStatus[prob.status]}')
-
-    score = str(prob.objective)
-    for v in prob.variables():
-        score = score.replace(v.name, str(v.varValue))
-
-    # get constraints for the team
-    constraints = [str(const) for const in prob.constraints.values()]
-    for v in prob.variables():
-        constraints = [const.replace(v.name, str(v.varValue)) for const in constraints]
-        if v.varValue != 0:
-            for const in constraints:
-                constraint_readable = " + ".join(re.findall("[0-9\.]*\*1.0", const))
-
-    starter_salaries_total = eval(constraint_readable)
-
-    # to choose the four subs, we go through the LP problem again, first by
-    # removing the starters from all the dictionaries we'll use for the LP
-    # problem, and then use the subs constraint from the respective starters
-    # shape
-
-    team_list = [
-        int("".join(re.findall("[\d.]+", v.name)))
-        for v in prob.variables()
-        if v.varValue > 0
-    ]
-
-    subs_salaries = {
-        k: {player: sal for player, sal in v.items() if player not in team_list}
-        for k, v in salaries.items()
-    }
 
-    subs_predicted_points = {
-        k: {player: sal for player, sal in v.items() if player not in team_list}
-        for k, v in pred_points.items()
-    }
+class SquadModel:
+    """Mixed integer model that chooses the full squad of 15 players and the
+    starting 11 from it in a single solve, with the formation as part of the
+    solution rather than fixed ahead of time.
 
-    subs_team_by_player = {
-        k: {player: pos for player, pos in v.items() if player not in team_list}
-        for k, v in teams.items()
-    }
+    The squad must have the number of players by position in squad_shape,
+    the starters must fit within starters_bounds for each position, and the
+    salary cap and the limit of players per MLS team apply to all 15
+    players. The objective is the predicted points of the starters, plus
+    bench_weight times the predicted points of the subs, so that between
+    squads with the same starters the stronger bench is chosen.
+    """
 
-    # setup the LP problem for the subs
-    _subs_variables = {
-        k: pulp.LpVariable.dicts(k, v, cat="Binary")
-        for k, v in subs_predicted_points.items()
-    }
-    _subs_variables_teams = {
-        k: pulp.LpVariable.dicts(k, v, cat="Binary")
-        for k, v in subs_team_by_player.items()
-    }
+    def __init__(
+        self,
+        salaries: Dict[str, Dict[int, float]],
+        predicted_points: Dict[str, Dict[int, float]],
+        teams: Dict[str, Dict[int, str]],
+        players_per_team: Dict[str, int],
+        salary_cap: float,
+        squad_shape: Dict[str, int] = SQUAD_POS_NUM_AVAILABLE,
+        starters_bounds: Dict[str, Tuple[int, int]] = STARTERS_POS_BOUNDS,
+        num_starters: int = NUM_STARTERS,
+        bench_weight: float = 0.01,
+        name: str = "fastbal_squad",
+    ) -> None:
+        import pulp
+
+        self.salaries = salaries
+        self.predicted_points = predicted_points
+
+        self.prob = pulp.LpProblem(name, pulp.LpMaximize)
+        self.squad_variables = {
+            k: pulp.LpVariable.dicts(f"squad_{k}", v, cat="Binary")
+            for k, v in predicted_points.items()
+        }
+        self.starter_variables = {
+            k: pulp.LpVariable.dicts(f"starter_{k}", v, cat="Binary")
+            for k, v in predicted_points.items()
+        }
+
+        self.prob += pulp.lpSum(
+            predicted_points[k][i]
+            * (
+                (1 - bench_weight) * self.starter_variables[k][i]
+                + bench_weight * self.squad_variables[k][i]
+            )
+            for k, v in predicted_points.items()
+            for i in v
+        )
+
+        add_squad_constraints(
+            self.prob,
+            self.squad_variables,
+            self.starter_variables,
+            salaries,
+            teams,
+            players_per_team,
+            salary_cap,
+            squad_shape,
+            starters_bounds,
+            num_starters,
+        )
+        self._lineup_cuts: List[str] = []
 
-    subs_prob = pulp.LpProblem("subs_fastbal", pulp.LpMaximize)
+    def solve(self) -> SelectionResult:
+        """Solve the problem for the best squad and starters."""
+        import pulp
 
-    subs_rewards = []
-    subs_costs = []
+        self.prob.solve(pulp.PULP_CBC_CMD(msg=False))
 
-    # create the equations for all player variables by position to show costs, and all player variables by position
-    # to show the predicted points. Will set up a constraint for players by position in order to maximize based
-    # on the team shape chosen.
-    for k, v in _subs_variables.items():
-        subs_costs += pulp.lpSum(
-            [subs_salaries[k][i] * _subs_variables[k][i] for i in v]
+        return selection_result(
+            pulp.LpStatus[self.prob.status],
+            *self.selected(),
+            self.salaries,
+            self.predicted_points,
         )
-        subs_rewards += pulp.lpSum(
-            [subs_predicted_points[k][i] * _subs_variables[k][i] for i in v]
+
+    def lineups(
+        self,
+        count: Optional[int] = None,
+        max_overlap: Optional[int] = None,
+        starters_only: bool = False,
+    ) -> Iterator[SelectionResult]:
+        """Yield the best squad, then the next best squad that is different
+        from all the squads before it, and so on, for count squads or until
+        there are no more. Each squad is yielded as soon as it is solved, so
+        the caller can stop at any time, eg. when out of time.
+
+        By default a squad only has to differ from each previous squad by one
+        player. With max_overlap, it can share at most that many players with
+        any previous squad. With starters_only, only the starters are compared,
+        so a squad with the same starters and different subs doesn't count as
+        a new lineup.
+
+        Each squad found adds a constraint to the model, rather than building
+        it again, before it is yielded, and they stay in the model until
+        clear_lineups() is called.
+        """
+        import pulp
+
+        found = 0
+        while count is None or found < count:
+            result = self.solve()
+            if result.status != "Optimal":
+                return
+
+            # the cut is added before the squad is yielded, so it is in the
+            # model even if the caller stops here
+            if starters_only:
+                chosen = [
+                    self.starter_variables[k][i]
+                    for k, v in result.starters.items()
+                    for i in v
+                ]
+            else:
+                chosen = [
+                    self.squad_variables[k][i]
+                    for players in (result.starters, result.subs)
+                    for k, v in players.items()
+                    for i in v
+                ]
+            name = f"lineup_{len(self._lineup_cuts)}"
+            self.prob += (
+                pulp.lpSum(chosen)
+                <= (len(chosen) - 1 if max_overlap is None else max_overlap),
+                name,
+            )
+            self._lineup_cuts.append(name)
+
+            yield result
+            found += 1
+
+    def clear_lineups(self) -> None:
+        """Remove the constraints added by lineups(), so the next solve can
+        choose any squad again.
+        """
+        for name in self._lineup_cuts:
+            del self.prob.constraints[name]
+        self._lineup_cuts = []
+
+    def selected(self) -> Tuple[Dict[str, List[int]], Dict[str, List[int]]]:
+        """Return the ids of the starters and of the subs chosen in the last
+        solve, by position.
+        """
+        starters = {
+            k: [player for player, variable in v.items() if variable.varValue > 0.5]
+            for k, v in self.starter_variables.items()
+        }
+        subs = {
+            k: [
+                player
+                for player, variable in v.items()
+                if variable.varValue > 0.5 and player not in starters[k]
+            ]
+            for k, v in self.squad_variables.items()
+        }
+        return starters, subs
+
+
+class HorizonPlan(NamedTuple):
+    """The squads chosen for each week of a horizon, with the players
+    transferred in and out ahead of each week, the points taken off for
+    transfers each week, and the total predicted points of the starters over
+    all weeks less the transfer costs.
+    """
+
+    status: str
+    weeks: List[SelectionResult]
+    transfers_in: List[List[int]]
+    transfers_out: List[List[int]]
+    transfer_costs: List[float]
+    total_points: float
+
+
+class HorizonModel:
+    """Mixed integer model that plans the squad and starters for several
+    weeks at once, from the predicted points of each player for each week,
+    so that a transfer made now is weighed against the weeks that follow.
+
+    Each week's squad has the same constraints as SquadModel. The number of
+    players transferred in ahead of each week is the number in that week's
+    squad who weren't in the squad of the week before (or current_squad for
+    the first week, if given, otherwise the first squad is free to choose).
+    Transfers over free_transfers cost transfer_cost points each, and no more
+    than max_transfers can be made in a week, if it is given.
+
+    Only the squad variables are integer. Once the squads are fixed, the
+    constraints on the starters only count players by position and in total,
+    so the best starters are whole players without requiring it, and the
+    starter and transfer variables are continuous. This keeps the problem
+    small enough to solve a 4 to 6 week horizon in a few minutes.
+    """
+
+    def __init__(
+        self,
+        salaries: Dict[str, Dict[int, float]],
+        weekly_points: List[Dict[str, Dict[int, float]]],
+        teams: Dict[str, Dict[int, str]],
+        players_per_team: Dict[str, int],
+        salary_cap: float,
+        current_squad: Optional[List[int]] = None,
+        free_transfers: int = FREE_TRANSFERS,
+        transfer_cost: float = TRANSFER_COST,
+        max_transfers: Optional[int] = None,
+        squad_shape: Dict[str, int] = SQUAD_POS_NUM_AVAILABLE,
+        starters_bounds: Dict[str, Tuple[int, int]] = STARTERS_POS_BOUNDS,
+        num_starters: int = NUM_STARTERS,
+        bench_weight: float = 0.01,
+        name: str = "fastbal_horizon",
+    ) -> None:
+        import pulp
+
+        self.salaries = salaries
+        # a player without a prediction for a week, as when their team has no
+        # game, scores nothing that week
+        self.weekly_points = [
+            {k: {i: points[k].get(i, 0) for i in v} for k, v in salaries.items()}
+            for points in weekly_points
+        ]
+        self.current_squad = set(current_squad or [])
+        self.free_transfers = free_transfers
+        self.transfer_cost = transfer_cost
+
+        self.prob = pulp.LpProblem(name, pulp.LpMaximize)
+        self.squad_variables = []
+        self.starter_variables = []
+        self.transfer_variables = []
+        self.extra_transfers = []
+
+        for week, points in enumerate(self.weekly_points):
+            squad = {
+                k: pulp.LpVariable.dicts(f"squad_{week}_{k}", v, cat="Binary")
+                for k, v in salaries.items()
+            }
+            starters = {
+                k: pulp.LpVariable.dicts(f"starter_{week}_{k}", v, 0, 1)
+                for k, v in salaries.items()
+            }
+            self.squad_variables.append(squad)
+            self.starter_variables.append(starters)
+
+            add_squad_constraints(
+                self.prob,
+                squad,
+                starters,
+                salaries,
+                teams,
+                players_per_team,
+                salary_cap,
+                squad_shape,
+                starters_bounds,
+                num_starters,
+                suffix=f"_week_{week}",
+            )
+
+            if week == 0 and current_squad is None:
+                self.transfer_variables.append({})
+                self.extra_transfers.append(None)
+                continue
+
+            transfers = {
+                k: pulp.LpVariable.dicts(f"transfer_{week}_{k}", v, 0, 1)
+                for k, v in salaries.items()
+            }
+            for k, v in squad.items():
+                for i, variable in v.items():
+                    if week == 0:
+                        before = 1 if i in self.current_squad else 0
+                    else:
+                        before = self.squad_variables[week - 1][k][i]
+                    self.prob += transfers[k][i] >= variable - before
+
+            num_transfers = pulp.lpSum(
+                variable for v in transfers.values() for variable in v.values()
+            )
+            extra = pulp.LpVariable(f"extra_transfers_{week}", 0)
+            self.prob += extra >= num_transfers - free_transfers
+            if max_transfers is not None:
+                self.prob += num_transfers <= max_transfers, f"transfers_{week}"
+            self.transfer_variables.append(transfers)
+            self.extra_transfers.append(extra)
+
+        self.prob += pulp.lpSum(
+            points[k][i]
+            * (
+                (1 - bench_weight) * self.starter_variables[week][k][i]
+                + bench_weight * self.squad_variables[week][k][i]
+            )
+            for week, points in enumerate(self.weekly_points)
+            for k, v in points.items()
+            for i in v
+        ) - transfer_cost * pulp.lpSum(
+            extra for extra in self.extra_transfers if extra is not None
         )
-        subs_prob += pulp.lpSum([_subs_variables[k][i] for i in v]) <= subs[k]
 
-    # create a constraint equation to limit the number of players chose from any single MLS team to 3
-    for k, v in _subs_variables_teams.items():
-        subs_prob += (
-            pulp.lpSum([_subs_variables_teams[k][i] for i in v])
-            <= players_team_available[k]
+    def solve(
+        self, time_limit: Optional[float] = None, gap: Optional[float] = None
+    ) -> HorizonPlan:
+        """Solve for the best plan, stopping after time_limit seconds or once
+        the solution is within the relative gap of the best possible, if
+        either is given, in which case the plan is the best found so far.
+        """
+        import pulp
+
+        self.prob.solve(pulp.PULP_CBC_CMD(msg=False, timeLimit=time_limit, gapRel=gap))
+        status = pulp.LpStatus[self.prob.status]
+
+        weeks = []
+        transfers_in = []
+        transfers_out = []
+        transfer_costs = []
+        previous = self.current_squad
+        for week, points in enumerate(self.weekly_points):
+            starters, subs = self.selected(week)
+            weeks.append(
+                selection_result(status, starters, subs, self.salaries, points)
+            )
+            squad = set(weeks[-1].player_ids)
+            if week == 0 and not self.transfer_variables[0]:
+                transfers_in.append([])
+                transfers_out.append([])
+            else:
+                transfers_in.append(sorted(squad - previous))
+                transfers_out.append(sorted(previous - squad))
+            # counted from the squads, as the continuous transfer variables
+            # can be above the transfers made in a solution short of optimal
+            extra = max(len(transfers_in[-1]) - self.free_transfers, 0)
+            transfer_costs.append(self.transfer_cost * extra)
+            previous = squad
+
+        return HorizonPlan(
+            status,
+            weeks,
+            transfers_in,
+            transfers_out,
+            transfer_costs,
+            sum(result.total_points for result in weeks) - sum(transfer_costs),
         )
 
-    # this first line sets up the objective, the second line provides the constraint of the salary cap
-    subs_prob += pulp.lpSum(subs_rewards)
-    subs_prob += pulp.lpSum(subs_costs) <= SALARY_CAP - starter_salaries_total
+    def selected(self, week: int) -> Tuple[Dict[str, List[int]], Dict[str, List[int]]]:
+        """Return the ids of the starters and of the subs chosen for the week
+        in the last solve, by position.
+        """
+        starters = {
+            k: [player for player, variable in v.items() if variable.varValue > 0.5]
+            for k, v in self.starter_variables[week].items()
+        }
+        subs = {
+            k: [
+                player
+                for player, variable in v.items()
+                if variable.varValue > 0.5 and player not in starters[k]
+            ]
+            for k, v in self.squad_variables[week].items()
+        }
+        return starters, subs
 
-    subs_prob.solve()
-    subs_status = pulp.LpStatus[subs_prob.status]
 
-    team_list = [
-        int("".join(re.findall("[\d.]+", v.name)))
-        for v in prob.variables()
-        if v.varValue > 0
-    ]
+# data sets and models used in previous weeks, which can be passed to main()
 
-    subs_team_list = [
-        int("".join(re.findall("[\d.]+", v.name)))
-        for v in subs_prob.variables()
-        if v.varValue > 0
-    ]
-    # print dataframes of each team starters and subs
+# using data collected 19Aug2020
+# meta_str = "../data/metadata/meta_stats_aug27.csv"
+# top_stats_str = "../data/top_stats/top_stats_aug27.csv"
+# season_str = "../data/season_stats/season_stats_aug27.csv"
+# model_locale = "baseline_rf.pkl"
 
-    meta_df = pd.read_csv(meta_str)
-    selected_team = {
-        player_id: {
-            "name": meta_df[meta_df.ID == player_id].values[0][1],
-            "position": players[player_id]["position"],
-            "team": players[player_id]["team"],
-            "predicted_score": players[player_id]["predicted_score"],
-            "salary": players[player_id]["salary"],
-        }
-        for player_id in team_list
-    }
+# data scraped on aug 30th, ahead of week 5 of the season
+# meta_str = "../data/metadata/meta_stats_sep4.csv"
+# top_stats_str = "../data/top_stats/top_stats_sep4.csv"
+# season_str = "../data/season_stats/season_stats_sep4.csv"
 
-    starters_df = pd.DataFrame(selected_team).T.sort_values(by="position")
+# data scraped on Sep 8th, ahead of week 6 of the season
+# meta_str = "../data/metadata/meta_stats_sep8.csv"
+# top_stats_str = "../data/top_stats/top_stats_sep8.csv"
+# season_str = "../data/season_stats/season_stats_sep8.csv"
 
-    subs_team = {
-        player_id: {
-            "name": meta_df[meta_df.ID == player_id].values[0][1],
-            "position": players[player_id]["position"],
-            "team": players[player_id]["team"],
-            "predicted_score": players[player_id]["predicted_score"],
-            "salary": players[player_id]["salary"],
-        }
-        for player_id in subs_team_list
-    }
+# data scraped on Sep 8th, removing some injured players
+# meta_str = "../data/metadata/meta_stats_injuries_removed_sep8.csv"
+# top_stats_str = "../data/top_stats/top_stats_injuries_removed_sep8.csv"
+# season_str = "../data/season_stats/season_stats_injuries_removed_sep8.csv"
+
+# data scraped on Sep 14th, ahead of week 7 of the season
+# meta_str = "../data/metadata/meta_stats_week7_sep14.csv"
+# top_stats_str = "../data/top_stats/top_stats_week7_sep14.csv"
+# season_str = "../data/season_stats/season_stats_week7_sep14.csv"
 
-    subs_df = pd.DataFrame(subs_team).T.sort_values(by="position")
+# data scraped Sep 14th, filtered for only players who have played at least 1 minute
+META_STR = "../data/metadata/meta_stats_have_played_week7.csv"
+TOP_STATS_STR = "../data/top_stats/top_stats_have_played_week7.csv"
+SEASON_STR = "../data/season_stats/season_stats_have_played_week7.csv"
+
+# model_locale = "../models/nn_3layers_sep4.pt"
+# model_locale = "../models/nn_3layers_week7_sep14.pt"
+MODEL_LOCALE = "../models/nn_2layers_sep17.pt"
+
+GAME_WEEK = 7
+
+
+def players_frame(
+    chosen: Dict[str, List[int]],
+    players: Dict[int, Dict[str, np.ndarray]],
+    names: Dict[int, str],
+) -> pd.DataFrame:
+    """Table of the chosen players, for printing."""
+    import pandas as pd
+
+    return pd.DataFrame.from_dict(
+        {
+            player_id: {
+                "name": names[player_id],
+                "position": players[player_id]["position"],
+                "team": players[player_id]["team"],
+                "predicted_score": players[player_id]["predicted_score"],
+                "salary": players[player_id]["salary"],
+            }
+            for v in chosen.values()
+            for player_id in v
+        },
+        orient="index",
+        columns=["name", "position", "team", "predicted_score", "salary"],
+    ).sort_values(by="position")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Choose the fastbal team for a round of MLS fantasy soccer."
+    )
+    parser.add_argument("--meta", default=META_STR, help="meta data csv file")
+    parser.add_argument("--top-stats", default=TOP_STATS_STR, help="top stats csv file")
+    parser.add_argument("--season", default=SEASON_STR, help="season stats csv file")
+    parser.add_argument(
+        "--snapshot",
+        help="snapshot store directory, used in place of the csv files",
+    )
+    parser.add_argument(
+        "--scrape-date", help="scrape date of the snapshot, the latest if not given"
+    )
+    parser.add_argument(
+        "--snapshot-round",
+        type=int,
+        help="round the snapshot was scraped through, the latest if not given",
+    )
+    parser.add_argument("--model", default=MODEL_LOCALE, help="model file")
+    parser.add_argument(
+        "--round", type=int, default=GAME_WEEK, help="round to choose the team for"
+    )
+    parser.add_argument(
+        "--batch-size", type=int, help="players run through the model at once"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="processes for solving the team shapes, the number of CPUs if not given",
+    )
+    return parser.parse_args(argv)
 
-    playing_shape = "".join((str(v) for v in starters.values()))[1:]
 
-    results.append(
-        [
-            playing_shape,
-            status,
-            eval(score),
-            starter_salaries_total,
-            starters_df,
-            subs_df,
-        ]
+def main(argv: Optional[List[str]] = None) -> None:
+    """Predict the points of every player for the round, and print the best
+    starters and subs for each team shape, and the best squad overall.
+    """
+    from dataprep import DataPrep
+
+    args = parse_args(argv)
+
+    if args.snapshot:
+        dataprepped = DataPrep.from_snapshot(
+            args.snapshot, args.scrape_date, args.snapshot_round
+        )
+    else:
+        dataprepped = DataPrep(args.meta, args.top_stats, args.season)
+    players = create_player_dict(dataprepped, args.model, args.round, args.batch_size)
+
+    salaries, pred_points, teams = create_lp_dicts(players)
+    names = dataprepped.get_player_names()
+
+    # for each team shape, the starters are chosen first, and then the subs
+    # are chosen from the remaining players with the subs shape for those
+    # starters, with the team shapes solved in parallel and ranked best first
+    results = solve_all_formations(
+        salaries,
+        pred_points,
+        teams,
+        players_team_available,
+        SALARY_CAP,
+        workers=args.workers,
     )
 
-for result in results:
+    for result in results:
+        print(
+            f"team shape {result.formation} expected points "
+            f"{result.total_points} costs {result.total_salary}"
+        )
+        print(f"starters: \n")
+        print(players_frame(result.starters, players, names))
+        print(f"subs: \n")
+        print(players_frame(result.subs, players, names))
+        print("\n")
+    for result in results:
+        print(
+            f"team shape {result.formation} has a score of {result.total_points}, "
+            f"a total salary of {result.total_salary}, and status {result.status}"
+        )
+
+    # solve for the whole squad and the formation in one go
+    squad = SquadModel(
+        salaries, pred_points, teams, players_team_available, SALARY_CAP
+    ).solve()
+
     print(
-        f"team shape {result[0]} expected points {result[2]} costs {starters_df.salary.sum() + subs_df.salary.sum()}"
+        f"best squad has team shape {squad.formation}, expected points "
+        f"{squad.total_points}, a total salary of {squad.total_salary}, and "
+        f"status {squad.status}"
     )
     print(f"starters: \n")
-    print(result[4])
+    print(players_frame(squad.starters, players, names))
     print(f"subs: \n")
-    print(result[5])
-    print("\n")
-for result in results:
-    print(
-        f"team shape {result[0]} has a score of {result[2]}, a total salary of {starters_df.salary.sum() + subs_df.salary.sum()}, and status {result[1]}"
-    )
+    print(players_frame(squad.subs, players, names))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Single pass tokenizers for the text scraped from the player profile pages,
+which run on every row of every page, so each is linear in the length of its
+input.
+"""
+import re
+
+from typing import List
+
+# labels of the fields in a player's top stats
+TOP_STATS_LABELS = frozenset(
+    [
+        "GAMES PLAYED",
+        "AVG FANTASY PTS",
+        "TOTAL FANTASY PTS",
+        "LAST WK FANTASY PTS",
+        "3 WK AVG",
+        "5 WK AVG",
+        "HIGH SCORE",
+        "LOW SCORE",
+        "OWNED BY",
+        "$/POINT",
+        "RD 2 RANK",
+        "SEASON RANK",
+    ]
+)
+
+SALARY_PER_POINT = "$/POINT"
+
+# characters that end a token in the scraped text
+_SEPARATORS = re.compile(r"[\t\n\\]")
+
+
+def tokenize(text: str) -> List[str]:
+    """Split scraped text into tokens at tabs, newlines and backslashes.
+
+    A hyphen at the start of a token is a token on its own, as the site
+    writes a negative score as a hyphen before the number, and text after
+    the last separator is dropped, as it is the start of the next row.
+    """
+    pieces = _SEPARATORS.split(text)
+    last = len(pieces) - 1
+    row: List[str] = []
+    for i, piece in enumerate(pieces):
+        word = piece.lstrip("-")
+        # each leading hyphen is its own token
+        row.extend("-" * (len(piece) - len(word)))
+        if word and i < last:
+            row.append(word)
+    return row
+
+
+def join_negative_scores(
+    stats: List[str], labels: frozenset = TOP_STATS_LABELS
+) -> List[str]:
+    """Return the stats with each hyphen that comes before a value, rather
+    than a label, joined on to the value as its sign. A hyphen at the end of
+    the stats is kept as it is.
+    """
+    joined: List[str] = []
+    i = 0
+    while i < len(stats):
+        if stats[i] == "-" and i + 1 < len(stats) and stats[i + 1] not in labels:
+            joined.append("-" + stats[i + 1])
+            i += 2
+        else:
+            joined.append(stats[i])
+            i += 1
+    return joined
+
+
+def join_salary_per_point(stats: List[str]) -> List[str]:
+    """Return the stats with a salary per point that was split in two by a
+    ',' joined back together, which is the case when the '$/POINT' label is
+    followed by two values before the 'RD' rank label.
+    """
+    joined: List[str] = []
+    # the token at i, which may be two tokens already joined together
+    current = stats[0] if stats else None
+    i = 0
+    while i < len(stats):
+        if current == SALARY_PER_POINT and i + 2 < len(stats):
+            if stats[i + 2][:2] != "RD":
+                joined.append(current)
+                # the joined value is checked next, as if it were a token
+                current = stats[i + 1] + stats[i + 2]
+                i += 2
+                continue
+        joined.append(current)
+        i += 1
+        if i < len(stats):
+            current = stats[i]
+    return joined
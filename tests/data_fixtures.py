@@ -0,0 +1,39 @@
+"""Small scraped data sets, as the CSV files the scraper writes, for the
+dataprep tests.
+"""
+
+import os
+
+META_CSV = """ID,name,team,position,salary
+1,A. Keeper,LA Galaxy,G,5.0
+2,B. Back,D.C. United,D,6.5
+3,C. Striker,LA Galaxy,F,9.0
+"""
+
+TOP_CSV = """id,name,team,games_played,avg_fantasy_pts,total_fantasy_pts,last_wk_fantasy_pts,3_wk_avg,5_wk_avg,high_score,low_score,owned_by,$/point,rd_2_rank,season_rank
+1,A. Keeper,LA Galaxy,2,3.0,6,DNP,3,3,5,1,10,"$1,607",4,40
+2,B. Back,D.C. United,2,2.0,4,4,2,2,4,0,20,$950,5,50
+3,C. Striker,LA Galaxy,2,7.5,15,9,7,7,9,6,30,"$1,200",1,10
+"""
+
+SEASON_CSV = """ID,NAME,TEAM,RD,HOME_AWAY,OPPONENT,PTS,MIN,GF,A
+1,A. Keeper,LA Galaxy,1,vs,D.C. United,2,90,-,-
+1,A. Keeper,LA Galaxy,2,@,FC Dallas,4,90,-,1
+2,B. Back,D.C. United,1,@,LA Galaxy,0,-,-,-
+2,B. Back,D.C. United,2,vs,FC Dallas,4,90,1,-
+3,C. Striker,LA Galaxy,1,vs,D.C. United,6,90,1,1
+3,C. Striker,LA Galaxy,2,@,FC Dallas,9,78,2,-
+"""
+
+
+def write_csvs(directory, meta=META_CSV, top=TOP_CSV, season=SEASON_CSV, prefix=""):
+    """Write the meta, top stats and season data to CSV files in directory,
+    and return their paths, in the order DataPrep takes them.
+    """
+    paths = []
+    for name, text in (("meta", meta), ("top", top), ("season", season)):
+        path = os.path.join(directory, f"{prefix}{name}.csv")
+        with open(path, "w") as f:
+            f.write(text)
+        paths.append(path)
+    return paths
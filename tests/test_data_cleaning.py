@@ -0,0 +1,89 @@
+import os
+import sys
+import unittest
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../src"))
+
+import data_cleaning as dc
+from player_data_scraper import SEASON_STATS_COLUMNS
+
+STATS = SEASON_STATS_COLUMNS.lower().split(",")[6:]
+
+
+def season_stats(n_players, n_rounds, seed=0):
+    """Numeric season stats with a random subset of rounds played by each
+    player, shuffled as scraped rows can be.
+    """
+    rng = np.random.default_rng(seed)
+    rows = []
+    for player_id in range(1, n_players + 1):
+        for rd in np.flatnonzero(rng.random(n_rounds) < 0.8) + 1:
+            rows.append(
+                [player_id, f"Player {player_id}", "Team FC", rd, "vs", "Opp FC"]
+                + rng.integers(-2, 12, len(STATS)).tolist()
+            )
+    columns = SEASON_STATS_COLUMNS.split(",")
+    return pd.DataFrame(rows, columns=columns).sample(frac=1, random_state=seed)
+
+
+def assert_matches_groupby(form, df):
+    """Check form against the features computed with a pandas groupby for
+    each of them, and that its rows are the games sorted by player and round.
+    """
+    games = df.sort_values(by=["id", "rd"]).reset_index(drop=True)
+    by_player = games.groupby("id")[STATS]
+    expected = {
+        "ytd": by_player.cumsum(),
+        "avg_3": by_player.rolling(3, min_periods=1).mean(),
+        "avg_5": by_player.rolling(5, min_periods=1).mean(),
+        "ewm": by_player.ewm(span=3).mean(),
+    }
+    for suffix, frame in expected.items():
+        values = frame.reset_index(level=0, drop=True).sort_index()
+        columns = [f"{stat}_{suffix}" for stat in STATS]
+        np.testing.assert_allclose(form[columns].to_numpy(), values.to_numpy())
+
+    np.testing.assert_array_equal(
+        form[["id", "rd"]].to_numpy(), games[["id", "rd"]].to_numpy()
+    )
+
+
+class TestFormFeatures(unittest.TestCase):
+    def test_matches_groupby(self):
+        df = season_stats(20, 10)
+        assert_matches_groupby(dc.form_features(df), df)
+
+    def test_ytd_matches_calculate_ytd(self):
+        df = season_stats(20, 10)
+        df.columns = [col.lower() for col in df.columns]
+        form = dc.form_features(df)
+        for game_week in (3, 10):
+            through_week = form[form["rd"] <= game_week].groupby("id").last()
+            ytd = dc.calculate_ytd_fantasy_points(df, game_week)
+            self.assertEqual(through_week["pts_ytd"].tolist(), ytd["pts"].tolist())
+
+    def test_lag_uses_previous_games(self):
+        df = season_stats(5, 6)
+        form = dc.form_features(df, stats=["pts"])
+        lagged = dc.form_features(df, stats=["pts"], lag=1)
+
+        first = lagged.groupby("id").head(1)
+        self.assertTrue((first.iloc[:, 3:] == 0).all().all())
+        columns = ["pts_ytd", "pts_avg_3", "pts_avg_5", "pts_ewm"]
+        np.testing.assert_allclose(
+            lagged[columns].to_numpy(),
+            form.groupby("id")[columns].shift(1).fillna(0).to_numpy(),
+        )
+
+    def test_full_season(self):
+        df = season_stats(800, 34)
+        form = dc.form_features(df)
+        self.assertEqual(form.shape, (len(df), 3 + 4 * len(STATS)))
+        assert_matches_groupby(form, df)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../src"))
+
+from dataprep import DataPrep
+from data_fixtures import META_CSV, SEASON_CSV, TOP_CSV, write_csvs
+
+
+class TestEncoding(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.csvs = write_csvs(self.tmp.name, META_CSV, TOP_CSV, SEASON_CSV)
+        self.vocabulary = os.path.join(self.tmp.name, "vocabulary.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_sparse_matches_dense(self):
+        dense, _ = DataPrep(*self.csvs).merge_data()
+        sparse, _ = DataPrep(*self.csvs, encoding="sparse").merge_data()
+
+        self.assertEqual(list(dense.columns), list(sparse.columns))
+        self.assertTrue(
+            any(isinstance(dtype, pd.SparseDtype) for dtype in sparse.dtypes)
+        )
+        np.testing.assert_array_equal(
+            dense.drop(columns=["name"]).values.astype(float),
+            sparse.drop(columns=["name"]).values.astype(float),
+        )
+
+    def test_sparse_columns_stay_sparse(self):
+        dense = DataPrep(*self.csvs)
+        sparse = DataPrep(*self.csvs, encoding="sparse")
+        features, _ = sparse.merge_data()
+        one_hot = [
+            col
+            for col, dtype in features.dtypes.items()
+            if isinstance(dtype, pd.SparseDtype)
+        ]
+        self.assertIn("forward", one_hot)
+        self.assertIn("opponent_fc_dallas", one_hot)
+        for col in one_hot:
+            self.assertEqual(features[col].dtype, pd.SparseDtype(np.uint8, 0))
+
+        matrix = sparse.get_matrix_for_predictions(2)
+        for col in one_hot:
+            self.assertEqual(matrix[col].dtype, pd.SparseDtype(np.float64, 0))
+        self.assertEqual(set(matrix.dtypes.drop(one_hot).astype(str)), {"float64"})
+        np.testing.assert_array_equal(
+            matrix.to_numpy(dtype=float),
+            dense.get_matrix_for_predictions(2).to_numpy(dtype=float),
+        )
+
+    def test_vocabulary_fixes_columns(self):
+        first, _ = DataPrep(*self.csvs, vocabulary=self.vocabulary).merge_data()
+        with open(self.vocabulary) as f:
+            saved = json.load(f)
+        self.assertEqual(saved["position"], ["D", "F", "G"])
+        self.assertEqual(saved["home_away"], ["@", "vs"])
+
+        # a week with the rows in another order and a team not seen before
+        season = SEASON_CSV.splitlines()
+        season = "\n".join(season[:1] + season[:0:-1]).replace(
+            "FC Dallas", "Toronto FC"
+        )
+        later = write_csvs(
+            self.tmp.name, META_CSV, TOP_CSV, season + "\n", prefix="later_"
+        )
+        second, _ = DataPrep(*later, vocabulary=self.vocabulary).merge_data()
+
+        self.assertEqual(list(first.columns), list(second.columns))
+        self.assertNotIn("opponent_toronto_fc", second.columns)
+        rd_2 = second[second["rd"] == 2]
+        self.assertEqual(rd_2["opponent_fc_dallas"].sum(), 0)
+
+
+class TestCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        # player 1 has two games in round 2
+        season = SEASON_CSV + "1,A. Keeper,LA Galaxy,2,vs,D.C. United,3,90,-,-\n"
+        self.csvs = write_csvs(self.tmp.name, META_CSV, TOP_CSV, season)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_cache_misses_when_a_file_changes(self):
+        prep = DataPrep(*self.csvs)
+        first, _ = prep.merge_data()
+        self.assertIs(prep._merged_data(), prep._merged_data())
+        self.assertEqual(prep.get_player_names()[3], "C. Striker")
+
+        with open(self.csvs[0], "w") as f:
+            f.write(META_CSV.replace("9.0", "11.0").replace("C. Striker", "C. Forward"))
+        second, _ = prep.merge_data()
+        self.assertEqual(first["salary"].max(), 9.0)
+        self.assertEqual(second["salary"].max(), 11.0)
+        self.assertEqual(prep.get_player_names()[3], "C. Forward")
+
+        cached = prep._merged_data()
+        prep.refresh()
+        self.assertIsNot(prep._merged_data(), cached)
+
+    def test_predictions_match_row_filtering(self):
+        prep = DataPrep(*self.csvs)
+        by_player = prep.get_data_for_predictions(2)
+
+        features, _ = prep.merge_data()
+        features = features[features["rd"] == 2].drop(columns=["name", "rd"])
+        self.assertEqual(sorted(by_player), sorted(features["id"].unique()))
+        for player_id, data in by_player.items():
+            rows = features[features["id"] == player_id].drop(columns=["id"]).values
+            np.testing.assert_array_equal(data["vector"], rows)
+            self.assertEqual(data["salary"], rows[0][0])
+        self.assertEqual(len(by_player[1]["vector"]), 2)
+        self.assertEqual(by_player[1]["team"], "la_galaxy")
+
+        matrix = prep.get_matrix_for_predictions(2)
+        self.assertEqual(matrix.index.tolist(), sorted(by_player))
+        np.testing.assert_array_equal(
+            matrix.values, np.vstack([by_player[i]["vector"][0] for i in matrix.index])
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../src"))
+
+from dataprep import DataPrep
+from feature_schema import FeatureSchema, schema_path
+from data_fixtures import write_csvs
+
+
+class TestFeatureSchema(unittest.TestCase):
+    def setUp(self):
+        self.schema = FeatureSchema(
+            ["salary", "goalie", "defense", "la_galaxy"],
+            ["float64", "float64", "float64", "float64"],
+            {"position": ["D", "G"]},
+        )
+        self.features = pd.DataFrame(
+            {
+                "defense": [1.0, 0.0],
+                "fc_dallas": [0.0, 1.0],
+                "goalie": [0.0, 1.0],
+                "salary": [6.5, 5.0],
+            },
+            index=[2, 1],
+        )
+
+    def test_align_reorders_and_fills_missing(self):
+        aligned = self.schema.align(self.features)
+        np.testing.assert_array_equal(
+            aligned, [[6.5, 0.0, 1.0, 0.0], [5.0, 1.0, 0.0, 0.0]]
+        )
+
+    def test_align_reuses_out(self):
+        out = np.full((5, 4), 9.0)
+        aligned = self.schema.align(self.features, out)
+        self.assertTrue(np.shares_memory(aligned, out))
+        self.assertEqual(aligned.shape, (2, 4))
+        np.testing.assert_array_equal(aligned, self.schema.align(self.features))
+
+        too_small = np.zeros((1, 4))
+        self.assertFalse(
+            np.shares_memory(self.schema.align(self.features, too_small), too_small)
+        )
+
+    def test_align_rejects_non_numeric_columns(self):
+        features = self.features.assign(goalie=["no", "yes"])
+        with self.assertRaisesRegex(ValueError, "'goalie' is object, was float64"):
+            self.schema.align(features)
+        # columns that aren't in the schema are left out, whatever their type
+        aligned = self.schema.align(self.features.assign(fc_dallas=["x", "y"]))
+        np.testing.assert_array_equal(aligned, self.schema.align(self.features))
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            filepath = schema_path(os.path.join(tmp, "model.pt"))
+            self.schema.save(filepath)
+            loaded = FeatureSchema.load(filepath)
+            self.assertEqual(loaded.to_dict(), self.schema.to_dict())
+
+            with open(filepath) as f:
+                saved = json.load(f)
+            saved["columns"].reverse()
+            with open(filepath, "w") as f:
+                json.dump(saved, f)
+            with self.assertRaises(AssertionError):
+                FeatureSchema.load(filepath)
+
+    def test_dataprep_schema_matches_prediction_columns(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            dataprepped = DataPrep(*write_csvs(tmp))
+            filepath = dataprepped.save_feature_schema(os.path.join(tmp, "model.pt"))
+
+            schema = FeatureSchema.load(filepath)
+            matrix = dataprepped.get_matrix_for_predictions(2)
+            self.assertEqual(schema.columns, matrix.columns.tolist())
+            np.testing.assert_array_equal(schema.align(matrix), matrix.values)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,178 @@
+import os
+import sys
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../src"))
+
+import player_ids as pi
+from selenium.common.exceptions import TimeoutException
+
+
+def roster_page(players):
+    """Html standing in for the stats center table, with a link for each
+    (id, name), followed by the six stats the name is split from.
+    """
+    links = "".join(
+        f'<tr><td><a class="player-name js-player-modal" data-player_id="{pid}">'
+        f"\n{name} M $8.5m 12 4.0 30 2%</a></td></tr>"
+        for pid, name in players
+    )
+    return f"<html><body><table>{links}</table></body></html>"
+
+
+ROSTER = [
+    ["101", "A. Keeper", "Seattle Sounders FC"],
+    ["102", "B. Back", "LA Galaxy"],
+    ["103", "C. Mid", "Toronto FC"],
+]
+
+
+class TestRoster(unittest.TestCase):
+    def test_parse_roster_page(self):
+        html = roster_page([("101", "A. Keeper"), ("107", "G. de la Cruz")])
+        self.assertEqual(
+            pi.parse_roster_page(html, "Seattle Sounders FC"),
+            [
+                ["101", "A. Keeper", "Seattle Sounders FC"],
+                ["107", "G. de la Cruz", "Seattle Sounders FC"],
+            ],
+        )
+
+    def test_roster_dict(self):
+        self.assertEqual(pi.roster_dict(ROSTER)["102"], ["B. Back", "LA Galaxy"])
+
+    def test_diff_rosters(self):
+        new = [
+            ["103", "C. Mid", "FC Dallas"],
+            ["101", "A. Keeper", "Seattle Sounders FC"],
+            ["104", "D. Striker", "FC Dallas"],
+        ]
+        change = pi.diff_rosters(ROSTER, new)
+        self.assertEqual(change.added, [["104", "D. Striker", "FC Dallas"]])
+        self.assertEqual(change.removed, [["102", "B. Back", "LA Galaxy"]])
+        self.assertEqual(
+            change.transferred, [["103", "C. Mid", "Toronto FC", "FC Dallas"]]
+        )
+        self.assertEqual(
+            change.players,
+            [["104", "D. Striker", "FC Dallas"], ["103", "C. Mid", "FC Dallas"]],
+        )
+        self.assertEqual(pi.diff_rosters(ROSTER, ROSTER), ([], [], []))
+
+
+class SquadsDriver:
+    """Stands in for the stats center, where the table of players is only
+    redrawn for the team selected after lag more reads of the page.
+    """
+
+    def __init__(self, squads, shown, lag):
+        self.squads, self.shown, self.lag = squads, shown, lag
+        self.pending, self.reads = None, 0
+
+    def select(self, team):
+        self.pending, self.reads = team, 0
+
+    @property
+    def page_source(self):
+        if self.pending is not None and self.reads >= self.lag:
+            self.shown, self.pending = self.pending, None
+        self.reads += 1
+        return roster_page(self.squads[self.shown])
+
+    def find_elements_by_css_selector(self, css_selector):
+        return [css_selector]
+
+    def find_element_by_id(self, element_id):
+        return self
+
+
+class FakeSelect:
+    def __init__(self, driver):
+        self.driver = driver
+        self.first_selected_option = SimpleNamespace(text=driver.shown)
+
+    def select_by_visible_text(self, text):
+        self.driver.select(text)
+
+
+class TestCrawlRosters(unittest.TestCase):
+    teams = {1: "LA Galaxy", 2: "Seattle Sounders FC", 3: "Toronto FC"}
+    squads = {
+        "All": [("101", "A. Keeper"), ("102", "B. Back"), ("103", "C. Mid")],
+        "LA Galaxy": [("102", "B. Back")],
+        "Seattle Sounders FC": [("101", "A. Keeper")],
+        "Toronto FC": [("103", "C. Mid")],
+    }
+
+    def crawl(self, driver, timeout=1):
+        with mock.patch.object(pi, "Select", FakeSelect):
+            return pi.crawl_rosters(driver, self.teams, timeout=timeout)
+
+    def test_waits_for_each_squad(self):
+        for shown in ["All", "LA Galaxy"]:
+            driver = SquadsDriver(self.squads, shown, lag=3)
+            self.assertEqual(
+                sorted(self.crawl(driver)),
+                [
+                    ["101", "A. Keeper", "Seattle Sounders FC"],
+                    ["102", "B. Back", "LA Galaxy"],
+                    ["103", "C. Mid", "Toronto FC"],
+                ],
+            )
+
+    def test_table_not_redrawn_raises(self):
+        driver = SquadsDriver(self.squads, "All", lag=10**6)
+        with self.assertRaises(TimeoutException):
+            self.crawl(driver, timeout=0.05)
+
+
+class TestRosterCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.filepath = os.path.join(self.directory.name, "roster.json")
+        self.crawls = []
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def crawl(self, roster):
+        def crawl_rosters(web_driver):
+            self.crawls.append(web_driver)
+            return roster
+
+        return crawl_rosters
+
+    def test_first_crawl_adds_everyone(self):
+        cache = pi.RosterCache(self.filepath)
+        roster, change = cache.refresh("driver", crawl=self.crawl(ROSTER))
+        self.assertEqual(roster, ROSTER)
+        self.assertEqual(change.added, ROSTER)
+        self.assertEqual(cache.load()["roster"], ROSTER)
+
+    def test_fresh_roster_is_not_crawled_again(self):
+        cache = pi.RosterCache(self.filepath, ttl=60)
+        cache.refresh("driver", crawl=self.crawl(ROSTER))
+        roster, change = cache.refresh("driver", crawl=self.crawl(ROSTER[:1]))
+        self.assertEqual(len(self.crawls), 1)
+        self.assertEqual((roster, change), (ROSTER, ([], [], [])))
+
+        roster, change = cache.refresh(
+            "driver", force=True, crawl=self.crawl(ROSTER[:1])
+        )
+        self.assertEqual(len(self.crawls), 2)
+        self.assertEqual(roster, ROSTER[:1])
+        self.assertEqual(change.removed, ROSTER[1:])
+
+    def test_stale_roster_is_crawled_again(self):
+        cache = pi.RosterCache(self.filepath, ttl=0)
+        cache.refresh("driver", crawl=self.crawl(ROSTER))
+        _, change = cache.refresh("driver", crawl=self.crawl(ROSTER[1:]))
+        self.assertEqual(len(self.crawls), 2)
+        self.assertEqual(change.removed, ROSTER[:1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -636,3 +636,70 @@ class TestScoring(unittest.TestCase):
         self.assertNotEqual(self.f2.was_fouled(), 5)
         self.assertEqual(self.f3.was_fouled(), 0)
         self.assertNotEqual(self.f3.was_fouled(), 6)
+
+
+class TestBatchScoring(unittest.TestCase):
+    def setUp(self):
+        self.stats = np.array(
+            [
+                GOALIE1, GOALIE2, GOALIE3, GOALIE4,
+                DEFENDER1, DEFENDER2, DEFENDER3, DEFENDER4,
+                MIDFIELD1, MIDFIELD2, MIDFIELD3, MIDFIELD4,
+                FORWARD1, FORWARD2, FORWARD3,
+            ]
+        )
+        self.positions = ["goalie"] * 4 + ["defense"] * 4 + ["midfield"] * 4 + [
+            "forward"
+        ] * 3
+        self.classes = {
+            "goalie": sc.GoalieOrDefender,
+            "defense": sc.GoalieOrDefender,
+            "midfield": sc.Midfielder,
+            "forward": sc.Forward,
+        }
+
+    def expected_scores(self, stats, positions):
+        return np.array(
+            [
+                self.classes[position](*row).score()
+                for row, position in zip(stats, positions)
+            ]
+        )
+
+    def test_score_batch_matches_score(self):
+        np.testing.assert_array_equal(
+            sc.score_batch(self.stats, self.positions),
+            self.expected_scores(self.stats, self.positions),
+        )
+
+    def test_score_batch_every_position(self):
+        # score every stat line as every position, using integer codes
+        for code, position in enumerate(sc.POSITIONS):
+            np.testing.assert_array_equal(
+                sc.score_batch(self.stats, [code] * len(self.stats)),
+                self.expected_scores(self.stats, [position] * len(self.stats)),
+            )
+
+    def test_score_batch_model_outputs(self):
+        # model predictions are floats, and can be negative
+        rng = np.random.default_rng(7)
+        stats = rng.normal(3, 4, size=(500, 25))
+        stats[:, 0] = rng.uniform(-10, 100, size=500)
+        stats[:, 13] = rng.uniform(-10, 150, size=500)
+        positions = rng.choice(sc.POSITIONS, size=500)
+        np.testing.assert_allclose(
+            sc.score_batch(stats, positions),
+            self.expected_scores(stats, positions),
+        )
+
+    def test_score_batch_shape(self):
+        with self.assertRaises(ValueError):
+            sc.score_batch(self.stats[:, :24], self.positions)
+
+    def test_score_batch_bad_positions(self):
+        codes = np.zeros(len(self.stats), dtype=int)
+        codes[0] = len(sc.POSITIONS)
+        with self.assertRaises(ValueError):
+            sc.score_batch(self.stats, codes)
+        with self.assertRaises(ValueError):
+            sc.score_batch(self.stats, ["striker"] * len(self.stats))
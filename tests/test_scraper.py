@@ -0,0 +1,800 @@
+import csv
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import unittest
+import urllib.error
+import urllib.request
+from unittest import mock
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../src"))
+
+import data_sources as ds
+import page_waits as pw
+from page_extract import PROFILE_CLASSES, extract_regions
+from page_cache import PageCache
+import player_data_scraper as pds
+from player_quirks import QuirkRegistry, find_player_ids
+from bs4 import BeautifulSoup
+
+PLAYERS = [
+    ["101", "A. Keeper", "Seattle Sounders FC"],
+    ["102", "B. Back", "LA Galaxy"],
+    ["103", "C. Mid", "Toronto FC"],
+    ["104", "D. Striker", "FC Dallas"],
+    ["105", "E. Winger", "D.C. United"],
+    ["106", "F. Missing", "Orlando City SC"],
+]
+
+POSITIONS = {
+    "101": "Goalkeeper",
+    "102": "Defender",
+    "103": "Midfielder",
+    "104": "Forward",
+    "105": "Midfielder",
+}
+
+TOP_LABELS = [
+    "GAMES PLAYED",
+    "AVG FANTASY PTS",
+    "TOTAL FANTASY PTS",
+    "LAST WK FANTASY PTS",
+    "3 WK AVG",
+    "5 WK AVG",
+    "HIGH SCORE",
+    "LOW SCORE",
+    "OWNED BY",
+    "$/POINT",
+    "RD 2 RANK",
+    "SEASON RANK",
+]
+
+STAT_LABELS = pds.SEASON_STATS_COLUMNS.split(",")[7:]
+
+
+def div(css_class, tokens):
+    return f'<div class="{css_class}">\n' + "\n".join(tokens) + "\n</div>"
+
+
+def profile_page(player_id, rounds=4):
+    """Html standing in for a saved player profile page, with the same
+    structure the scraper reads.
+    """
+    number = int(player_id)
+    info = [
+        div("row-table", [str(rd), "@" if rd % 2 else "vs", "Opponent FC", pts])
+        for rd, pts in (
+            (rd, f"-\n{rd}" if (number + rd) % 3 == 0 else str(number % 7 + rd))
+            for rd in range(1, rounds + 1)
+        )
+    ]
+    stats = [
+        div(
+            "row-table",
+            [
+                token
+                for value, label in zip(range(rd, rd + 25), STAT_LABELS)
+                for token in (str((value * number) % 90), label)
+            ],
+        )
+        for rd in range(1, rounds + 1)
+    ]
+    rows = (
+        [div("row-table", ["RD", "OPP", "PTS"])]
+        + info
+        + [div("row-table", ["TOTAL"]), div("row-table", ["STATS"])]
+        + [div("row-table", STAT_LABELS)]
+        + stats
+        + [div("row-table", ["TOTAL"])]
+    )
+    first = number % 5 + rounds
+    top = [
+        token
+        for label, value in zip(TOP_LABELS, range(first, first + 12))
+        for token in (label, str(value))
+    ]
+    meta = ["Team FC", POSITIONS[player_id], f"$ {number % 10}.5m"]
+    return (
+        "<html><body>"
+        + div("player-info-wrapper", meta)
+        + div("profile-top-stats", top)
+        + "".join(rows)
+        + "</body></html>"
+    )
+
+
+def player_payload(player_id, rounds=4):
+    """The JSON payload with the same data as profile_page()."""
+    number = int(player_id)
+    first = number % 5 + rounds
+    games = [
+        {
+            "round": rd,
+            "home_away": "@" if rd % 2 else "vs",
+            "opponent": "Opponent FC",
+            "points": -rd if (number + rd) % 3 == 0 else number % 7 + rd,
+            "stats": {
+                label: (value * number) % 90
+                for value, label in zip(range(rd, rd + 25), STAT_LABELS)
+            },
+        }
+        for rd in range(1, rounds + 1)
+    ]
+    return {
+        "position": POSITIONS[player_id][0],
+        "salary": number % 10 + 0.5,
+        "stats": dict(zip(ds.TOP_STATS_KEYS, range(first, first + 12))),
+        "games": games,
+    }
+
+
+class ProfileHandler(BaseHTTPRequestHandler):
+    # the number of rounds played so far
+    rounds = 4
+    # the number of times each player's page fails to load before it works
+    failures = {}
+    # the cookies sent with the last request for a payload
+    cookies = None
+
+    @classmethod
+    def reset(cls):
+        cls.rounds = 4
+        cls.failures = {}
+        cls.cookies = None
+
+    def do_GET(self):
+        if self.path.startswith("/api/"):
+            return self.send_payload()
+
+        player_id = self.path.rstrip("/").split("/")[-1]
+        failing = self.failures.get(player_id, 0) > 0
+        if failing:
+            self.failures[player_id] -= 1
+        if player_id in POSITIONS and not failing:
+            body = profile_page(player_id, self.rounds).encode()
+            self.send_response(200)
+        else:
+            body = b"<html><body>loading</body></html>"
+            self.send_response(404)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_payload(self):
+        ProfileHandler.cookies = self.headers.get("Cookie")
+        player_id = self.path.split("/")[-1].split(".")[0]
+        if player_id in POSITIONS:
+            body = json.dumps(player_payload(player_id, self.rounds)).encode()
+            self.send_response(200)
+        else:
+            body = b"{}"
+            self.send_response(404)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class LocalDriver:
+    """Stands in for a selenium driver, loading pages over http. Links to the
+    site are sent to page_link instead.
+    """
+
+    def __init__(self, page_link=None):
+        self.page_source = ""
+        self.closed = False
+        self.page_link = page_link
+        self.visited = []
+
+    def get(self, url):
+        if self.page_link:
+            url = url.replace(pds.PLAYER_PROFILE_URL, self.page_link)
+        self.visited.append(url.split("/")[-1])
+        try:
+            with urllib.request.urlopen(url) as response:
+                self.page_source = response.read().decode()
+        except urllib.error.HTTPError as error:
+            self.page_source = error.read().decode()
+
+    def find_elements_by_css_selector(self, css_selector):
+        return BeautifulSoup(self.page_source, "html.parser").select(css_selector)
+
+    def get_cookies(self):
+        return [{"name": "session", "value": "abc123", "path": "/"}]
+
+    def quit(self):
+        self.closed = True
+
+
+class StaleDriver(LocalDriver):
+    """A driver whose page is never replaced, as when the site stops
+    responding after the first player's page.
+    """
+
+    def get(self, url):
+        self.visited.append(url.split("/")[-1])
+
+
+class ProfileServerTestCase(unittest.TestCase):
+    """Serves the profile pages and payloads of PLAYERS over http for the
+    tests of the class, with the state of ProfileHandler reset for each test.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), ProfileHandler)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        port = cls.server.server_port
+        cls.page_link = f"http://127.0.0.1:{port}/player-profile/"
+        cls.player_url = f"http://127.0.0.1:{port}/api/players/{{player_id}}.json"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        ProfileHandler.reset()
+
+
+class TestParsePlayerPage(unittest.TestCase):
+    def test_parse_player_page(self):
+        meta, top, weekly = pds.parse_player_page(profile_page("103"), PLAYERS[2], 2, 3)
+        self.assertEqual(meta, ["103", "C. Mid", "Toronto FC", "M", 3.5])
+        self.assertEqual(top[:5], ["103", "C. Mid", "Toronto FC", "GAMES PLAYED", "7"])
+        self.assertEqual([row[3] for row in weekly], ["2", "3"])
+        self.assertEqual(
+            [len(row) for row in weekly], [len(pds.SEASON_STATS_COLUMNS.split(","))] * 2
+        )
+        # a negative score is split by clean_data, and joined back together
+        self.assertEqual(weekly[0][6], "-2")
+
+    def test_parse_player_page_not_loaded(self):
+        with self.assertRaises(IndexError):
+            pds.parse_player_page("<html></html>", PLAYERS[0], 1, 4)
+
+
+class TestScrapePool(ProfileServerTestCase):
+    def test_pool_matches_serial_parse(self):
+        drivers = []
+
+        def driver_factory():
+            drivers.append(LocalDriver())
+            return drivers[-1]
+
+        meta, top, weekly, timeout_list = pds.scrape_player_data_pooled(
+            driver_factory,
+            PLAYERS,
+            1,
+            4,
+            workers=3,
+            timeout=0.2,
+            page_link=self.page_link,
+        )
+
+        expected = [
+            pds.parse_player_page(profile_page(player[0]), player, 1, 4)
+            for player in PLAYERS[:5]
+        ]
+        self.assertEqual(meta, [row[0] for row in expected])
+        self.assertEqual(top, [row[1] for row in expected])
+        self.assertEqual(weekly, [week for row in expected for week in row[2]])
+        self.assertEqual(timeout_list, [PLAYERS[5]])
+        self.assertEqual(len(drivers), 3)
+        self.assertTrue(all(driver.closed for driver in drivers))
+
+    def test_stale_page_is_not_returned(self):
+        driver = StaleDriver()
+        driver.page_source = profile_page("101")
+        with self.assertRaises(IndexError):
+            pds.load_player_page(driver, PLAYERS[1], timeout=0.05)
+
+        meta, top, weekly, timeout_list = pds.scrape_player_data(
+            driver, PLAYERS[1:3], 1, 4, timeout=0.05
+        )
+        self.assertEqual((meta, top, weekly), ([], [], []))
+        self.assertEqual(timeout_list, PLAYERS[1:3])
+
+    def test_pool_survives_a_failed_login(self):
+        logins = []
+
+        def driver_factory():
+            logins.append(None)
+            if len(logins) == 1:
+                raise OSError("login failed")
+            return LocalDriver()
+
+        meta, _, _, timeout_list = pds.scrape_player_data_pooled(
+            driver_factory,
+            PLAYERS,
+            1,
+            4,
+            workers=2,
+            timeout=0.2,
+            page_link=self.page_link,
+        )
+        self.assertEqual([row[0] for row in meta], [p[0] for p in PLAYERS[:5]])
+        self.assertEqual(timeout_list, [PLAYERS[5]])
+
+    def test_pool_raises_when_no_driver_logs_in(self):
+        def driver_factory():
+            raise OSError("login failed")
+
+        with self.assertRaises(OSError):
+            pds.scrape_player_data_pooled(
+                driver_factory, PLAYERS, 1, 4, workers=2, page_link=self.page_link
+            )
+
+    def test_pool_raises_parser_errors(self):
+        def broken_parser(html, player, week_first, week_last):
+            raise KeyError("salary")
+
+        with mock.patch.object(pds, "parse_player_page", broken_parser):
+            with self.assertRaises(KeyError):
+                pds.scrape_player_data_pooled(
+                    LocalDriver,
+                    PLAYERS,
+                    1,
+                    4,
+                    workers=2,
+                    timeout=0.2,
+                    page_link=self.page_link,
+                )
+
+
+class TestIncrementalScrape(ProfileServerTestCase):
+    def test_incremental_scrape(self):
+        driver = LocalDriver(self.page_link)
+        with tempfile.TemporaryDirectory() as directory:
+            state_filepath = os.path.join(directory, "state.json")
+            season_filepath = os.path.join(directory, "season.csv")
+
+            ProfileHandler.rounds = 2
+            pds.cycle_player_ids_incremental(
+                driver, PLAYERS[:5], 2, state_filepath, season_filepath
+            )
+            # nothing new to scrape
+            driver.visited = []
+            _, _, weekly = pds.cycle_player_ids_incremental(
+                driver, PLAYERS[:5], 2, state_filepath, season_filepath
+            )
+            self.assertEqual((driver.visited, weekly), ([], []))
+
+            ProfileHandler.rounds = 4
+            _, top, weekly = pds.cycle_player_ids_incremental(
+                driver, PLAYERS[:5], 4, state_filepath, season_filepath
+            )
+            self.assertEqual(len(driver.visited), 5)
+            self.assertEqual(sorted(set(row[3] for row in weekly)), ["3", "4"])
+            self.assertEqual(len(top[0]), len(pds.TOP_STATS_COLUMNS.split(",")))
+
+            with open(season_filepath) as f:
+                rows = list(csv.reader(f))
+
+        _, _, expected = pds.scrape_player_data_pooled(
+            LocalDriver, PLAYERS[:5], 1, 4, timeout=0.2, page_link=self.page_link
+        )[:3]
+        self.assertEqual(rows[0], pds.SEASON_STATS_COLUMNS.split(","))
+        self.assertEqual(
+            sorted(rows[1:]), sorted([[str(v) for v in row] for row in expected])
+        )
+
+    def test_incremental_scrape_waits_for_games_played(self):
+        with tempfile.TemporaryDirectory() as directory:
+            state_filepath = os.path.join(directory, "state.json")
+            season_filepath = os.path.join(directory, "season.csv")
+            source = ds.FixtureDataSource(directory)
+
+            def scrape(rounds, games_played):
+                for player in PLAYERS[:5]:
+                    payload = player_payload(player[0], rounds)
+                    payload["stats"]["games_played"] = games_played
+                    with open(os.path.join(directory, f"{player[0]}.json"), "w") as f:
+                        json.dump(payload, f)
+                dead_letters = []
+                _, _, weekly = pds.cycle_player_ids_incremental(
+                    None,
+                    PLAYERS,
+                    rounds,
+                    state_filepath,
+                    season_filepath,
+                    max_attempts=1,
+                    dead_letters=dead_letters,
+                    source=source,
+                )
+                # the missing player is given up on, rather than retried forever
+                self.assertEqual(
+                    [letter.player for letter in dead_letters], [PLAYERS[5]]
+                )
+                return sorted(set(row[3] for row in weekly))
+
+            self.assertEqual(scrape(2, 2), ["1", "2"])
+            # round 3 was played without the players
+            self.assertEqual(scrape(3, 2), [])
+            self.assertEqual(scrape(4, 3), ["3", "4"])
+
+            with open(season_filepath) as f:
+                self.assertEqual(len(list(csv.reader(f))), 1 + 5 * 4)
+
+
+class TestRetries(ProfileServerTestCase):
+    def test_retries_mixed_with_fresh_work(self):
+        ProfileHandler.failures = {"103": 1}
+        driver = LocalDriver(self.page_link)
+        meta, top, weekly, dead = pds.scrape_with_retries(
+            driver, PLAYERS, 1, 4, max_attempts=3, base_delay=0, timeout=0.2
+        )
+
+        expected = [
+            pds.parse_player_page(profile_page(player[0]), player, 1, 4)
+            for player in PLAYERS[:5]
+        ]
+        self.assertEqual(meta, [row[0] for row in expected])
+        self.assertEqual(weekly, [week for row in expected for week in row[2]])
+        # the retry of 103 is due straight away, so it comes before 104
+        self.assertEqual(
+            driver.visited, ["101", "102", "103", "103", "104", "105"] + ["106"] * 3
+        )
+        self.assertEqual(len(dead), 1)
+        self.assertEqual(dead[0].player, PLAYERS[5])
+        self.assertEqual(dead[0].attempts, 3)
+        self.assertIn("did not load", dead[0].reason)
+
+    def test_parser_errors_are_not_retried(self):
+        def broken_parser(html, player, week_first, week_last):
+            raise KeyError("salary")
+
+        quirks = QuirkRegistry()
+        quirks.override("102", "salary is wrong", broken_parser)
+        driver = LocalDriver(self.page_link)
+        with self.assertRaises(KeyError):
+            pds.scrape_with_retries(
+                driver, PLAYERS, 1, 4, base_delay=0, timeout=0.2, quirks=quirks
+            )
+        self.assertEqual(driver.visited, ["101", "102"])
+
+    def test_retries_end_at_time_budget(self):
+        driver = LocalDriver(self.page_link)
+        dead_letters = []
+        meta, _, _ = pds.cycle_all_player_ids(
+            driver,
+            PLAYERS[4:],
+            1,
+            4,
+            time_budget=0.5,
+            dead_letters=dead_letters,
+            timeout=0.2,
+        )
+        self.assertEqual(len(meta), 1)
+        self.assertEqual([letter.player for letter in dead_letters], [PLAYERS[5]])
+        self.assertIn("out of time", dead_letters[0].reason)
+
+    def test_retry_delay(self):
+        rng = random.Random(1)
+        delays = [pds.retry_delay(attempt, 1, 5, rng) for attempt in range(1, 7)]
+        for attempt, delay in enumerate(delays, 1):
+            self.assertLessEqual(0, delay)
+            self.assertLessEqual(delay, min(5, 2 ** (attempt - 1)))
+
+
+class TestDataSources(ProfileServerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.TemporaryDirectory()
+        for player_id in POSITIONS:
+            with open(os.path.join(self.directory.name, f"{player_id}.json"), "w") as f:
+                json.dump(player_payload(player_id), f)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_payload_rows_match_page_rows(self):
+        for player in PLAYERS[:5]:
+            self.assertEqual(
+                ds.parse_player_payload(player_payload(player[0]), player, 2, 3),
+                pds.parse_player_page(profile_page(player[0]), player, 2, 3),
+            )
+
+    def test_payload_missing_key_is_a_clear_error(self):
+        player = PLAYERS[0]
+        payload = player_payload(player[0])
+        del payload["salary"]
+        source = ds.JsonDataSource(self.player_url)
+        source.fetch = lambda player_id: payload
+        with self.assertRaisesRegex(ValueError, "player 101 .*'salary'"):
+            source.player_data(player, 1, 4)
+
+        payload = player_payload(player[0])
+        del payload["games"][0]["round"]
+        with self.assertRaisesRegex(ValueError, "'round'"):
+            ds.parse_player_payload(payload, player, 1, 4)
+        source.close()
+
+    def test_fixture_source_matches_browser(self):
+        source = ds.FixtureDataSource(self.directory.name)
+        meta, top, weekly, dead = pds.scrape_with_retries(
+            None, PLAYERS, 1, 4, max_attempts=2, base_delay=0, source=source
+        )
+        expected = pds.scrape_with_retries(
+            LocalDriver(self.page_link), PLAYERS, 1, 4, max_attempts=1, timeout=0.2
+        )
+        self.assertEqual((meta, top, weekly), expected[:3])
+        self.assertEqual([letter.player for letter in dead], [PLAYERS[5]])
+        self.assertEqual(dead[0].attempts, 2)
+        self.assertIn("FileNotFoundError", dead[0].reason)
+
+    def test_json_source_uses_driver_cookies(self):
+        source = ds.JsonDataSource.from_driver(
+            LocalDriver(), self.player_url, timeout=1
+        )
+        meta, top, weekly = pds.cycle_all_player_ids(
+            None, PLAYERS[:5], 1, 4, max_attempts=1, source=source
+        )
+        source.close()
+        self.assertEqual(ProfileHandler.cookies, "session=abc123")
+
+        expected = pds.cycle_all_player_ids(
+            LocalDriver(self.page_link), PLAYERS[:5], 1, 4, timeout=0.2
+        )
+        self.assertEqual((meta, top, weekly), expected)
+        self.assertEqual(len(top[0]), len(pds.TOP_STATS_COLUMNS.split(",")))
+
+    def test_data_source_is_abstract(self):
+        with self.assertRaises(TypeError):
+            ds.DataSource()
+
+    def test_shared_session_is_mounted_once(self):
+        source = ds.JsonDataSource(self.player_url, pool_size=4)
+        adapter = source.session.get_adapter(self.player_url)
+        shared = ds.JsonDataSource(self.player_url, session=source.session)
+        self.assertIs(shared.session.get_adapter(self.player_url), adapter)
+        source.close()
+
+    def test_scrapers_use_source(self):
+        source = ds.FixtureDataSource(self.directory.name)
+        expected = pds.scrape_player_data(
+            LocalDriver(self.page_link), PLAYERS, 1, 4, timeout=0.2
+        )
+        self.assertEqual(
+            pds.scrape_player_data(None, PLAYERS, 1, 4, source=source), expected
+        )
+
+        def driver_factory():
+            raise AssertionError("the pool doesn't need drivers with a source")
+
+        self.assertEqual(
+            pds.scrape_player_data_pooled(
+                driver_factory, PLAYERS, 1, 4, workers=2, source=source
+            ),
+            expected,
+        )
+
+    def test_save_payloads(self):
+        source = ds.JsonDataSource(self.player_url, timeout=1)
+        with tempfile.TemporaryDirectory() as directory:
+            ds.save_payloads(source, PLAYERS[:2], directory)
+            fixtures = ds.FixtureDataSource(directory)
+            self.assertEqual(
+                fixtures.player_data(PLAYERS[1], 1, 4),
+                source.player_data(PLAYERS[1], 1, 4),
+            )
+        source.close()
+
+
+def parse_without_salary(html, player, week_first, week_last):
+    meta, top, weekly = pds.parse_player_page(html, player, week_first, week_last)
+    return meta[:4] + [0.0], top, weekly
+
+
+class TestQuirks(ProfileServerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.quirks = QuirkRegistry()
+        self.quirks.exclude("106", "page never loads")
+        self.quirks.override("103", "salary is wrong", parse_without_salary)
+
+    def test_skipped_and_patched(self):
+        driver = LocalDriver(self.page_link)
+        meta, _, weekly, dead = pds.scrape_with_retries(
+            driver, PLAYERS, 1, 4, quirks=self.quirks, timeout=0.2
+        )
+        self.assertEqual(dead, [])
+        self.assertNotIn("106", driver.visited)
+        self.assertEqual([row[0] for row in meta], ["101", "102", "103", "104", "105"])
+        self.assertEqual(meta[2][4], 0.0)
+        self.assertEqual(
+            self.quirks.report(),
+            [
+                "patched C. Mid (103): salary is wrong",
+                "skipped F. Missing (106): page never loads",
+            ],
+        )
+
+    def test_every_scraper_checks_quirks(self):
+        expected = pds.scrape_with_retries(
+            LocalDriver(self.page_link), PLAYERS, 1, 4, quirks=self.quirks, timeout=0.2
+        )[:3]
+
+        driver = LocalDriver(self.page_link)
+        meta, top, weekly, timeout_list = pds.scrape_player_data(
+            driver, PLAYERS, 1, 4, timeout=0.2, quirks=self.quirks
+        )
+        self.assertEqual((meta, top, weekly), expected)
+        self.assertEqual(timeout_list, [])
+        self.assertNotIn("106", driver.visited)
+
+        meta, top, weekly, timeout_list = pds.scrape_player_data_pooled(
+            LocalDriver,
+            PLAYERS,
+            1,
+            4,
+            workers=2,
+            timeout=0.2,
+            page_link=self.page_link,
+            quirks=self.quirks,
+        )
+        self.assertEqual((meta, top, weekly), expected)
+        self.assertEqual(timeout_list, [])
+        self.assertEqual(meta[2][4], 0.0)
+
+    def test_incremental_scrape_skips(self):
+        driver = LocalDriver(self.page_link)
+        with tempfile.TemporaryDirectory() as directory:
+            meta, _, _ = pds.cycle_player_ids_incremental(
+                driver,
+                PLAYERS,
+                4,
+                os.path.join(directory, "state.json"),
+                os.path.join(directory, "season.csv"),
+                quirks=self.quirks,
+            )
+        self.assertEqual(len(meta), 5)
+        self.assertNotIn("106", driver.visited)
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filepath = os.path.join(directory, "quirks.json")
+            with self.assertRaises(AssertionError):
+                self.quirks.save(filepath)
+
+            self.quirks.override(
+                "103", "salary is wrong", parse_without_salary, "no_salary"
+            )
+            self.quirks.save(filepath)
+            loaded = QuirkRegistry.load(
+                filepath, parsers={"no_salary": parse_without_salary}
+            )
+        self.assertEqual(loaded.quirks, self.quirks.quirks)
+        self.assertEqual(len(QuirkRegistry.load(filepath)), 0)
+
+    def test_find_player_ids(self):
+        players = PLAYERS + [["107", "Y. Gonzalez", "FC Dallas"]]
+        self.assertEqual(
+            find_player_ids(players, ["Y. Gonzalez", "Ibarra"]),
+            {"Y. Gonzalez": ["107"], "Ibarra": []},
+        )
+        found = self.quirks.exclude_names(players, ["Gonzalez"], "bad game log")
+        self.assertEqual(found, {"Gonzalez": ["107"]})
+        self.assertTrue(self.quirks.lookup(players[-1]).skip)
+
+
+class TestPageCache(ProfileServerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = PageCache(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_put_and_get(self):
+        first = self.cache.put("101", profile_page("101", 2), "2020-09-01T10:00:00")
+        second = self.cache.put("101", profile_page("101", 3), "2020-09-08T10:00:00")
+        # an unchanged page is stored once, and indexed for each fetch
+        self.assertEqual(
+            self.cache.put("101", profile_page("101", 3), "2020-09-09T10:00:00"), second
+        )
+
+        self.assertEqual(self.cache.get(first), profile_page("101", 2))
+        self.assertEqual(
+            [digest for _, digest in self.cache.fetches("101")], [first, second, second]
+        )
+        self.assertEqual(self.cache.latest("101"), profile_page("101", 3))
+        self.assertEqual(
+            self.cache.latest("101", "2020-09-05T00:00:00"), profile_page("101", 2)
+        )
+        self.assertIsNone(self.cache.latest("101", "2020-08-01T00:00:00"))
+        self.assertIsNone(self.cache.latest("102"))
+        self.assertEqual(self.cache.player_ids(), ["101"])
+
+    def test_reparse_matches_scrape(self):
+        scraped = pds.scrape_player_data_pooled(
+            LocalDriver,
+            PLAYERS,
+            1,
+            4,
+            workers=2,
+            timeout=0.2,
+            page_link=self.page_link,
+            page_cache=self.cache,
+        )
+
+        self.assertEqual(pds.reparse_cached_pages(self.cache, PLAYERS, 1, 4), scraped)
+
+
+class TestExtractRegions(unittest.TestCase):
+    def assertMatchesSoup(self, html):
+        soup = BeautifulSoup(html, "html.parser")
+        regions = extract_regions(html)
+        for css_class in PROFILE_CLASSES:
+            self.assertEqual(
+                regions[css_class],
+                [region.text for region in soup.select("div." + css_class)],
+            )
+
+    def test_profile_pages(self):
+        for player_id in POSITIONS:
+            self.assertMatchesSoup(profile_page(player_id))
+
+    def test_nested_and_inline_elements(self):
+        self.assertMatchesSoup(
+            '<div class="row-table first"><span>1</span>\n<div class="x">'
+            '<b>@</b><br><img src="a.png"/>SEA</div>\t&amp; 7</div>'
+            '<DIV CLASS="row-table"><div class="row-table">-\n2</div>\n</DIV>'
+            "<div><p>not this<div class='profile-top-stats'>GAMES\nPLAYED"
+            "<!-- a comment -->\n5</div></p></div>"
+        )
+
+    def test_self_closing_tags(self):
+        self.assertMatchesSoup(
+            '<div class="row-table"/>after<div class="row-table">1<br/>'
+            '<div class="row-table"/>2<script/>3</div><div class="profile-top-stats"/>'
+        )
+
+    def test_not_loaded(self):
+        self.assertEqual(
+            extract_regions("<html><body>loading</body></html>"),
+            {css_class: [] for css_class in PROFILE_CLASSES},
+        )
+
+
+class TestPageWaits(unittest.TestCase):
+    def test_ready_returns_immediately(self):
+        calls = []
+        self.assertEqual(pw.wait_until(lambda: calls.append(1) or "ready"), "ready")
+        self.assertEqual(len(calls), 1)
+
+    def test_polls_until_ready(self):
+        calls = []
+
+        def condition():
+            calls.append(1)
+            return len(calls) == 4
+
+        self.assertTrue(pw.wait_until(condition, timeout=5, poll=0.001))
+        self.assertEqual(len(calls), 4)
+
+    def test_times_out(self):
+        self.assertEqual(pw.wait_until(list, timeout=0.05, poll=0.01), [])
+
+    def test_wait_for_replaced_selector(self):
+        driver = LocalDriver()
+        driver.page_source = profile_page("101")
+        previous = pw.first_element(driver, "div.profile-top-stats")
+        self.assertEqual(
+            pw.wait_for_selector(driver, "div.profile-top-stats", previous, 0.05), []
+        )
+        driver.page_source = profile_page("102")
+        self.assertEqual(
+            len(pw.wait_for_selector(driver, "div.profile-top-stats", previous, 0.05)),
+            1,
+        )
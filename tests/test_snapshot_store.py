@@ -0,0 +1,95 @@
+import os
+import sys
+import tempfile
+import unittest
+
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../src"))
+
+pytest.importorskip("pyarrow")
+
+from dataprep import DataPrep
+from snapshot_store import SnapshotStore
+from data_fixtures import write_csvs
+
+
+class TestSnapshotStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.csvs = write_csvs(self.tmp.name)
+        self.root = os.path.join(self.tmp.name, "snapshots")
+        self.store = SnapshotStore(self.root)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_snapshot_is_typed(self):
+        self.store.write_csvs("2020-08-27", 2, *self.csvs)
+
+        season = self.store.read("2020-08-27", 2, "season")
+        top = self.store.read("2020-08-27", 2, "top_stats")
+        self.assertEqual(season["gf"].tolist(), [0, 0, 0, 1, 1, 2])
+        self.assertTrue(pd.api.types.is_integer_dtype(season["min"]))
+        self.assertEqual(top["$/point"].tolist(), [1607, 950, 1200])
+        self.assertEqual(top["last_wk_fantasy_pts"].tolist(), [0, 4, 9])
+
+    def test_snapshots_and_latest(self):
+        self.assertIsNone(self.store.latest())
+        self.store.write_csvs("2020-08-20", 1, *self.csvs)
+        self.store.write_csvs("2020-08-27", 2, *self.csvs)
+        self.store.write_csvs("2020-08-27", 1, *self.csvs)
+
+        self.assertEqual(
+            self.store.snapshots(),
+            [("2020-08-20", 1), ("2020-08-27", 1), ("2020-08-27", 2)],
+        )
+        self.assertEqual(self.store.latest(), ("2020-08-27", 2))
+        self.assertEqual(self.store.latest(1), ("2020-08-27", 1))
+
+    def test_projection_keeps_stored_order(self):
+        self.store.write_csvs("2020-08-27", 2, *self.csvs)
+        season = self.store.read("2020-08-27", 2, "season", ["pts", "id", "rd"])
+        self.assertEqual(season.columns.tolist(), ["id", "rd", "pts"])
+
+    def test_dataprep_from_projected_snapshot(self):
+        self.store.write_csvs("2020-08-27", 2, *self.csvs)
+        info = ["id", "name", "team", "rd", "home_away", "opponent"]
+        dataprep = DataPrep.from_snapshot(
+            self.root, columns={"season": ["gf", "pts"] + info}
+        )
+        features, targets = dataprep.season_feature_target_prep(
+            dataprep._read("season")
+        )
+        self.assertEqual(targets.columns.tolist(), ["id", "name", "rd", "pts", "gf"])
+        self.assertEqual(targets["gf"].tolist(), [0, 0, 0, 1, 1, 2])
+        self.assertEqual(targets["pts"].tolist(), [2, 4, 0, 4, 6, 9])
+
+        # the stats are found by name, whatever order the columns are in
+        season = dataprep._read("season")
+        _, reordered = dataprep.season_feature_target_prep(
+            season[["pts", "gf"] + info[::-1]]
+        )
+        pd.testing.assert_frame_equal(reordered, targets)
+
+        dataprep = DataPrep.from_snapshot(
+            self.root, columns={"season": ["pts", "gf"] + info[:-1]}
+        )
+        with self.assertRaisesRegex(ValueError, "opponent"):
+            dataprep.season_feature_target_prep(dataprep._read("season"))
+
+    def test_dataprep_from_snapshot_matches_csvs(self):
+        self.store.write_csvs("2020-08-27", 2, *self.csvs)
+        from_csvs = DataPrep(*self.csvs)
+        from_snapshot = DataPrep.from_snapshot(self.root)
+
+        for expected, loaded in zip(from_csvs.merge_data(), from_snapshot.merge_data()):
+            pd.testing.assert_frame_equal(
+                expected.reset_index(drop=True), loaded.reset_index(drop=True)
+            )
+        self.assertEqual(from_csvs.get_player_teams(), from_snapshot.get_player_teams())
+
+
+if __name__ == "__main__":
+    unittest.main()
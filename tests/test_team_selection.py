@@ -0,0 +1,318 @@
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import torch
+from sklearn.ensemble import RandomForestRegressor
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../src")
+sys.path.append(SRC)
+
+import team_selection as ts
+
+CLUBS = [
+    "atlanta_united_fc",
+    "chicago_fire_fc",
+    "colorado_rapids",
+    "columbus_crew_sc",
+    "dc_united",
+    "fc_dallas",
+    "la_galaxy",
+    "los_angeles_fc",
+]
+
+
+def make_players(n=120, seed=3):
+    """Players as returned by create_player_dict, with random salaries and
+    predicted scores.
+    """
+    rng = random.Random(seed)
+    return {
+        2000
+        + i: {
+            "salary": round(rng.uniform(4, 12), 1),
+            "team": rng.choice(CLUBS),
+            "predicted_score": round(rng.uniform(-1, 12), 2),
+            "position": ["goalie", "defense", "midfield", "forward"][i % 4],
+        }
+        for i in range(n)
+    }
+
+
+class TestTeamSelection(unittest.TestCase):
+    def setUp(self):
+        self.players = make_players()
+        self.salaries, self.points, self.teams = ts.create_lp_dicts(self.players)
+        self.players_per_team = {team: 3 for team in self.teams}
+
+    def test_create_lp_dicts(self):
+        self.assertEqual(
+            list(self.salaries), ["goalie", "defense", "midfield", "forward"]
+        )
+        self.assertEqual(self.salaries["goalie"][2000], self.players[2000]["salary"])
+        self.assertEqual(
+            self.points["defense"][2001], self.players[2001]["predicted_score"]
+        )
+        team = self.players[2002]["team"]
+        self.assertEqual(self.teams[team][2002], "midfield")
+        self.assertEqual(sum(len(v) for v in self.teams.values()), len(self.players))
+
+    def test_solve_all_formations_ranked(self):
+        results = ts.solve_all_formations(
+            self.salaries,
+            self.points,
+            self.teams,
+            self.players_per_team,
+            125,
+            workers=1,
+        )
+        self.assertEqual(len(results), len(ts.TEAM_SHAPES))
+        self.assertEqual(
+            sorted(result.formation for result in results),
+            sorted(
+                "".join(str(shape[k]) for k in ["defense", "midfield", "forward"])
+                for shape, _ in ts.TEAM_SHAPES
+            ),
+        )
+        points = [result.total_points for result in results]
+        self.assertEqual(points, sorted(points, reverse=True))
+
+        model = ts.SelectionModel(
+            self.salaries, self.points, self.teams, self.players_per_team, 125
+        )
+        best = max(
+            model.solve_with_subs(*shapes).total_points for shapes in ts.TEAM_SHAPES
+        )
+        self.assertAlmostEqual(results[0].total_points, best)
+
+    def test_resolves_match_a_fresh_model(self):
+        args = (self.salaries, self.points, self.teams, self.players_per_team, 125)
+        model = ts.SelectionModel(*args)
+        # each shape twice, so every solve follows a different shape
+        for shapes in ts.TEAM_SHAPES + ts.TEAM_SHAPES[::-1]:
+            reused = model.solve_with_subs(*shapes)
+            fresh = ts.SelectionModel(*args).solve_with_subs(*shapes)
+            self.assertEqual(reused.status, fresh.status)
+            self.assertAlmostEqual(reused.total_points, fresh.total_points)
+            self.assertEqual({k: len(v) for k, v in reused.starters.items()}, shapes[0])
+
+    def test_missing_position_is_infeasible(self):
+        players = {
+            i: player
+            for i, player in self.players.items()
+            if player["position"] != "goalie"
+        }
+        salaries, points, teams = ts.create_lp_dicts(players)
+        model = ts.SelectionModel(salaries, points, teams, self.players_per_team, 125)
+        result = model.solve_with_subs(*ts.TEAM_SHAPES[0])
+        self.assertEqual(result.status, "Infeasible")
+        self.assertEqual(result.player_ids, [])
+
+    def test_solve_all_formations_in_workers(self):
+        args = (self.salaries, self.points, self.teams, self.players_per_team, 125)
+        serial = ts.solve_all_formations(*args, workers=1)
+        pooled = ts.solve_all_formations(*args, workers=2)
+        self.assertEqual(
+            [(result.formation, round(result.total_points, 6)) for result in pooled],
+            [(result.formation, round(result.total_points, 6)) for result in serial],
+        )
+
+    def assertValidSquad(self, result, players_per_team, salary_cap=125):
+        """Check the result against the squad's constraints, from the
+        players' own positions, teams and salaries.
+        """
+        self.assertEqual(result.status, "Optimal")
+        squad = result.player_ids
+        starters = [i for v in result.starters.values() for i in v]
+        self.assertEqual(len(squad), 15)
+        self.assertEqual(len(set(squad)), 15)
+        self.assertEqual(len(starters), ts.NUM_STARTERS)
+        self.assertLessEqual(set(starters), set(squad))
+
+        for position, number in ts.SQUAD_POS_NUM_AVAILABLE.items():
+            self.assertEqual(
+                sum(self.players[i]["position"] == position for i in squad), number
+            )
+        for position, (fewest, most) in ts.STARTERS_POS_BOUNDS.items():
+            count = sum(self.players[i]["position"] == position for i in starters)
+            self.assertTrue(fewest <= count <= most, f"{count} {position} starters")
+        for team, limit in players_per_team.items():
+            self.assertLessEqual(
+                sum(self.players[i]["team"] == team for i in squad), limit
+            )
+        self.assertLessEqual(
+            sum(self.players[i]["salary"] for i in squad), salary_cap + 1e-6
+        )
+
+    def test_squad_meets_constraints(self):
+        self.assertValidSquad(
+            ts.SquadModel(
+                self.salaries, self.points, self.teams, self.players_per_team, 125
+            ).solve(),
+            self.players_per_team,
+        )
+
+        # a tighter limit per team and salary cap, so that both bind
+        tight = {team: 2 for team in self.teams}
+        self.assertValidSquad(
+            ts.SquadModel(self.salaries, self.points, self.teams, tight, 100).solve(),
+            tight,
+            100,
+        )
+
+    def test_horizon_of_one_week_matches_squad(self):
+        squad = ts.SquadModel(
+            self.salaries, self.points, self.teams, self.players_per_team, 125
+        ).solve()
+        plan = ts.HorizonModel(
+            self.salaries, [self.points], self.teams, self.players_per_team, 125
+        ).solve()
+        self.assertEqual(plan.status, "Optimal")
+        self.assertValidSquad(squad, self.players_per_team)
+        self.assertValidSquad(plan.weeks[0], self.players_per_team)
+        self.assertAlmostEqual(plan.total_points, squad.total_points)
+
+    def test_horizon_transfers(self):
+        rng = random.Random(5)
+        weekly_points = [
+            {
+                k: {i: points + rng.gauss(0, 4) for i, points in v.items()}
+                for k, v in self.points.items()
+            }
+            for _ in range(3)
+        ]
+        current = ts.SquadModel(
+            self.salaries, weekly_points[0], self.teams, self.players_per_team, 125
+        ).solve()
+        plan = ts.HorizonModel(
+            self.salaries,
+            weekly_points,
+            self.teams,
+            self.players_per_team,
+            125,
+            current_squad=current.player_ids,
+            max_transfers=2,
+        ).solve()
+
+        self.assertEqual(plan.status, "Optimal")
+        previous = set(current.player_ids)
+        for week, result in enumerate(plan.weeks):
+            squad = set(result.player_ids)
+            self.assertEqual(len(squad), 15)
+            self.assertLessEqual(result.total_salary, 125 + 1e-6)
+            self.assertEqual(sorted(squad - previous), plan.transfers_in[week])
+            self.assertLessEqual(len(plan.transfers_in[week]), 2)
+            self.assertEqual(
+                plan.transfer_costs[week],
+                ts.TRANSFER_COST * max(len(plan.transfers_in[week]) - 1, 0),
+            )
+            previous = squad
+
+    def test_lineups_are_distinct_and_ranked(self):
+        model = ts.SquadModel(
+            self.salaries, self.points, self.teams, self.players_per_team, 125
+        )
+        best = model.solve()
+
+        lineups = []
+        objectives = []
+        for result in model.lineups(4, starters_only=True):
+            lineups.append(result)
+            objectives.append(model.prob.objective.value())
+        starters = [
+            frozenset(i for v in result.starters.values() for i in v)
+            for result in lineups
+        ]
+        self.assertEqual(len(set(starters)), 4)
+        self.assertAlmostEqual(lineups[0].total_points, best.total_points)
+        # the subs count towards the objective, so it is the objective that
+        # can only go down as lineups are excluded, not the starters' points
+        self.assertEqual(objectives, sorted(objectives, reverse=True))
+
+        # the last lineup is excluded even though the caller stopped there
+        next_best = model.solve()
+        self.assertNotIn(
+            frozenset(i for v in next_best.starters.values() for i in v), starters
+        )
+
+        model.clear_lineups()
+        lineups = list(model.lineups(3, max_overlap=10))
+        first = set(lineups[0].player_ids)
+        for result in lineups[1:]:
+            self.assertLessEqual(len(first & set(result.player_ids)), 10)
+
+    def test_predict_stats_empty_slate(self):
+        empty = np.empty((0, 4))
+        network = torch.nn.Linear(4, 25)
+        self.assertEqual(ts.predict_stats(network, empty).shape, (0, 25))
+        self.assertEqual(ts.predict_stats(network, empty, 8).shape, (0, 25))
+
+        forest = RandomForestRegressor(n_estimators=2, random_state=0)
+        forest.fit(np.random.rand(10, 4), np.random.rand(10, 25))
+        self.assertEqual(ts.predict_stats(forest, empty).shape, (0, 25))
+        self.assertEqual(ts.predict_stats(forest, np.ones((3, 4)), 2).shape, (3, 25))
+
+    def test_import_is_lazy(self):
+        loaded = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                "import sys, team_selection; "
+                "print(sorted(m for m in ('numpy', 'pandas', 'pulp', 'torch') "
+                "if m in sys.modules))",
+            ],
+            cwd=SRC,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        self.assertEqual(loaded.stdout.strip(), "[]")
+
+
+class TestPlayerDict(unittest.TestCase):
+    def setUp(self):
+        from data_fixtures import write_csvs
+        from dataprep import DataPrep
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dataprepped = DataPrep(*write_csvs(self.tmp.name))
+        self.model_path = os.path.join(self.tmp.name, "model.pt")
+        self.schema_path = self.dataprepped.save_feature_schema(self.model_path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_schema_is_loaded_once(self):
+        schema = ts.load_schema(self.model_path)
+        self.assertIs(ts.load_schema(self.model_path), schema)
+
+        os.utime(self.schema_path, ns=(0, 0))
+        reloaded = ts.load_schema(self.model_path)
+        self.assertIsNot(reloaded, schema)
+        self.assertEqual(reloaded.to_dict(), schema.to_dict())
+
+        os.remove(self.schema_path)
+        self.assertIsNone(ts.load_schema(self.model_path))
+
+    def test_positions_without_a_column(self):
+        # there are no midfielders in the fixtures, so no midfield column
+        schema = ts.load_schema(self.model_path)
+        self.assertNotIn("midfield", schema)
+
+        network = torch.nn.Linear(len(schema.columns), 25)
+        with mock.patch.object(ts, "load_model", return_value=network):
+            week = ts.create_player_dict(self.dataprepped, self.model_path, 2)
+
+        self.assertEqual(
+            {player["position"] for player in week.values()},
+            {"goalie", "defense", "forward"},
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
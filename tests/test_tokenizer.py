@@ -0,0 +1,104 @@
+import os
+import sys
+import unittest
+
+from hypothesis import assume, given, strategies as st
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../src"))
+
+import data_cleaning as dc
+import player_data_scraper as pds
+import tokenizer as tk
+
+
+# the implementations the tokenizers replaced, kept to check against
+def old_clean_data(text):
+    word = ""
+    dont_want = ["\t", "\n", "\\"]
+    row = []
+    for char in text:
+        if char not in dont_want:
+            word += char
+            if word == "-":
+                row.append(word)
+                word = ""
+        elif word:
+            row.append(word)
+            word = ""
+    return row
+
+
+def old_remove_negative_scores(stats):
+    for i, _ in enumerate(stats):
+        if stats[i] == "-" and stats[i + 1] not in tk.TOP_STATS_LABELS:
+            stats[i + 1] = "-" + stats[i + 1]
+            stats[i:] = stats[(i + 1) :]
+    return stats
+
+
+def old_concat_salary_per_point(stats):
+    for i, _ in enumerate(stats):
+        if stats[i] == "$/POINT" and stats[i + 2][:2] != "RD":
+            stats[i + 1] = stats[i + 1] + stats[i + 2]
+            stats.pop(i + 2)
+    return stats
+
+
+def old_result(function, stats):
+    """Return the result of the old function, skipping inputs it raised an
+    IndexError on, which the new ones handle by leaving the end as it is.
+    """
+    try:
+        return function(list(stats))
+    except IndexError:
+        assume(False)
+
+
+scraped_text = st.text(alphabet=st.sampled_from("\t\n\\-ab1.$/, "))
+
+tokens = st.one_of(
+    st.sampled_from(sorted(tk.TOP_STATS_LABELS)),
+    st.sampled_from(["-", "$/POINT", "RD 3 RANK", "0", "12", "0.4", "$", "/POINT"]),
+    st.text(alphabet="-$/RDPOINT0,1 ", max_size=4),
+)
+token_lists = st.lists(tokens, max_size=30)
+
+
+class TestTokenizer(unittest.TestCase):
+    @given(scraped_text)
+    def test_tokenize_matches_clean_data(self, text):
+        self.assertEqual(tk.tokenize(text), old_clean_data(text))
+        self.assertEqual(pds.clean_data(text), old_clean_data(text))
+
+    @given(token_lists)
+    def test_join_negative_scores_matches(self, stats):
+        expected = old_result(old_remove_negative_scores, stats)
+        self.assertEqual(tk.join_negative_scores(stats), expected)
+
+    @given(token_lists)
+    def test_join_salary_per_point_matches(self, stats):
+        expected = old_result(old_concat_salary_per_point, stats)
+        self.assertEqual(tk.join_salary_per_point(stats), expected)
+
+    @given(token_lists)
+    def test_data_cleaning_updates_in_place(self, stats):
+        expected = old_result(old_remove_negative_scores, stats)
+        stats = list(stats)
+        self.assertIs(dc.remove_negative_scores(stats), stats)
+        self.assertEqual(stats, expected)
+
+    def test_top_stats_row(self):
+        text = "GAMES PLAYED\n5\tLOW SCORE\n-\n2\n$/POINT\n0\n4\nRD 2 RANK\n7\n"
+        stats = tk.join_salary_per_point(tk.join_negative_scores(tk.tokenize(text)))
+        self.assertEqual(
+            stats,
+            ["GAMES PLAYED", "5", "LOW SCORE", "-2", "$/POINT", "04", "RD 2 RANK", "7"],
+        )
+
+    def test_trailing_tokens_are_kept(self):
+        self.assertEqual(tk.join_negative_scores(["5", "-"]), ["5", "-"])
+        self.assertEqual(tk.join_salary_per_point(["$/POINT", "0"]), ["$/POINT", "0"])
+
+
+if __name__ == "__main__":
+    unittest.main()